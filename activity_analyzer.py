@@ -1,33 +1,126 @@
 import json
 import time
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, List, Optional, Tuple
 import subprocess
-import signal
-
-# Import Google Gemini
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.schema import SystemMessage, HumanMessage
+import sys
 
 from dotenv import load_dotenv
 
-load_dotenv()
-
-# Google Gemini API key setup
-import os
+import config
+from blob_store import BlobStore
+from batch_analyzer import BatchAnalyzer
+from delta_prompt import DeltaPrompter
+from editor_ingest import EditorTextResolver
+from event_channel import EventPublisher, subscribe, write_json_atomic
+from json_stream import IncrementalJSONParser
+from llm_prompts import (SYSTEM_PROMPT, build_combined_text, build_human_prompt, build_messages, error_result,
+                         parse_failure_result, parse_llm_response)
+from local_classifier import LocalClassifier
+from metrics import SIZE_BUCKETS, counter, gauge, histogram, span, start_metrics, timed
+from prediction_cache import PredictionCache
+from prompt_context import build_prompt_context
+from retention import bucket_start
+from search_index import SearchIndex, tokenize
+from session_index import SessionIndex, report_range
+from snapshot_store import SnapshotStore, timestamp_from_name
 
-os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")  # Set this externally
+load_dotenv()
 
-# Initialize Google Gemini LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.3,
-    convert_system_message_to_human=True
-)
+_llm = None
+_snapshot_store = None
+_blob_store = None
+_prediction_cache = None
+_local_classifier = None
+_prediction_log = None
+_editor_resolver = None
+_session_index = None
+
+
+def get_llm():
+    """Google Gemini chat model, imported and built on first use (needs GOOGLE_API_KEY)"""
+    global _llm
+    if _llm is None:
+        # LangChain and the Gemini SDK take over a second to import
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        _llm = ChatGoogleGenerativeAI(
+            model="gemini-2.5-flash",
+            temperature=0.3,
+            convert_system_message_to_human=True
+        )
+    return _llm
+
+
+def get_snapshot_store() -> SnapshotStore:
+    """Shared read handle on the segmented snapshot store"""
+    global _snapshot_store
+    if _snapshot_store is None:
+        _snapshot_store = SnapshotStore()
+    return _snapshot_store
+
+
+def get_blob_store() -> BlobStore:
+    """Shared handle on the blob store holding large snapshot fields"""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore()
+    return _blob_store
+
+
+def get_editor_resolver() -> EditorTextResolver:
+    """Rebuilds delta-encoded VS Code text from the snapshot store"""
+    global _editor_resolver
+    if _editor_resolver is None:
+        _editor_resolver = EditorTextResolver(get_snapshot_store(), get_blob_store())
+    return _editor_resolver
+
+
+def get_prediction_cache() -> PredictionCache:
+    """Shared near-duplicate prediction cache"""
+    global _prediction_cache
+    if _prediction_cache is None:
+        _prediction_cache = PredictionCache()
+    return _prediction_cache
+
+
+def get_local_classifier() -> LocalClassifier:
+    """Shared local fast-path classifier"""
+    global _local_classifier
+    if _local_classifier is None:
+        _local_classifier = LocalClassifier()
+    return _local_classifier
+
+
+def get_prediction_log() -> SnapshotStore:
+    """Segmented log of every prediction, keyed by the snapshot timestamp"""
+    global _prediction_log
+    if _prediction_log is None:
+        _prediction_log = SnapshotStore(config.PREDICTION_DIR)
+    return _prediction_log
+
+
+def get_session_index() -> SessionIndex:
+    """Running per-activity time totals and sessions"""
+    global _session_index
+    if _session_index is None:
+        _session_index = SessionIndex()
+    return _session_index
+
+
+def log_prediction(user_data: Dict[str, Any], result: Dict[str, Any]):
+    """Append a prediction to the log the local classifier is trained from"""
+    try:
+        get_prediction_log().append({"timestamp": user_data.get("timestamp", ""), "prediction": result})
+        get_session_index().add(user_data.get("timestamp", ""), result.get("activity", "unknown"))
+    except Exception as e:
+        print(f"❌ Failed to log prediction: {e}")
 
 
 def read_latest_user_data() -> Dict[str, Any]:
-    """Read the latest user data from live_output.json"""
+    """Read the latest user data from the snapshot store (live_output.json as fallback)"""
+    latest = get_snapshot_store().latest(1)
+    if latest:
+        return get_blob_store().lazy(latest[0], get_editor_resolver())
     try:
         with open("output/live_output.json", "r", encoding="utf-8") as f:
             return json.load(f)
@@ -38,7 +131,13 @@ def read_latest_user_data() -> Dict[str, Any]:
 
 
 def read_user_data_file(filename: str) -> Dict[str, Any]:
-    """Read a specific user data file"""
+    """Read a specific snapshot by its user_data_<timestamp>.json name"""
+    timestamp = timestamp_from_name(filename)
+    if timestamp:
+        record = get_snapshot_store().get(timestamp)
+        if record:
+            return get_blob_store().lazy(record, get_editor_resolver())
+    # Snapshots written before the segmented store existed
     try:
         with open(f"output/{filename}", "r", encoding="utf-8") as f:
             return json.load(f)
@@ -49,7 +148,7 @@ def read_user_data_file(filename: str) -> Dict[str, Any]:
 
 
 def get_all_user_data_files() -> List[str]:
-    """Get list of all user data files in output directory"""
+    """Get list of legacy per-snapshot files in output directory"""
     try:
         files = [f for f in os.listdir("output") if f.startswith("user_data_") and f.endswith(".json")]
         return sorted(files)
@@ -57,10 +156,13 @@ def get_all_user_data_files() -> List[str]:
         return []
 
 
-def analyze_user_activity_from_json(user_data: Dict[str, Any]) -> Dict[str, Any]:
+@timed("fast_path")
+def fast_path_result(user_data: Dict[str, Any], use_cache: bool = True,
+                     use_local: bool = True) -> Optional[Dict[str, Any]]:
     """
-    Analyze user data from JSON to determine what the user is doing
-    Returns JSON format with activity classification
+    Answer a snapshot without the LLM when possible: empty data, a confident
+    local classification ("source": "local") or a near-duplicate of a recently
+    analyzed snapshot ("cached": true). Returns None when the LLM is needed.
     """
     if not user_data:
         return {
@@ -70,28 +172,8 @@ def analyze_user_activity_from_json(user_data: Dict[str, Any]) -> Dict[str, Any]
             "timestamp": time.time()
         }
 
-    # Extract relevant information from user data
     active_window = user_data.get("active_window", "")
-    focused_text = user_data.get("focused_text", "")
-    clipboard_content = user_data.get("clipboard", "")
-    # vscode_text = user_data.get("vscode_text", "")
-    ocr_text = user_data.get("ocr_text", "")
-    timestamp = user_data.get("timestamp", "")
-
-    # Combine all text sources for analysis
-    #     combined_text = f"""
-    # Active Window: {active_window}
-    # Focused Text: {focused_text}
-    # Clipboard: {clipboard_content}
-    # VS Code Text: {vscode_text}
-    # Screen OCR: {ocr_text}
-    #     """.strip()
-    combined_text = f"""
-Active Window: {active_window}
-Focused Text: {focused_text}
-Clipboard: {clipboard_content}
-Screen OCR: {ocr_text}
-    """.strip()
+    combined_text = build_combined_text(user_data)
 
     if not combined_text or combined_text.strip() == "":
         return {
@@ -101,128 +183,191 @@ Screen OCR: {ocr_text}
             "timestamp": time.time()
         }
 
-    system_prompt = """You are an AI assistant that analyzes user activity data to determine what the user is currently doing. 
-
-    You have access to multiple data sources:
-    - Active Window: The currently active application
-    - Focused Text: Text from the focused element
-    - Clipboard: Content in the clipboard
-    - VS Code Text: Text from VS Code editor (if available)
-    - Screen OCR: Text extracted from screen capture
-
-    Analyze this data and classify the user's activity into one of these categories:
-    - coding: Writing, editing, or reviewing code (Python, JavaScript, etc.)
-    - researching: Reading articles, papers, documentation, or searching for information
-    - browsing: General web browsing, social media, or casual internet use
-    - emailing: Composing, reading, or managing emails
-    - messaging: Using chat applications, messaging apps, or communication tools
-    - gaming: Playing video games or game-related activities
-    - watching: Watching videos, streams, or multimedia content
-    - writing: Writing documents, notes, or creative content
-    - designing: Working on design, graphics, or creative projects
-    - working: General work activities not covered by other categories
-    - unknown: Unable to determine the activity
-
-    Consider the following patterns:
-    - Coding: Look for code syntax, function definitions, imports, IDE elements
-    - Messaging: Look for chat interfaces, message bubbles, contact names
-    - Researching: Look for articles, documentation, search results
-    - Browsing: Look for web browser elements, URLs, navigation
-
-    Return your response in valid JSON format with these fields:
-    - activity: The classified activity (string)
-    - confidence: Confidence level 0.0-1.0 (float)
-    - description: Brief description of what you observed (string)
-    - details: Additional context or specific tools/applications detected (string)
-    - data_sources: Which data sources were most useful for classification (string)
-    - timestamp: Current timestamp (float)
-
-    Example response:
-    {
-        "activity": "coding",
-        "confidence": 0.85,
-        "description": "User appears to be writing Python code in Cursor IDE",
-        "details": "Detected Python imports, function definitions, and Cursor IDE interface",
-        "data_sources": "VS Code text and active window",
-        "timestamp": 1234567890.123
-    }
-
-    Only return valid JSON, no additional text."""
-
-    human_prompt = f"Here's the user activity data to analyze:\n\n{combined_text}\n\nPlease analyze this data and determine what the user is doing."
+    if use_local:
+        local_text = f"{user_data.get('focused_text', '')}\n{user_data.get('ocr_text', '')}"
+        local_result = get_local_classifier().classify(active_window, local_text)
+        if local_result:
+            return local_result
 
-    try:
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_prompt)
-        ]
+    if use_cache:
+        cached = get_prediction_cache().lookup(active_window, combined_text)
+        if cached:
+            cached["cached"] = True
+            cached["timestamp"] = time.time()
+            return cached
+
+    return None
+
+
+def _chunk_text(chunk) -> str:
+    """Text of a streamed message chunk (Gemini may send a list of parts)"""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+
+
+def stream_llm_response(llm, messages: list,
+                        on_partial: Callable[[Dict[str, Any]], None]) -> Tuple[str, Optional[Any]]:
+    """
+    Read a streamed response through the incremental JSON parser. on_partial
+    gets activity and confidence as soon as both have arrived; reading stops
+    once the JSON is complete. Returns the text and the parsed value, or
+    None when no complete JSON came through.
+    """
+    # Responses are always objects; a "[1]" in leading prose must not count
+    parser = IncrementalJSONParser("{")
+    started = time.perf_counter()
+    published = False
+    for chunk in llm.stream(messages):
+        parser.feed(_chunk_text(chunk))
+        fields = parser.fields
+        if not published and "activity" in fields and "confidence" in fields:
+            published = True
+            histogram("llm_first_fields_seconds", "Time until activity and confidence were streamed").observe(
+                time.perf_counter() - started)
+            on_partial({
+                "activity": fields["activity"],
+                "confidence": fields["confidence"],
+                "description": "Analyzing…",
+                "details": "",
+                "data_sources": "",
+                "timestamp": time.time(),
+                "partial": True
+            })
+        if parser.done:
+            # Anything after the JSON is prose we don't need to wait for
+            break
+    return parser.text.strip(), parser.value if parser.done else None
+
+
+@timed("analyze")
+def analyze_user_activity_from_json(user_data: Dict[str, Any], use_cache: bool = True,
+                                    use_local: bool = True, client=None,
+                                    on_partial: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                    prompter: Optional[DeltaPrompter] = None) -> Dict[str, Any]:
+    """
+    Analyze user data from JSON to determine what the user is doing
+    Returns JSON format with activity classification
+    client overrides the Gemini model (e.g. fake_llm.FakeLLM for offline runs)
+    on_partial streams the response and is called early with activity and confidence
+    prompter sends only what changed since the previous snapshot (live monitor)
+    """
+    quick = fast_path_result(user_data, use_cache, use_local)
+    if quick is not None:
+        if prompter is not None and quick.get("activity", "unknown") != "unknown":
+            prompter.commit(user_data, quick)
+        return quick
+
+    active_window = user_data.get("active_window", "")
+    combined_text = build_combined_text(user_data)
+    delta = None
+    with span("prompt_build"):
+        if prompter is not None:
+            delta = prompter.prompt(user_data)
+            human_prompt, system_prompt = delta.human, delta.system
+        else:
+            # Deduplicated, de-noised and budgeted text keeps the prompt size predictable
+            context = build_prompt_context(user_data)
+            human_prompt, system_prompt = build_human_prompt(context.text), SYSTEM_PROMPT
+    if delta is not None:
+        counter("prompt_keyframes_total" if delta.keyframe else "prompt_deltas_total",
+                "Full keyframe prompts" if delta.keyframe else "Delta prompts").inc()
+        print(f"🧮 {'Keyframe' if delta.keyframe else 'Delta'} prompt ({delta.reason}): ~{delta.tokens} tokens")
+    else:
+        print(f"🧮 Prompt context: {context.tokens_before} → {context.tokens_after} tokens "
+              f"(budget {config.PROMPT_TOKEN_BUDGET})")
 
-        response = llm(messages)
-        response_text = response.content.strip()
+    try:
+        messages = build_messages(human_prompt, system_prompt)
+
+        histogram("llm_prompt_chars", "Characters sent to the LLM per call", buckets=SIZE_BUCKETS).observe(len(human_prompt))
+        llm = client or get_llm()
+        parsed = None
+        with span("llm_call"):
+            if on_partial is not None and hasattr(llm, "stream"):
+                response_text, parsed = stream_llm_response(llm, messages, on_partial)
+            else:
+                response_text = llm(messages).content.strip()
+        histogram("llm_response_chars", "Characters received from the LLM per call",
+                  buckets=SIZE_BUCKETS).observe(len(response_text))
 
         # Try to parse the JSON response
         try:
-            # Handle markdown-wrapped JSON responses
-            if response_text.startswith("```json") and response_text.endswith("```"):
-                # Extract JSON from markdown code blocks
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.rfind("```")
-                if json_start < json_end:
-                    response_text = response_text[json_start:json_end].strip()
-            elif response_text.startswith("```") and response_text.endswith("```"):
-                # Extract JSON from generic code blocks
-                json_start = response_text.find("```") + 3
-                json_end = response_text.rfind("```")
-                if json_start < json_end:
-                    response_text = response_text[json_start:json_end].strip()
-
-            result = json.loads(response_text)
+            result = parsed if parsed is not None else parse_llm_response(response_text)
             # Ensure timestamp is current
             result["timestamp"] = time.time()
+            if use_cache:
+                get_prediction_cache().put(active_window, combined_text, result)
+            if prompter is not None:
+                prompter.commit(user_data, result, delta)
             return result
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            return {
-                "activity": "unknown",
-                "confidence": 0.0,
-                "description": "Failed to parse LLM response",
-                "details": response_text,
-                "data_sources": "LLM response parsing failed",
-                "timestamp": time.time()
-            }
+        except (json.JSONDecodeError, TypeError):
+            counter("llm_parse_failures_total", "LLM responses that were not valid JSON").inc()
+            if prompter is not None:
+                prompter.reset()
+            return parse_failure_result(response_text)
 
     except Exception as e:
-        return {
-            "activity": "unknown",
-            "confidence": 0.0,
-            "description": f"Error analyzing user data: {str(e)}",
-            "details": "",
-            "data_sources": "Error occurred during analysis",
-            "timestamp": time.time()
-        }
-
-
-def analyze_historical_data(num_files: int = 5) -> List[Dict[str, Any]]:
-    """Analyze the most recent user data files"""
-    files = get_all_user_data_files()
-    if not files:
+        counter("llm_errors_total", "LLM calls that raised").inc()
+        if prompter is not None:
+            prompter.reset()
+        return error_result(e)
+
+
+def analyze_historical_data(num_files: int = 5, client=None, pack_size: int = config.BATCH_PACK_SIZE,
+                            on_result=None) -> List[Dict[str, Any]]:
+    """Analyze the most recent user data files concurrently, keeping their order"""
+    # Blob-backed fields are only loaded when the analysis reads them
+    snapshots = [get_blob_store().lazy(record, get_editor_resolver()) for record in get_snapshot_store().latest(num_files)]
+    if not snapshots:
+        # Fall back to legacy per-snapshot files
+        files = get_all_user_data_files()
+        recent_files = files[-num_files:] if len(files) > num_files else files
+        snapshots = [read_user_data_file(filename) for filename in recent_files]
+    snapshots = [user_data for user_data in snapshots if user_data]
+    if not snapshots:
         return []
 
-    # Get the most recent files
-    recent_files = files[-num_files:] if len(files) > num_files else files
-    results = []
-
-    for filename in recent_files:
-        user_data = read_user_data_file(filename)
-        if user_data:
-            analysis = analyze_user_activity_from_json(user_data)
-            analysis["source_file"] = filename
-            results.append(analysis)
-
-    return results
+    # The LLM is only built if the fast path leaves something to send
+    analyzer = BatchAnalyzer(client, pack_size=pack_size, prefilter=fast_path_result, on_result=on_result,
+                             get_client=get_llm)
+    return analyzer.run(snapshots)
+
+
+def backfill(start: Optional[str] = None, end: Optional[str] = None,
+             output_path: str = "output/backfill_predictions.jsonl", client=None,
+             pack_size: int = config.BATCH_PACK_SIZE):
+    """Re-analyze every stored snapshot in [start, end], appending results to output_path as they finish"""
+    snapshots = [get_blob_store().lazy(record, get_editor_resolver()) for record in get_snapshot_store().iter_range(start, end)]
+    print(f"🔍 Backfilling {len(snapshots)} snapshot(s) into {output_path}...")
+    if not snapshots:
+        return
+    done = [0]
+
+    def progress(result):
+        done[0] += 1
+        print(f"  [{done[0]}/{len(snapshots)}] {result.get('source_file')}: {result.get('activity')}")
+
+    analyzer = BatchAnalyzer(client, pack_size=pack_size, on_result=progress, output_path=output_path,
+                             get_client=get_llm)
+    started = time.time()
+    analyzer.run(snapshots)
+    print(f"✅ Backfill finished in {time.time() - started:.1f}s "
+          f"({analyzer.llm_calls} LLM calls, {analyzer.retried_calls} retried)")
+
+
+def publish_prediction(publisher: EventPublisher, result: Dict[str, Any]):
+    """Push a (possibly partial) prediction to the popup and prediction_output.json"""
+    publisher.publish("prediction", result)
+    if config.FILE_SINKS:
+        try:
+            write_json_atomic("output/prediction_output.json", result, indent=2)
+        except Exception as e:
+            print(f"❌ Failed to save prediction output: {e}")
 
 
-def main():
+def main(client=None):
     """Main function to continuously monitor and analyze user activity"""
     print("🔍 User Activity Monitor Started")
     print("Using Google Gemini LLM for activity analysis")
@@ -230,42 +375,58 @@ def main():
     print("Press Ctrl+C to stop\n")
 
     # Start gatheruserdata.py as a subprocess
+    # Same interpreter (and virtualenv) as this process, wherever it is started from
     gather_proc = subprocess.Popen([
-        "python", "gatheruserdata.py"
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "gatheruserdata.py")
     ])
     print("🚀 Started gatheruserdata.py in the background (PID: {}), collecting user data...".format(gather_proc.pid))
 
+    publisher = EventPublisher()
+    # Consecutive snapshots are sent as diffs against the previous one
+    prompter = DeltaPrompter() if config.DELTA_PROMPTS else None
+    exporter = start_metrics("analyzer", config.METRICS_ANALYZER_PORT)
+    gauge("local_hit_rate", "Share of snapshots answered by the local classifier",
+          function=lambda: get_local_classifier().hit_rate)
+    gauge("prediction_cache_hits", "Prediction cache hits", function=lambda: get_prediction_cache().hits)
+    gauge("prediction_cache_misses", "Prediction cache misses", function=lambda: get_prediction_cache().misses)
     try:
         last_timestamp = None
-        while True:
-            print("📊 Reading latest user data...")
-            user_data = read_latest_user_data()
+        # New snapshots are pushed by gatheruserdata.py; when the channel is idle
+        # or unavailable the latest stored snapshot is read instead
+        for event in subscribe(["snapshot"]):
+            if event is not None:
+                user_data = event[1]
+            else:
+                user_data = read_latest_user_data()
 
             # Only analyze if new data is available
             if user_data and user_data.get("timestamp") != last_timestamp:
                 last_timestamp = user_data.get("timestamp")
                 print("🤖 Analyzing user activity from JSON data...")
-                result = analyze_user_activity_from_json(user_data)
+                # Activity and confidence reach the popup while the rest is still generating
+                on_partial = (lambda partial: publish_prediction(publisher, partial)) if config.LLM_STREAMING else None
+                result = analyze_user_activity_from_json(user_data, client=client, on_partial=on_partial,
+                                                         prompter=prompter)
                 # Pretty print the JSON result
                 print("📊 Activity Analysis:")
                 print(json.dumps(result, indent=2))
-                try:
-                    with open("output/prediction_output.json", "w", encoding="utf-8") as f:
-                        json.dump(result, f, indent=2)
-                except Exception as e:
-                    print(f"❌ Failed to save prediction output: {e}")
+                local = get_local_classifier()
+                print(f"⚡ Local fast-path hit rate: {local.hit_rate:.0%} "
+                      f"({local.local_hits} local / {local.escalations} escalated)")
+                with span("prediction_output"):
+                    log_prediction(user_data, result)
+                    publish_prediction(publisher, result)
                 print("=" * 60)
-            else:
+            elif event is None:
                 print("⏳ Waiting for new user data...")
 
-            # Wait before next check
-            time.sleep(5)
-
     except KeyboardInterrupt:
         print("\n👋 Activity monitor stopped by user")
     except Exception as e:
         print(f"❌ Error: {e}")
     finally:
+        if exporter is not None:
+            exporter.stop()
         print("🛑 Terminating gatheruserdata.py subprocess...")
         gather_proc.terminate()
         try:
@@ -275,46 +436,168 @@ def main():
         print("✅ gatheruserdata.py stopped.")
 
 
-def analyze_single_file(filename: str):
+def analyze_single_file(filename: str, client=None):
     """Analyze a specific user data file"""
     print(f"🔍 Analyzing file: {filename}")
     user_data = read_user_data_file(filename)
 
     if user_data:
-        result = analyze_user_activity_from_json(user_data)
+        def early(partial):
+            print(f"⚡ Early result: {partial['activity']} ({partial['confidence']})")
+
+        result = analyze_user_activity_from_json(user_data, client=client,
+                                                 on_partial=early if config.LLM_STREAMING else None)
         print("📊 Activity Analysis:")
         print(json.dumps(result, indent=2))
     else:
         print(f"❌ Could not read file: {filename}")
 
 
-def analyze_recent_files(num_files: int = 5):
+def print_result_summary(result: Dict[str, Any]):
+    print(f"\n📁 File: {result.get('source_file', 'Unknown')}")
+    print(f"🎯 Activity: {result.get('activity', 'Unknown')}")
+    print(f"📈 Confidence: {result.get('confidence', 0.0):.2f}")
+    print(f"📝 Description: {result.get('description', 'No description')}")
+    print("-" * 40)
+
+
+def analyze_recent_files(num_files: int = 5, client=None, pack_size: int = config.BATCH_PACK_SIZE):
     """Analyze the most recent user data files"""
     print(f"🔍 Analyzing {num_files} most recent files...")
-    results = analyze_historical_data(num_files)
+    # Results are printed in order as soon as they (and all earlier ones) are done
+    analyze_historical_data(num_files, client=client, pack_size=pack_size, on_result=print_result_summary)
+
+
+def format_duration(seconds: float) -> str:
+    minutes = int(seconds // 60)
+    return f"{minutes // 60}h {minutes % 60:02d}m" if minutes >= 60 else f"{minutes}m {int(seconds % 60):02d}s"
+
+
+def print_report(period: str = "today"):
+    """Time per activity over a period, from the session index"""
+    started = time.perf_counter()
+    index = SessionIndex(readonly=True)
+    start_day, end_day = report_range(period)
+    totals = index.totals(None, None) if period == "all" else index.totals(start_day, end_day)
+    print(f"🕒 Activity report ({period}: {start_day} → {end_day})" if period != "all" else "🕒 Activity report (all time)")
+    if not totals:
+        print("  No predictions recorded for this period.")
+    overall = sum(totals.values()) or 1.0
+    for activity, seconds in sorted(totals.items(), key=lambda item: -item[1]):
+        print(f"  {activity:<14} {format_duration(seconds):>9}  {seconds / overall:5.0%}")
+    if start_day == end_day:
+        hours = index.hours(start_day)
+        if hours:
+            print("By hour:")
+            for hour, activities in hours.items():
+                parts = sorted(activities.items(), key=lambda item: -item[1])
+                print(f"  {hour}:00  " + ", ".join(f"{activity} {format_duration(seconds)}" for activity, seconds in parts))
+        sessions = list(index.sessions_between(start_day, end_day))
+        if sessions:
+            print("Sessions:")
+            for session in sessions:
+                marker = " (ongoing)" if session.get("open") else ""
+                print(f"  {session['timestamp'][11:].replace('-', ':')}  {session['activity']:<14} "
+                      f"{format_duration(session['seconds']):>9}{marker}")
+    print(f"⚡ Report built in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+def search_snippet(user_data: Dict[str, Any], query: str, width: int = 90) -> str:
+    """First line of the snapshot's text that contains a query term"""
+    terms = set(tokenize(query))
+    # Rollups of deleted snapshots only keep a condensed "text" field
+    for field in ("active_window", "focused_text", "clipboard", "ocr_text", "text"):
+        value = user_data.get(field)
+        if not isinstance(value, str):
+            continue
+        for line in value.splitlines():
+            if terms & set(tokenize(line)):
+                line = " ".join(line.split())
+                return line if len(line) <= width else line[:width - 1] + "…"
+    return ""
+
+
+def print_search(query: str, limit: int = 10):
+    """Ranked snapshots matching a full-text query, with their predicted activity"""
+    started = time.perf_counter()
+    hits = SearchIndex(readonly=True).search(query, limit)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"🔎 {len(hits)} result(s) for {query!r} in {elapsed:.1f} ms")
+    rollups = None
+    for score, timestamp in hits:
+        logged = get_prediction_log().get(timestamp)
+        prediction = logged.get("prediction", {}) if logged else {}
+        record = get_snapshot_store().get(timestamp)
+        if record is None:
+            # Snapshots past the retention horizon only survive in their rollup
+            if rollups is None:
+                rollups = SnapshotStore(config.ROLLUP_DIR)
+            record = rollups.get(bucket_start(timestamp, config.ROLLUP_MINUTES)) or {}
+            prediction = prediction or record.get("prediction") or {}
+            user_data = record
+        else:
+            user_data = get_blob_store().lazy(record, get_editor_resolver())
+        print(f"  {timestamp}  {prediction.get('activity', 'unknown'):<14} {score:7.2f}  "
+              f"{user_data.get('active_window', '')}")
+        snippet = search_snippet(user_data, query)
+        if snippet:
+            print(f"      {snippet}")
+
 
-    for result in results:
-        print(f"\n📁 File: {result.get('source_file', 'Unknown')}")
-        print(f"🎯 Activity: {result.get('activity', 'Unknown')}")
-        print(f"📈 Confidence: {result.get('confidence', 0.0):.2f}")
-        print(f"📝 Description: {result.get('description', 'No description')}")
-        print("-" * 40)
+def pop_option(args: List[str], name: str, default: Optional[str] = None) -> Optional[str]:
+    """Remove "--name [value]" from args and return the value (or default)"""
+    if name not in args:
+        return None
+    position = args.index(name)
+    args.pop(position)
+    if position < len(args) and not args[position].startswith("--"):
+        return args.pop(position)
+    return default
 
 
 if __name__ == "__main__":
-    import sys
-
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--file" and len(sys.argv) > 2:
-            analyze_single_file(sys.argv[2])
-        elif sys.argv[1] == "--recent" and len(sys.argv) > 2:
-            analyze_recent_files(int(sys.argv[2]))
-        elif sys.argv[1] == "--recent":
-            analyze_recent_files()
+    args = sys.argv[1:]
+    # Options shared by the batch modes
+    fake_latency = pop_option(args, "--fake-llm", "0.5")
+    client = None
+    if fake_latency is not None:
+        from fake_llm import FakeLLM
+        client = FakeLLM(latency=float(fake_latency))
+    pack_size = int(pop_option(args, "--pack") or config.BATCH_PACK_SIZE)
+
+    if args:
+        if args[0] == "--file" and len(args) > 1:
+            analyze_single_file(args[1], client=client)
+        elif args[0] == "--recent" and len(args) > 1:
+            analyze_recent_files(int(args[1]), client=client, pack_size=pack_size)
+        elif args[0] == "--recent":
+            analyze_recent_files(client=client, pack_size=pack_size)
+        elif args[0] == "--search" and len(args) > 1:
+            limit = int(pop_option(args, "--limit") or 10)
+            print_search(" ".join(args[1:]), limit)
+        elif args[0] == "--report":
+            period = args[1] if len(args) > 1 else "today"
+            try:
+                report_range(period)
+            except ValueError:
+                print(f"❌ Unknown report period: {period}")
+                print("Usage:")
+                print("  python activity_analyzer.py --report [today|yesterday|week|month|all|YYYY-MM-DD]")
+                sys.exit(1)
+            print_report(period)
+        elif args[0] == "--backfill":
+            backfill(args[1] if len(args) > 1 else None, args[2] if len(args) > 2 else None,
+                     client=client, pack_size=pack_size)
         else:
             print("Usage:")
             print("  python activity_analyzer.py                    # Monitor live data")
             print("  python activity_analyzer.py --file <filename>  # Analyze specific file")
             print("  python activity_analyzer.py --recent [num]     # Analyze recent files")
+            print("  python activity_analyzer.py --backfill [start] [end]  # Re-analyze stored snapshots")
+            print("  python activity_analyzer.py --report [today|yesterday|week|month|all|YYYY-MM-DD]  # Time per activity")
+            print("  python activity_analyzer.py --search <words> [--limit n]  # When was I looking at this?")
+            print("Options:")
+            print("  --pack <n>          # Snapshots per LLM prompt (--recent / --backfill)")
+            print("  --fake-llm [secs]   # Use the local fake LLM with this latency (any mode)")
     else:
-        main() 
\ No newline at end of file
+        main(client)
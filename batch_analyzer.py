@@ -0,0 +1,170 @@
+import asyncio
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+from llm_prompts import (BATCH_INSTRUCTIONS, SYSTEM_PROMPT, build_batch_prompt, build_human_prompt,
+                         build_messages, error_result, parse_failure_result, parse_llm_response)
+from metrics import counter, span
+from prompt_context import build_prompt_context
+from snapshot_store import snapshot_name
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by concurrent asyncio tasks"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class BatchAnalyzer:
+    """
+    Concurrent, rate-limited LLM analysis of many snapshots.
+    At most `concurrency` requests are in flight, request starts are limited
+    by a token bucket, and failed calls are retried with exponential backoff
+    and jitter. With pack_size > 1, several snapshots go into one
+    multi-item prompt; if the answer doesn't hold one result per snapshot,
+    each snapshot of that pack is retried on its own. Results keep input
+    order and are handed to on_result (and appended to output_path) as soon
+    as every earlier result is done. Without a client, get_client builds
+    one when the first request has to be sent, so runs the prefilter fully
+    answers never load the LLM.
+    """
+
+    def __init__(self, client=None, concurrency: int = config.BATCH_CONCURRENCY,
+                 rate: float = config.BATCH_RATE, burst: float = config.BATCH_BURST,
+                 retries: int = config.BATCH_RETRIES, base_delay: float = 1.0,
+                 pack_size: int = config.BATCH_PACK_SIZE,
+                 prefilter: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = None,
+                 on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 output_path: Optional[str] = None, get_client: Optional[Callable[[], Any]] = None):
+        self.client = client
+        self.get_client = get_client
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.pack_size = max(1, pack_size)
+        self.prefilter = prefilter
+        self.on_result = on_result
+        self.output_path = output_path
+        self.llm_calls = 0
+        self.retried_calls = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._results: List[Optional[Dict[str, Any]]] = []
+        self._written = 0
+
+    async def _invoke(self, human_prompt: str, system_prompt: str = SYSTEM_PROMPT) -> str:
+        messages = build_messages(human_prompt, system_prompt)
+        if self.client is None:
+            self.client = self.get_client()
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            self.llm_calls += 1
+            try:
+                with span("llm_call"):
+                    if hasattr(self.client, "ainvoke"):
+                        response = await self.client.ainvoke(messages)
+                    else:
+                        loop = asyncio.get_running_loop()
+                        response = await loop.run_in_executor(None, self.client, messages)
+                return response.content.strip()
+            except Exception:
+                if attempt >= self.retries:
+                    raise
+                self.retried_calls += 1
+                counter("llm_retries_total", "LLM calls retried after an error").inc()
+                # Exponential backoff with jitter so retries don't arrive in lockstep
+                await asyncio.sleep(self.base_delay * 2 ** attempt * random.uniform(0.5, 1.5))
+                attempt += 1
+
+    async def _analyze_single(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response_text = await self._invoke(build_human_prompt(build_prompt_context(user_data).text))
+        except Exception as e:
+            return error_result(e)
+        try:
+            result = parse_llm_response(response_text)
+            result["timestamp"] = time.time()
+            return result
+        except (json.JSONDecodeError, TypeError):
+            return parse_failure_result(response_text)
+
+    async def _analyze_pack(self, pack: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if len(pack) > 1:
+            try:
+                response_text = await self._invoke(
+                    build_batch_prompt([build_prompt_context(user_data).text for user_data in pack]),
+                    f"{SYSTEM_PROMPT}\n\n{BATCH_INSTRUCTIONS}"
+                )
+                results = parse_llm_response(response_text, "[")
+                if isinstance(results, list) and len(results) == len(pack) and all(isinstance(r, dict) for r in results):
+                    now = time.time()
+                    for result in results:
+                        result["timestamp"] = now
+                    return results
+            except Exception:
+                pass
+        return [await self._analyze_single(user_data) for user_data in pack]
+
+    async def _run_pack(self, indices: List[int], snapshots: List[Dict[str, Any]]):
+        async with self._semaphore:
+            results = await self._analyze_pack([snapshots[index] for index in indices])
+        for index, result in zip(indices, results):
+            self._results[index] = result
+        self._flush(snapshots)
+
+    def _flush(self, snapshots: List[Dict[str, Any]]):
+        """Emit the finished prefix of the results in input order"""
+        lines = []
+        while self._written < len(self._results) and self._results[self._written] is not None:
+            result = self._results[self._written]
+            result["source_file"] = snapshot_name(snapshots[self._written].get("timestamp", ""))
+            if self.on_result:
+                self.on_result(result)
+            lines.append(json.dumps(result, ensure_ascii=False))
+            self._written += 1
+        if lines and self.output_path:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+    async def analyze(self, snapshots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Analyze all snapshots; the returned list matches their order"""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._results = [None] * len(snapshots)
+        self._written = 0
+        pending = []
+        for index, user_data in enumerate(snapshots):
+            quick = self.prefilter(user_data) if self.prefilter else None
+            if quick is not None:
+                self._results[index] = quick
+            else:
+                pending.append(index)
+        self._flush(snapshots)
+        packs = [pending[i:i + self.pack_size] for i in range(0, len(pending), self.pack_size)]
+        await asyncio.gather(*(self._run_pack(pack, snapshots) for pack in packs))
+        return list(self._results)
+
+    def run(self, snapshots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Synchronous entry point"""
+        return asyncio.run(self.analyze(snapshots))
@@ -0,0 +1,71 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import-time budgets in milliseconds for the entry points. Heavy libraries
+# (LangChain, the Gemini SDK, pytesseract/PIL) must stay behind lazy imports
+# to fit; cv2 and numpy are needed for capture and are counted.
+BUDGETS_MS = {
+    "activity_analyzer": 400,
+    "gatheruserdata": 600,
+    "output_popup": 300,
+}
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module: str) -> Tuple[float, List[Tuple[float, str]]]:
+    """Cumulative import time of a module in a fresh interpreter, plus its slowest direct imports"""
+    env = dict(os.environ)
+    # The analyzer must import without an API key
+    env.pop("GOOGLE_API_KEY", None)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    total, children, pending = 0.0, [], []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)) / 1000, len(match.group(3)), match.group(4)
+        if indent == 1:
+            # Children are listed before their parent; drop those of interpreter startup imports
+            if name == module:
+                total, children = cumulative, pending
+            pending = []
+        elif indent == 3:
+            pending.append((cumulative, name))
+    return total, sorted(children, reverse=True)[:5]
+
+
+def check(modules: Dict[str, int], runs: int = 3) -> bool:
+    ok = True
+    for module, budget in modules.items():
+        try:
+            samples = [measure(module) for _ in range(runs)]
+        except RuntimeError as e:
+            print(f"⚠ {module}: could not be imported ({e})")
+            continue
+        median = statistics.median(total for total, _ in samples)
+        within = median <= budget
+        ok = ok and within
+        print(f"{'✅' if within else '❌'} {module:<20} {median:8.1f} ms (budget {budget} ms)")
+        if not within:
+            for cumulative, name in samples[-1][1]:
+                print(f"     {name:<30} {cumulative:8.1f} ms")
+    return ok
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    budgets = dict(BUDGETS_MS)
+    if "--budget" in args and args.index("--budget") + 1 < len(args):
+        # One budget for every module, e.g. on a slow CI machine
+        value = int(args[args.index("--budget") + 1])
+        budgets = {module: value for module in budgets}
+    sys.exit(0 if check(budgets) else 1)
@@ -0,0 +1,290 @@
+import contextlib
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import cv2
+import pytesseract
+
+import config
+from activity_analyzer import analyze_user_activity_from_json
+from batch_analyzer import BatchAnalyzer
+from benchmarks.synthetic import frame_sequence
+from blob_store import BlobStore
+from delta_prompt import DeltaPrompter
+from editor_ingest import EditorDeltaEncoder
+from fake_llm import FakeLLM
+from prompt_context import build_prompt_context
+from screen_capture import ScreenCapture
+from snapshot_store import SnapshotStore
+from text_regions import box_coverage, detect_text_regions, ocr_text_regions
+from tile_ocr import TiledOCR
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def directory_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def timed(function: Callable, items: List[Any]) -> List[float]:
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        function(item)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def load_sample_frames() -> List[Any]:
+    """Archived screenshots from output/, as BGRA like mss delivers them"""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, "output", "screenshot_*.png"))):
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is not None:
+            frames.append(cv2.cvtColor(image, cv2.COLOR_BGR2BGRA))
+    return frames
+
+
+def load_sample_snapshots(count: int) -> List[Dict[str, Any]]:
+    """The output/user_data_*.json samples, repeated with small edits up to count snapshots"""
+    samples = []
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, "output", "user_data_*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                samples.append(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            continue
+    if not samples:
+        samples = [{"active_window": "Google Chrome", "focused_text": "", "clipboard": "",
+                    "vscode_text": "", "ocr_text": "Search results for benchmark"}]
+    snapshots = []
+    for index in range(count):
+        snapshot = dict(samples[index % len(samples)])
+        snapshot["timestamp"] = time.strftime("%Y-%m-%d_%H-%M-%S", time.gmtime(1_700_000_000 + index * 5))
+        # Consecutive snapshots differ a little, like a user typing
+        snapshot["vscode_text"] = f"{snapshot.get('vscode_text', '')}\n# edit {index}"
+        snapshot["ocr_text"] = f"{snapshot.get('ocr_text', '')}\nline {index}"
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def tesseract_available() -> bool:
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def bench_capture(frames: List[Any], results: Dict[str, Any]):
+    capture = ScreenCapture(scale=1.0)
+    results["stages"]["preprocess"] = percentiles(timed(capture.preprocess, frames))
+    gray = [capture.preprocess(frame).copy() for frame in frames]
+    capture.close()
+    # Text-line detection runs without tesseract; coverage is the share of pixels left to OCR
+    results["stages"]["text_regions"] = percentiles(timed(detect_text_regions, gray))
+    coverage = [box_coverage(detect_text_regions(frame), frame.shape) for frame in gray]
+    results["text_region_coverage"] = round(sum(coverage) / len(coverage), 3) if coverage else None
+
+
+def bench_ocr(frames: List[Any], sequence: List[Any], results: Dict[str, Any]):
+    if not tesseract_available():
+        results["skipped"].append("ocr: tesseract not found")
+        print("[Warning] tesseract not found, skipping the OCR stages")
+        return
+    capture = ScreenCapture(scale=1.0)
+    cold = [capture.preprocess(frame).copy() for frame in frames + sequence]
+    sequence_gray = cold[len(frames):]
+    # Cold: every frame OCR'd from scratch with an empty tile cache
+    samples = timed(lambda gray: TiledOCR().run(gray), cold)
+    results["stages"]["ocr_cold"] = percentiles(samples)
+    megapixels = sum(gray.size for gray in cold) / 1e6
+    results["throughput"]["ocr_cold_fps"] = round(len(cold) / sum(samples), 3)
+    results["throughput"]["ocr_cold_mpix_per_s"] = round(megapixels / sum(samples), 3)
+    # Same frames with only the detected text lines sent to tesseract
+    samples = timed(lambda gray: TiledOCR(ocr_func=ocr_text_regions).run(gray), cold)
+    results["stages"]["ocr_regions_cold"] = percentiles(samples)
+    results["throughput"]["ocr_regions_cold_fps"] = round(len(cold) / sum(samples), 3)
+    # Incremental: one line changes per frame, so only dirty bands are re-read
+    tiled = TiledOCR()
+    samples = timed(tiled.run, sequence_gray)
+    results["stages"]["ocr_incremental"] = percentiles(samples)
+    results["throughput"]["ocr_incremental_fps"] = round(len(sequence_gray) / sum(samples), 3)
+    results["ocr_tile_cache"] = {"hits": tiled.cache.hits, "misses": tiled.cache.misses}
+
+
+def bench_persist(snapshots: List[Dict[str, Any]], results: Dict[str, Any]):
+    store, blobs, editor = SnapshotStore(), BlobStore(), EditorDeltaEncoder()
+    samples = timed(lambda snapshot: store.append(blobs.pack(editor.encode(snapshot))), snapshots)
+    store.close()
+    results["stages"]["persist"] = percentiles(samples)
+    written = directory_bytes(config.SNAPSHOT_DIR) + directory_bytes(config.BLOB_DIR)
+    results["bytes_per_snapshot"] = round(written / len(snapshots), 1)
+
+
+def bench_analysis(snapshots: List[Dict[str, Any]], latency: float, results: Dict[str, Any]):
+    results["stages"]["prompt_context"] = percentiles(timed(build_prompt_context, snapshots))
+    client = FakeLLM(latency=latency)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # Every snapshot through the LLM path, then with the local classifier and cache in front
+        results["stages"]["analyze_llm"] = percentiles(timed(
+            lambda snapshot: analyze_user_activity_from_json(snapshot, use_cache=False, use_local=False,
+                                                             client=client), snapshots))
+        results["stages"]["analyze_fast_path"] = percentiles(timed(
+            lambda snapshot: analyze_user_activity_from_json(snapshot, client=client), snapshots))
+        # Streaming: time until activity and confidence could be shown
+        first_fields = []
+
+        def stream_once(snapshot):
+            started = time.perf_counter()
+            analyze_user_activity_from_json(snapshot, use_cache=False, use_local=False, client=client,
+                                            on_partial=lambda _: first_fields.append(time.perf_counter() - started))
+        timed(stream_once, snapshots)
+        results["stages"]["llm_first_fields"] = percentiles(first_fields)
+        # Session-aware prompting: the same snapshots as diffs against their predecessor
+        full_llm, delta_llm, prompter = FakeLLM(latency=latency), FakeLLM(latency=latency), DeltaPrompter()
+        for snapshot in snapshots:
+            analyze_user_activity_from_json(snapshot, use_cache=False, use_local=False, client=full_llm)
+        results["stages"]["analyze_delta"] = percentiles(timed(
+            lambda snapshot: analyze_user_activity_from_json(snapshot, use_cache=False, use_local=False,
+                                                             client=delta_llm, prompter=prompter), snapshots))
+        results["prompt_chars_per_call"] = {"full": round(full_llm.prompt_chars / len(snapshots)),
+                                            "delta": round(delta_llm.prompt_chars / len(snapshots))}
+    analyzer = BatchAnalyzer(FakeLLM(latency=latency), rate=1000.0, burst=config.BATCH_CONCURRENCY)
+    started = time.perf_counter()
+    analyzer.run(snapshots)
+    elapsed = time.perf_counter() - started
+    results["throughput"]["batch_snapshots_per_s"] = round(len(snapshots) / elapsed, 3)
+    results["llm_calls"] = client.calls + analyzer.llm_calls
+
+
+def compare(previous_path: str, results: Dict[str, Any]):
+    """Print the p50 change of every stage against an earlier results file"""
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"\nCompared with {previous_path}:")
+    for stage, summary in results["stages"].items():
+        before = previous.get("stages", {}).get(stage, {}).get("p50_ms")
+        if before and "p50_ms" in summary:
+            change = (summary["p50_ms"] - before) / before * 100
+            print(f"  {stage:<20} p50 {before:>10.2f} → {summary['p50_ms']:>10.2f} ms ({change:+.1f}%)")
+
+
+def run(synthetic_frames: int = 10, width: int = 1920, height: int = 1080, snapshots: int = 50,
+        latency: float = 0.05) -> Dict[str, Any]:
+    results = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {"synthetic_frames": synthetic_frames, "width": width, "height": height,
+                       "snapshots": snapshots, "llm_latency": latency},
+        "stages": {},
+        "throughput": {},
+        "skipped": [],
+    }
+    frames = load_sample_frames()
+    sequence = list(frame_sequence(synthetic_frames, width, height))
+    user_data = load_sample_snapshots(snapshots)
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="buddy-bench-") as scratch:
+        # Stores, caches and the prediction log all live under output/ relative to the cwd
+        os.chdir(scratch)
+        try:
+            bench_capture(frames + sequence, results)
+            bench_ocr(frames, sequence, results)
+            bench_persist(user_data, results)
+            bench_analysis(user_data, latency, results)
+        finally:
+            os.chdir(workdir)
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def print_results(results: Dict[str, Any]):
+    print(f"{'stage':<20} {'count':>6} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10}")
+    for stage, summary in results["stages"].items():
+        print(f"{stage:<20} {summary['count']:>6} {summary.get('p50_ms', 0):>10.2f} "
+              f"{summary.get('p90_ms', 0):>10.2f} {summary.get('p99_ms', 0):>10.2f}")
+    for name, value in results["throughput"].items():
+        print(f"{name:<28} {value}")
+    print(f"{'text_region_coverage':<28} {results.get('text_region_coverage')}")
+    print(f"{'prompt_chars_per_call':<28} {results.get('prompt_chars_per_call')}")
+    print(f"{'bytes_per_snapshot':<28} {results.get('bytes_per_snapshot')}")
+    print(f"{'peak_rss_mb':<28} {results.get('peak_rss_mb')}")
+    for reason in results["skipped"]:
+        print(f"skipped: {reason}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--help" in args or "-h" in args:
+        print("Usage:")
+        print("  python -m benchmarks.run [--frames n] [--size WxH] [--snapshots n] [--latency s]")
+        print("                           [--output results.json] [--compare previous.json]")
+        sys.exit(0)
+
+    def option(name: str, default: Optional[str] = None) -> Optional[str]:
+        return args[args.index(name) + 1] if name in args and args.index(name) + 1 < len(args) else default
+
+    width, height = (int(value) for value in option("--size", "1920x1080").lower().split("x"))
+    results = run(
+        synthetic_frames=int(option("--frames", "10")),
+        width=width,
+        height=height,
+        snapshots=int(option("--snapshots", "50")),
+        latency=float(option("--latency", "0.05")),
+    )
+    print_results(results)
+    output_path = option("--output")
+    if output_path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(RESULTS_DIR, f"bench_{time.strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Results written to {output_path}")
+    if option("--compare"):
+        compare(option("--compare"), results)
@@ -0,0 +1,33 @@
+import random
+from typing import Iterator, List
+
+import cv2
+import numpy as np
+
+WORDS = ("def", "import", "return", "class", "self", "value", "result", "config", "snapshot", "window",
+         "inbox", "meeting", "budget", "report", "search", "python", "error", "update", "design", "review")
+LINE_HEIGHT = 28
+
+
+def random_line(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+
+
+def text_frame(lines: List[str], width: int, height: int) -> np.ndarray:
+    """BGRA frame with dark text lines on a light background, like a document window"""
+    frame = np.full((height, width, 4), 245, dtype=np.uint8)
+    for row, line in enumerate(lines):
+        y = 40 + row * LINE_HEIGHT
+        if y >= height - 10:
+            break
+        cv2.putText(frame, line, (40, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (20, 20, 20, 255), 1, cv2.LINE_AA)
+    return frame
+
+
+def frame_sequence(count: int, width: int = 1920, height: int = 1080, seed: int = 0) -> Iterator[np.ndarray]:
+    """Frames where each one edits a single line of the previous, as when typing in an editor"""
+    rng = random.Random(seed)
+    lines = [random_line(rng) for _ in range((height - 40) // LINE_HEIGHT)]
+    for _ in range(count):
+        yield text_frame(lines, width, height)
+        lines[rng.randrange(len(lines))] = random_line(rng)
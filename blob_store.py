@@ -0,0 +1,143 @@
+import glob
+import hashlib
+import os
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Set
+
+import config
+
+# Key marking a field value that lives in the blob store
+BLOB_REF = "$blob"
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and BLOB_REF in value
+
+
+class BlobStore:
+    """
+    Content-addressed storage for large snapshot text fields.
+    Each distinct value is written once as a zlib-compressed file named
+    after its hash; snapshots only keep a {"$blob": <hash>} reference, so a
+    clipboard or OCR text that repeats across snapshots costs nothing extra.
+    """
+
+    def __init__(self, directory: str = config.BLOB_DIR,
+                 min_size: int = config.BLOB_MIN_SIZE,
+                 fields=config.BLOB_FIELDS,
+                 cache_size: int = 64):
+        self.directory = directory
+        self.min_size = min_size
+        self.fields = tuple(fields)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.z")
+
+    def put(self, text: str) -> str:
+        """Store a value (once) and return its hash"""
+        data = text.encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+        path = self._path(digest)
+        try:
+            # Touching a reused blob keeps garbage collection away from it
+            os.utime(path)
+            exists = True
+        except FileNotFoundError:
+            exists = False
+        if not exists:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(data, 6))
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Load a value by hash"""
+        text = self._cache.get(digest)
+        if text is not None:
+            self._cache.move_to_end(digest)
+            return text
+        with open(self._path(digest), "rb") as f:
+            text = zlib.decompress(f.read()).decode("utf-8")
+        self._cache[digest] = text
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return text
+
+    def collect_garbage(self, referenced: Set[str], grace: float) -> int:
+        """Delete blobs not in `referenced` and untouched for `grace` seconds; returns the count"""
+        cutoff = time.time() - grace
+        removed = 0
+        for path in glob.glob(os.path.join(self.directory, "*", "*.z")):
+            digest = os.path.basename(path)[:-2]
+            if digest in referenced:
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    self._cache.pop(digest, None)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    def pack(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a snapshot with large text fields replaced by blob references"""
+        packed = dict(record)
+        for field in self.fields:
+            value = packed.get(field)
+            if isinstance(value, str) and len(value) >= self.min_size:
+                packed[field] = {BLOB_REF: self.put(value)}
+        return packed
+
+    def resolve(self, value: Any) -> Any:
+        if is_blob_ref(value):
+            try:
+                return self.get(value[BLOB_REF])
+            except (OSError, zlib.error) as e:
+                return f"[Missing blob: {e}]"
+        return value
+
+    def lazy(self, record: Optional[Dict[str, Any]], editor=None) -> "LazySnapshot":
+        return LazySnapshot(record or {}, self, editor)
+
+
+class LazySnapshot(Mapping):
+    """
+    Read-only snapshot view that loads blob-backed fields on first access.
+    With an editor resolver, delta-encoded editor text is rebuilt the same way.
+    """
+
+    def __init__(self, raw: Dict[str, Any], blobs: BlobStore, editor=None):
+        self._raw = raw
+        self._blobs = blobs
+        self._editor = editor
+        self._resolved: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._resolved:
+            return self._resolved[key]
+        value = self._raw[key]
+        if is_blob_ref(value):
+            value = self._resolved[key] = self._blobs.resolve(value)
+        elif self._editor is not None and key == self._editor.field and isinstance(value, dict):
+            value = self._resolved[key] = self._editor.text(self._raw)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._raw)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self._raw}
+
+    def __repr__(self) -> str:
+        return f"LazySnapshot({self._raw!r})"
@@ -0,0 +1,229 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+
+# Sentinel passed down the queues when the pipeline shuts down
+_STOP = object()
+
+
+class FixedSchedule:
+    """
+    Drift-free fixed-interval ticks.
+    Ticks are anchored to the first one instead of to the end of the previous
+    cycle, so slow stages never stretch the sampling interval. Ticks that are
+    already in the past are skipped rather than fired back to back.
+    """
+
+    def __init__(self, interval: float = config.CAPTURE_INTERVAL):
+        self.interval = interval
+        self.skipped = 0
+        self._next: Optional[float] = None
+
+    def wait(self, stop: threading.Event) -> bool:
+        """Block until the next tick; returns False once stop is set"""
+        now = time.monotonic()
+        if self._next is None:
+            self._next = now
+        else:
+            self._next += self.interval
+            if self._next < now:
+                missed = int((now - self._next) // self.interval) + 1
+                self.skipped += missed
+                self._next += missed * self.interval
+        return not stop.wait(max(0.0, self._next - now))
+
+
+class AdaptiveSchedule:
+    """
+    Event-driven capture trigger with exponential backoff.
+    The cheap signals (active window title and clipboard) are polled every
+    poll_interval. A tiny screen thumbnail is compared every screen_interval,
+    because it still costs a full screen grab. A change in any of them fires
+    a snapshot as soon as min_interval has passed since the previous one.
+    While nothing changes, the gap between snapshots grows by the backoff
+    factor up to max_interval.
+    """
+
+    def __init__(self, signals: Callable[[], Tuple[str, str]],
+                 screen: Optional[Callable[[], np.ndarray]] = None,
+                 min_interval: float = config.CAPTURE_MIN_INTERVAL,
+                 max_interval: float = config.CAPTURE_MAX_INTERVAL,
+                 poll_interval: float = config.CAPTURE_POLL_INTERVAL,
+                 screen_interval: float = config.CAPTURE_SCREEN_POLL_INTERVAL,
+                 backoff: float = config.CAPTURE_BACKOFF,
+                 screen_threshold: float = config.CAPTURE_SCREEN_CHANGE):
+        self.signals = signals
+        self.screen = screen
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.poll_interval = poll_interval
+        self.screen_interval = screen_interval
+        self.backoff = backoff
+        self.screen_threshold = screen_threshold
+        self.interval = min_interval
+        self.last_reason = ""
+        self._last_fire: Optional[float] = None
+        self._pending = ""
+        self._window: Optional[str] = None
+        self._clipboard: Optional[str] = None
+        self._thumbnail: Optional[np.ndarray] = None
+        self._last_screen: Optional[float] = None
+
+    def _poll(self) -> str:
+        """Sample the signals and return what changed since the last poll"""
+        now = time.monotonic()
+        try:
+            window, clipboard = self.signals()
+            thumbnail = None
+            if self.screen is not None and (self._last_screen is None
+                                            or now - self._last_screen >= self.screen_interval):
+                thumbnail = self.screen()
+                self._last_screen = now
+        except Exception as e:
+            print(f"[Warning] Change probe failed: {e}")
+            return ""
+        reason = ""
+        if self._window is not None and window != self._window:
+            reason = "window"
+        elif self._clipboard is not None and clipboard != self._clipboard:
+            reason = "clipboard"
+        elif (thumbnail is not None and self._thumbnail is not None and self._thumbnail.shape == thumbnail.shape
+              and screen_change(self._thumbnail, thumbnail) > self.screen_threshold):
+            reason = "screen"
+        self._window, self._clipboard = window, clipboard
+        if thumbnail is not None:
+            self._thumbnail = thumbnail
+        return reason
+
+    def _fire(self, now: float, reason: str) -> bool:
+        if reason == "timeout":
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        else:
+            self.interval = self.min_interval
+        self.last_reason = reason
+        self._last_fire = now
+        self._pending = ""
+        return True
+
+    def wait(self, stop: threading.Event) -> bool:
+        """Block until something changed or the backoff interval ran out"""
+        if self._last_fire is None:
+            self._poll()
+            return self._fire(time.monotonic(), "start")
+        while not stop.wait(self.poll_interval):
+            now = time.monotonic()
+            # A change seen during the cool-down is remembered and fired afterwards
+            self._pending = self._poll() or self._pending
+            elapsed = now - self._last_fire
+            if self._pending and elapsed >= self.min_interval:
+                return self._fire(now, self._pending)
+            if elapsed >= self.interval:
+                return self._fire(now, "timeout")
+        return False
+
+
+def screen_change(previous: np.ndarray, current: np.ndarray, pixel_threshold: int = 16) -> float:
+    """Fraction of thumbnail pixels that changed noticeably"""
+    diff = np.abs(previous.astype(np.int16) - current)
+    return float(np.count_nonzero(diff > pixel_threshold)) / diff.size
+
+
+class CapturePipeline:
+    """
+    Capture -> OCR -> persist, each stage on its own thread.
+    Stages are connected by bounded queues. When OCR falls behind, the
+    backpressure policy either coalesces (the oldest queued frame is dropped
+    so the newest one is OCR'd next) or drops the incoming frame. Persistence
+    never drops: every OCR'd snapshot is written.
+    """
+
+    def __init__(self, collect: Callable[[], Tuple[Dict[str, Any], np.ndarray]],
+                 ocr: Callable[[np.ndarray], str],
+                 persist: Callable[[Dict[str, Any]], None],
+                 schedule=None,
+                 queue_size: int = config.PIPELINE_QUEUE_SIZE,
+                 backpressure: str = config.PIPELINE_BACKPRESSURE):
+        self.collect = collect
+        self.ocr = ocr
+        self.persist = persist
+        self.schedule = schedule if schedule is not None else FixedSchedule()
+        self.backpressure = backpressure
+        self.ocr_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.persist_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.dropped_frames = 0
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _offer(self, item):
+        """Queue a captured frame for OCR, applying the backpressure policy"""
+        while True:
+            try:
+                self.ocr_queue.put_nowait(item)
+                return
+            except queue.Full:
+                self.dropped_frames += 1
+                if self.backpressure != "coalesce":
+                    return
+            try:
+                self.ocr_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+    def _sample_loop(self):
+        while self.schedule.wait(self._stop):
+            try:
+                item = self.collect()
+            except Exception as e:
+                print(f"[Warning] Capture failed: {e}")
+                continue
+            self._offer(item)
+        self.ocr_queue.put(_STOP)
+
+    def _ocr_loop(self):
+        while True:
+            item = self.ocr_queue.get()
+            if item is _STOP:
+                break
+            data, frame = item
+            try:
+                data["ocr_text"] = self.ocr(frame)
+            except Exception as e:
+                print(f"[Warning] OCR failed: {e}")
+            self.persist_queue.put(data)
+        self.persist_queue.put(_STOP)
+
+    def _persist_loop(self):
+        while True:
+            data = self.persist_queue.get()
+            if data is _STOP:
+                break
+            try:
+                self.persist(data)
+            except Exception as e:
+                print(f"[Warning] Failed to save snapshot: {e}")
+
+    def start(self):
+        for name, target in (("sample", self._sample_loop),
+                             ("ocr", self._ocr_loop),
+                             ("persist", self._persist_loop)):
+            thread = threading.Thread(target=target, name=f"capture-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def wait(self):
+        """Block until the pipeline stops; wakes up regularly so Ctrl+C is seen"""
+        for thread in self._threads:
+            while thread.is_alive():
+                thread.join(0.5)
+
+    def stop(self, timeout: float = 30.0):
+        """Stop sampling and let frames already captured drain through the stages"""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
@@ -0,0 +1,209 @@
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# Runtime settings shared by the capture and analysis scripts.
+# Every value can be overridden from the environment or the .env file.
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_optional_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    if value is None or value.strip().lower() == "auto":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Tile OCR: the frame is cut into full-width horizontal bands, each band is
+# OCR'd on its own and its text cached by content hash.
+OCR_BAND_HEIGHT = _env_int("BUDDY_OCR_BAND_HEIGHT", 192)
+OCR_BAND_SEARCH = _env_int("BUDDY_OCR_BAND_SEARCH", 48)
+OCR_DIFF_THRESHOLD = _env_int("BUDDY_OCR_DIFF_THRESHOLD", 24)
+OCR_TILE_CACHE_SIZE = _env_int("BUDDY_OCR_TILE_CACHE_SIZE", 512)
+
+# Text regions: inside each band only boxes that look like text lines are
+# sent to tesseract, stacked into one image. Join is the horizontal gap (in
+# pixels) bridged between characters; bands whose boxes cover more than
+# MAX_COVERAGE of the area are read whole.
+OCR_TEXT_REGIONS = _env_bool("BUDDY_OCR_TEXT_REGIONS", True)
+OCR_REGION_JOIN = _env_int("BUDDY_OCR_REGION_JOIN", 15)
+OCR_REGION_MAX_COVERAGE = _env_float("BUDDY_OCR_REGION_MAX_COVERAGE", 0.6)
+
+# Screen capture: mss monitor index (0 is the whole virtual desktop) and the
+# downscale applied before OCR ("auto" undoes HiDPI/Retina pixel doubling).
+CAPTURE_MONITOR = _env_int("BUDDY_CAPTURE_MONITOR", 0)
+CAPTURE_SCALE = _env_optional_float("BUDDY_CAPTURE_SCALE", None)
+KEEP_SCREENSHOTS = _env_bool("BUDDY_KEEP_SCREENSHOTS", False)
+# Capture only the foreground window when the platform probe reports its bounds
+CAPTURE_CROP_WINDOW = _env_bool("BUDDY_CAPTURE_CROP_WINDOW", True)
+
+# Capture pipeline: sampling interval in seconds, bounded queue size between
+# stages, what to do when OCR falls behind ("coalesce" keeps the newest frame,
+# "drop" discards incoming frames) and OCR processes (0 = one per core).
+CAPTURE_INTERVAL = _env_float("BUDDY_CAPTURE_INTERVAL", 20.0)
+PIPELINE_QUEUE_SIZE = _env_int("BUDDY_PIPELINE_QUEUE_SIZE", 2)
+PIPELINE_BACKPRESSURE = os.getenv("BUDDY_PIPELINE_BACKPRESSURE", "coalesce")
+OCR_WORKERS = _env_int("BUDDY_OCR_WORKERS", 0)
+
+# Adaptive capture ("adaptive" or "fixed"): a snapshot fires on an active
+# window change, a clipboard change or when more than CAPTURE_SCREEN_CHANGE of
+# the screen thumbnail changed; otherwise the interval backs off from the min
+# to the max interval. Window and clipboard are polled every POLL_INTERVAL,
+# the thumbnail (a full screen grab) only every SCREEN_POLL_INTERVAL.
+CAPTURE_SCHEDULE = os.getenv("BUDDY_CAPTURE_SCHEDULE", "adaptive")
+CAPTURE_MIN_INTERVAL = _env_float("BUDDY_CAPTURE_MIN_INTERVAL", 3.0)
+CAPTURE_MAX_INTERVAL = _env_float("BUDDY_CAPTURE_MAX_INTERVAL", 120.0)
+CAPTURE_POLL_INTERVAL = _env_float("BUDDY_CAPTURE_POLL_INTERVAL", 1.0)
+CAPTURE_SCREEN_POLL_INTERVAL = _env_float("BUDDY_CAPTURE_SCREEN_POLL_INTERVAL", 10.0)
+CAPTURE_BACKOFF = _env_float("BUDDY_CAPTURE_BACKOFF", 2.0)
+CAPTURE_SCREEN_CHANGE = _env_float("BUDDY_CAPTURE_SCREEN_CHANGE", 0.02)
+
+# Snapshot store: rolled JSONL segments plus a sparse timestamp index
+SNAPSHOT_DIR = os.getenv("BUDDY_SNAPSHOT_DIR", os.path.join("output", "snapshots"))
+SNAPSHOT_SEGMENT_BYTES = _env_int("BUDDY_SNAPSHOT_SEGMENT_BYTES", 8 * 1024 * 1024)
+SNAPSHOT_INDEX_EVERY = _env_int("BUDDY_SNAPSHOT_INDEX_EVERY", 32)
+
+# Blob store: text fields at least BLOB_MIN_SIZE characters long are stored
+# once as compressed, hash-addressed files and referenced from snapshots.
+BLOB_DIR = os.getenv("BUDDY_BLOB_DIR", os.path.join("output", "blobs"))
+BLOB_MIN_SIZE = _env_int("BUDDY_BLOB_MIN_SIZE", 512)
+BLOB_FIELDS = ("focused_text", "clipboard", "vscode_text", "ocr_text")
+
+# VS Code live text ingestion: file written by the extension (empty = the
+# platform default), size from which it is hashed through mmap, and how many
+# snapshots may store a line diff before a full keyframe is written again
+VSCODE_TEXT_FILE = os.getenv("BUDDY_VSCODE_TEXT_FILE", "")
+EDITOR_MMAP_BYTES = _env_int("BUDDY_EDITOR_MMAP_BYTES", 256 * 1024)
+EDITOR_KEYFRAME_EVERY = _env_int("BUDDY_EDITOR_KEYFRAME_EVERY", 50)
+
+# Prediction cache: near-duplicate snapshots (SimHash within
+# PREDICTION_CACHE_DISTANCE bits, same window) reuse a cached classification.
+PREDICTION_CACHE_FILE = os.getenv("BUDDY_PREDICTION_CACHE_FILE", os.path.join("output", "prediction_cache.json"))
+PREDICTION_CACHE_SIZE = _env_int("BUDDY_PREDICTION_CACHE_SIZE", 256)
+PREDICTION_CACHE_TTL = _env_float("BUDDY_PREDICTION_CACHE_TTL", 15 * 60.0)
+PREDICTION_CACHE_DISTANCE = _env_int("BUDDY_PREDICTION_CACHE_DISTANCE", 3)
+
+# Prediction log and local fast-path classifier
+PREDICTION_DIR = os.getenv("BUDDY_PREDICTION_DIR", os.path.join("output", "predictions"))
+LOCAL_MODEL_FILE = os.getenv("BUDDY_LOCAL_MODEL_FILE", os.path.join("output", "local_model.json"))
+LOCAL_CLASSIFIER_THRESHOLD = _env_float("BUDDY_LOCAL_CLASSIFIER_THRESHOLD", 0.75)
+
+# Batch analysis (--recent / --backfill): requests in flight, request rate
+# (per second, with burst), retries per call and snapshots packed per prompt
+BATCH_CONCURRENCY = _env_int("BUDDY_BATCH_CONCURRENCY", 4)
+BATCH_RATE = _env_float("BUDDY_BATCH_RATE", 1.0)
+BATCH_BURST = _env_float("BUDDY_BATCH_BURST", 4.0)
+BATCH_RETRIES = _env_int("BUDDY_BATCH_RETRIES", 3)
+BATCH_PACK_SIZE = _env_int("BUDDY_BATCH_PACK_SIZE", 1)
+
+# Approximate token budget for the snapshot text in each LLM prompt
+PROMPT_TOKEN_BUDGET = _env_int("BUDDY_PROMPT_TOKEN_BUDGET", 1500)
+
+# Stream live LLM responses and publish activity/confidence as soon as they
+# have been generated, before the rest of the response
+LLM_STREAMING = _env_bool("BUDDY_LLM_STREAMING", True)
+
+# Delta prompting in the live monitor: after a full keyframe prompt, each
+# snapshot is sent as a diff against the previous one plus the previous
+# classification. A keyframe is sent again every DELTA_KEYFRAME_EVERY
+# snapshots or when more than DELTA_MAX_CHANGE of the lines changed;
+# DELTA_TOKEN_BUDGET caps the diff text.
+DELTA_PROMPTS = _env_bool("BUDDY_DELTA_PROMPTS", True)
+DELTA_KEYFRAME_EVERY = _env_int("BUDDY_DELTA_KEYFRAME_EVERY", 10)
+DELTA_MAX_CHANGE = _env_float("BUDDY_DELTA_MAX_CHANGE", 0.5)
+DELTA_TOKEN_BUDGET = _env_int("BUDDY_DELTA_TOKEN_BUDGET", 400)
+
+# Event channel: Unix-domain socket that pushes snapshots and predictions to
+# subscribers. FILE_SINKS keeps live_output.json / prediction_output.json
+# up to date as well (written atomically) for file-based readers.
+EVENT_SOCKET = os.getenv("BUDDY_EVENT_SOCKET", os.path.join("output", "events.sock"))
+FILE_SINKS = _env_bool("BUDDY_FILE_SINKS", True)
+
+# Platform probe backend ("auto", "mac", "windows", "x11" or "fake") and how
+# long to wait for the macOS helper before restarting it
+PROBE_BACKEND = os.getenv("BUDDY_PROBE_BACKEND", "auto")
+PROBE_TIMEOUT = _env_float("BUDDY_PROBE_TIMEOUT", 2.0)
+
+# Right-click extractor log: JSONL file rotated at CLICK_LOG_MAX_BYTES
+# (keeping CLICK_LOG_BACKUPS old files), written in batches at most every
+# CLICK_LOG_FLUSH_INTERVAL seconds
+CLICK_LOG_FILE = os.getenv("BUDDY_CLICK_LOG_FILE", "hover_output.jsonl")
+CLICK_LOG_MAX_BYTES = _env_int("BUDDY_CLICK_LOG_MAX_BYTES", 4 * 1024 * 1024)
+CLICK_LOG_BACKUPS = _env_int("BUDDY_CLICK_LOG_BACKUPS", 3)
+CLICK_LOG_FLUSH_INTERVAL = _env_float("BUDDY_CLICK_LOG_FLUSH_INTERVAL", 0.5)
+
+# Metrics: Prometheus text endpoint on localhost (port 0 disables it) for the
+# capture and analyzer processes, plus a rolling JSONL summary written every
+# METRICS_INTERVAL seconds to METRICS_DIR/metrics_<process>.jsonl
+METRICS_ENABLED = _env_bool("BUDDY_METRICS_ENABLED", True)
+METRICS_CAPTURE_PORT = _env_int("BUDDY_METRICS_CAPTURE_PORT", 9464)
+METRICS_ANALYZER_PORT = _env_int("BUDDY_METRICS_ANALYZER_PORT", 9465)
+METRICS_INTERVAL = _env_float("BUDDY_METRICS_INTERVAL", 60.0)
+METRICS_DIR = os.getenv("BUDDY_METRICS_DIR", "output")
+METRICS_FILE_MAX_BYTES = _env_int("BUDDY_METRICS_FILE_MAX_BYTES", 2 * 1024 * 1024)
+METRICS_FILE_BACKUPS = _env_int("BUDDY_METRICS_FILE_BACKUPS", 2)
+
+# Retention: snapshots stay at full fidelity for RETENTION_RAW_DAYS, then are
+# folded into ROLLUP_MINUTES buckets (under ROLLUP_DIR) and deleted. The
+# background job runs every RETENTION_INTERVAL seconds (0 disables it) and
+# folds at most RETENTION_BATCH snapshots per pass. Screenshots kept with
+# KEEP_SCREENSHOTS are the archive reocr.py reads: they are deleted after
+# RETENTION_SCREENSHOT_DAYS, or never when it is 0.
+RETENTION_RAW_DAYS = _env_float("BUDDY_RETENTION_RAW_DAYS", 7.0)
+RETENTION_SCREENSHOT_DAYS = _env_float("BUDDY_RETENTION_SCREENSHOT_DAYS", 0.0)
+ROLLUP_MINUTES = _env_int("BUDDY_ROLLUP_MINUTES", 5)
+ROLLUP_DIR = os.getenv("BUDDY_ROLLUP_DIR", os.path.join("output", "rollups"))
+ROLLUP_TOKEN_BUDGET = _env_int("BUDDY_ROLLUP_TOKEN_BUDGET", 200)
+RETENTION_INTERVAL = _env_float("BUDDY_RETENTION_INTERVAL", 3600.0)
+RETENTION_BATCH = _env_int("BUDDY_RETENTION_BATCH", 2000)
+RETENTION_STATE_FILE = os.getenv("BUDDY_RETENTION_STATE_FILE", os.path.join("output", "retention_state.json"))
+BLOB_GC_GRACE = _env_float("BUDDY_BLOB_GC_GRACE", 3600.0)
+
+# Session index: running time totals per activity/day/hour and merged
+# sessions. Gaps between predictions longer than SESSION_GAP seconds end the
+# session, and at most SESSION_GAP seconds are credited for one interval.
+SESSION_INDEX_FILE = os.getenv("BUDDY_SESSION_INDEX_FILE", os.path.join("output", "session_index.json"))
+SESSION_DIR = os.getenv("BUDDY_SESSION_DIR", os.path.join("output", "sessions"))
+SESSION_GAP = _env_float("BUDDY_SESSION_GAP", 300.0)
+
+# Full-text search: BM25 index over window titles, focused text, clipboard
+# and OCR text. Snapshots are buffered in a journal and written out as an
+# immutable segment every SEARCH_FLUSH_DOCS snapshots; SEARCH_MERGE_FACTOR
+# neighbouring segments of similar size are merged in the background.
+SEARCH_ENABLED = _env_bool("BUDDY_SEARCH_ENABLED", True)
+SEARCH_DIR = os.getenv("BUDDY_SEARCH_DIR", os.path.join("output", "search"))
+SEARCH_FLUSH_DOCS = _env_int("BUDDY_SEARCH_FLUSH_DOCS", 200)
+SEARCH_MERGE_FACTOR = _env_int("BUDDY_SEARCH_MERGE_FACTOR", 4)
+
+# Offline re-OCR (reocr.py): archived screenshots are re-read into a separate
+# snapshot store, REOCR_BATCH snapshots per write and checkpoint, with
+# REOCR_CHUNKSIZE screenshots handed to a worker process at a time
+REOCR_DIR = os.getenv("BUDDY_REOCR_DIR", os.path.join("output", "reocr"))
+REOCR_STATE_FILE = os.getenv("BUDDY_REOCR_STATE_FILE", os.path.join("output", "reocr_state.json"))
+REOCR_BATCH = _env_int("BUDDY_REOCR_BATCH", 100)
+REOCR_CHUNKSIZE = _env_int("BUDDY_REOCR_CHUNKSIZE", 4)
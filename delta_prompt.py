@@ -0,0 +1,126 @@
+from typing import Any, Dict, List, Optional
+
+import config
+from llm_prompts import DELTA_SYSTEM_PROMPT, SYSTEM_PROMPT, build_human_prompt
+from prompt_context import (SOURCES, build_prompt_context, estimate_tokens, normalize_line, snapshot_lines,
+                            take_lines)
+
+# Share of the delta budget for lines that disappeared; added lines matter more
+REMOVED_SHARE = 0.25
+# Characters of a changed clipboard shown in a delta
+CLIPBOARD_PREVIEW = 80
+
+
+class DeltaPrompt:
+    """Prompt for one snapshot: a full keyframe or a diff against the previous one"""
+
+    def __init__(self, human: str, system: str, keyframe: bool, tokens: int, reason: str = ""):
+        self.human = human
+        self.system = system
+        self.keyframe = keyframe
+        self.tokens = tokens
+        self.reason = reason
+
+
+def _diff(previous: List[str], current: List[str]):
+    """Lines only in current and lines only in previous, in their original order"""
+    before = {normalize_line(line) for line in previous}
+    after = {normalize_line(line) for line in current}
+    return ([line for line in current if normalize_line(line) not in before],
+            [line for line in previous if normalize_line(line) not in after])
+
+
+class DeltaPrompter:
+    """
+    Session state for delta prompting in the live monitor. The first snapshot
+    is sent as a full keyframe prompt; after that, each snapshot is sent as
+    the previous classification plus what changed (window title, added and
+    removed lines per source, whether the clipboard changed) under a short
+    system prompt. A keyframe is sent again every keyframe_every snapshots,
+    when more than max_change of the lines changed, after a failed parse,
+    or when the diff would not be much smaller than a keyframe.
+    """
+
+    def __init__(self, keyframe_every: int = config.DELTA_KEYFRAME_EVERY,
+                 max_change: float = config.DELTA_MAX_CHANGE, budget: int = config.DELTA_TOKEN_BUDGET):
+        self.keyframe_every = keyframe_every
+        self.max_change = max_change
+        self.budget = budget
+        self.keyframes = 0
+        self.deltas = 0
+        self._window: Optional[str] = None
+        self._lines: Optional[Dict[str, List[str]]] = None
+        self._clipboard = ""
+        self._result: Optional[Dict[str, Any]] = None
+        self._since_keyframe = 0
+
+    def reset(self):
+        """Forget the session; the next prompt is a keyframe"""
+        self._lines = None
+        self._result = None
+
+    def _keyframe(self, user_data: Dict[str, Any], reason: str) -> DeltaPrompt:
+        context = build_prompt_context(user_data)
+        return DeltaPrompt(build_human_prompt(context.text), SYSTEM_PROMPT, True,
+                           estimate_tokens(SYSTEM_PROMPT) + context.tokens_after, reason)
+
+    def prompt(self, user_data: Dict[str, Any]) -> DeltaPrompt:
+        if self._lines is None or self._result is None:
+            return self._keyframe(user_data, "start")
+        if self._since_keyframe >= self.keyframe_every:
+            return self._keyframe(user_data, "periodic")
+
+        lines = snapshot_lines(user_data)
+        changes = {field: _diff(self._lines[field], lines[field]) for field, _, _ in SOURCES}
+        changed = sum(len(added) + len(removed) for added, removed in changes.values())
+        total = sum(len(self._lines[field]) + len(lines[field]) for field, _, _ in SOURCES)
+        if total and changed / total > self.max_change:
+            return self._keyframe(user_data, "large change")
+
+        window = user_data.get("active_window", "")
+        previous = self._result
+        sections = [
+            f"Previous classification: {previous.get('activity', 'unknown')} "
+            f"(confidence {previous.get('confidence', 0.0)}): {previous.get('description', '')}",
+            f"Active Window: {'unchanged' if window == self._window else 'changed to ' + repr(window)}",
+        ]
+        clipboard = str(user_data.get("clipboard", "") or "")
+        if clipboard == self._clipboard:
+            sections.append("Clipboard changed: no")
+        else:
+            preview = " ".join(clipboard.split())[:CLIPBOARD_PREVIEW]
+            sections.append(f"Clipboard changed: yes ({preview!r})")
+        added_budget = int(self.budget * (1 - REMOVED_SHARE))
+        for field, label, _ in SOURCES:
+            if field == "clipboard":
+                continue
+            added, removed = changes[field]
+            if added:
+                sections.append(f"{label}, new lines:\n" + "\n".join(take_lines(added, added_budget)))
+                added_budget -= sum(estimate_tokens(line) + 1 for line in added)
+            if removed:
+                sections.append(f"{label}, lines gone:\n" +
+                                "\n".join(take_lines(removed, int(self.budget * REMOVED_SHARE))))
+            if not added and not removed:
+                sections.append(f"{label}: unchanged")
+        human = ("Here is what changed since your previous classification:\n\n" + "\n".join(sections)
+                 + "\n\nClassify what the user is doing now.")
+        tokens = estimate_tokens(DELTA_SYSTEM_PROMPT) + estimate_tokens(human)
+        keyframe_tokens = estimate_tokens(SYSTEM_PROMPT) + build_prompt_context(user_data).tokens_after
+        if tokens >= 0.8 * keyframe_tokens:
+            return self._keyframe(user_data, "diff not smaller")
+        return DeltaPrompt(human, DELTA_SYSTEM_PROMPT, False, tokens, "delta")
+
+    def commit(self, user_data: Dict[str, Any], result: Dict[str, Any], prompt: Optional[DeltaPrompt] = None):
+        """Make this snapshot and its classification the base of the next diff"""
+        if prompt is not None:
+            if prompt.keyframe:
+                self.keyframes += 1
+                self._since_keyframe = 0
+            else:
+                self.deltas += 1
+                self._since_keyframe += 1
+        self._window = user_data.get("active_window", "")
+        self._lines = snapshot_lines(user_data)
+        self._clipboard = str(user_data.get("clipboard", "") or "")
+        self._result = result
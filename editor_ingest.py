@@ -0,0 +1,168 @@
+import difflib
+import hashlib
+import json
+import mmap
+import os
+import platform
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import config
+
+# Key marking an editor text stored as a line diff against the previous snapshot
+DELTA_REF = "$delta"
+MISSING_TEXT = "VS Code text not found."
+
+
+def default_vscode_path() -> str:
+    """Where the VS Code extension writes the active editor's text"""
+    if platform.system() in ("Darwin", "Windows"):
+        return os.path.expanduser("~/Desktop/vscode_live_text.txt")
+    return "/tmp/vscode_live_text.txt"
+
+
+def is_delta_ref(value: Any) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and DELTA_REF in value
+
+
+class EditorTextSource:
+    """
+    Change-aware reader for the VS Code live text file.
+    The extension rewrites the file on every keystroke; this only reads it
+    when size or mtime moved, and hashes large files through a memory map
+    so a rewrite with identical content is not decoded again.
+    """
+
+    def __init__(self, path: Optional[str] = None, mmap_bytes: int = config.EDITOR_MMAP_BYTES):
+        self.path = path or config.VSCODE_TEXT_FILE or default_vscode_path()
+        self.mmap_bytes = mmap_bytes
+        self._stat = None
+        self._digest = None
+        self._text = MISSING_TEXT
+        self.reads = 0
+        self.skips = 0
+
+    def read(self) -> str:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._stat = self._digest = None
+            self._text = MISSING_TEXT
+            return self._text
+        key = (stat.st_size, stat.st_mtime_ns)
+        if key == self._stat:
+            self.skips += 1
+            return self._text
+        self._stat = key
+        self.reads += 1
+        with open(self.path, "rb") as f:
+            data = None
+            if stat.st_size >= self.mmap_bytes:
+                try:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        digest = hashlib.blake2b(mapped, digest_size=16).digest()
+                        if digest == self._digest:
+                            return self._text
+                        data = mapped[:]
+                except ValueError:
+                    # Truncated to zero bytes since the stat; an empty file can't be mapped
+                    pass
+            if data is None:
+                data = f.read()
+                digest = hashlib.blake2b(data, digest_size=16).digest()
+        self._digest = digest
+        self._text = data.decode("utf-8", errors="replace").strip()
+        return self._text
+
+
+def line_diff(old: List[str], new: List[str]) -> List[List[Any]]:
+    """Opcodes [start, end, replacement lines] turning old into new"""
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    return [[i1, i2, new[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+
+def apply_diff(lines: List[str], ops: List[List[Any]]) -> List[str]:
+    result = list(lines)
+    # Back to front, so earlier offsets stay valid
+    for start, end, replacement in reversed(ops):
+        result[start:end] = replacement
+    return result
+
+
+class EditorDeltaEncoder:
+    """
+    Replaces a snapshot's editor text with a line diff against the previous
+    persisted snapshot: {"$delta": {"key": <keyframe timestamp>, "ops": [...]}}.
+    A full keyframe is written every `keyframe_every` snapshots, after a
+    restart, and whenever the diff would not be much smaller than the text.
+    Runs on the pipeline's persist thread, so snapshots arrive in store order.
+    """
+
+    def __init__(self, field: str = "vscode_text", keyframe_every: int = config.EDITOR_KEYFRAME_EVERY):
+        self.field = field
+        self.keyframe_every = max(1, keyframe_every)
+        self._lines: Optional[List[str]] = None
+        self._keyframe = ""
+        self._since_keyframe = 0
+
+    def encode(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        text = record.get(self.field)
+        if not isinstance(text, str):
+            return record
+        lines = text.split("\n")
+        encoded = dict(record)
+        if self._lines is not None and self._since_keyframe < self.keyframe_every:
+            ops = line_diff(self._lines, lines)
+            delta = {DELTA_REF: {"key": self._keyframe, "ops": ops}}
+            if len(json.dumps(ops, ensure_ascii=False)) * 2 < len(text):
+                encoded[self.field] = delta
+                self._lines = lines
+                self._since_keyframe += 1
+                return encoded
+        # Keyframe: the full text (which the blob store may still take over)
+        self._lines = lines
+        self._keyframe = record.get("timestamp", "")
+        self._since_keyframe = 0
+        return encoded
+
+
+class EditorTextResolver:
+    """
+    Rebuilds delta-encoded editor text for readers by replaying the diffs
+    from the keyframe onwards; recent results are cached so walking
+    consecutive snapshots replays each diff only once.
+    """
+
+    def __init__(self, store, blobs, field: str = "vscode_text", cache_size: int = 16):
+        self.store = store
+        self.blobs = blobs
+        self.field = field
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, List[str]]" = OrderedDict()
+
+    def _remember(self, timestamp: str, lines: List[str]):
+        self._cache[timestamp] = lines
+        self._cache.move_to_end(timestamp)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def text(self, record: Dict[str, Any]) -> str:
+        value = record.get(self.field, "")
+        if not is_delta_ref(value):
+            return self.blobs.resolve(value)
+        timestamp = record.get("timestamp", "")
+        if timestamp in self._cache:
+            return "\n".join(self._cache[timestamp])
+        lines = None
+        for previous in self.store.iter_range(value[DELTA_REF]["key"], timestamp):
+            stored = previous.get(self.field, "")
+            if is_delta_ref(stored):
+                if lines is None:
+                    break
+                lines = apply_diff(lines, stored[DELTA_REF]["ops"])
+            else:
+                lines = str(self.blobs.resolve(stored)).split("\n")
+            self._remember(previous.get("timestamp", ""), lines)
+        if lines is None or timestamp not in self._cache:
+            return "[Missing editor keyframe]"
+        return "\n".join(lines)
@@ -0,0 +1,255 @@
+import json
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import config
+
+# Unix-domain sockets are missing on some Windows builds; callers then fall
+# back to watching the output files.
+CHANNEL_AVAILABLE = hasattr(socket, "AF_UNIX")
+
+
+def write_json_atomic(path: str, data: Any, indent: Optional[int] = None):
+    """Write JSON to a temp file and rename it over path, so readers never see half a file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+
+class _Subscriber:
+    """
+    One subscribed connection with its own writer thread. Only the newest
+    pending payload of each topic is kept, so a reader that falls behind
+    (the analyzer during an LLM call) gets the latest event when it catches
+    up instead of a backlog, and never stalls the broker or the publisher.
+    """
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self.closed = False
+        self._pending: Dict[str, bytes] = {}
+        self._ready = threading.Condition()
+        threading.Thread(target=self._write_loop, name="event-subscriber", daemon=True).start()
+
+    def send(self, topic: str, payload: bytes):
+        with self._ready:
+            # Re-inserting moves the topic to the end, keeping delivery in publish order
+            self._pending.pop(topic, None)
+            self._pending[topic] = payload
+            self._ready.notify()
+
+    def close(self):
+        with self._ready:
+            self.closed = True
+            self._ready.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._ready:
+                while not self._pending and not self.closed:
+                    self._ready.wait()
+                if self.closed:
+                    return
+                payloads = list(self._pending.values())
+                self._pending.clear()
+            try:
+                for payload in payloads:
+                    self.conn.sendall(payload)
+            except OSError:
+                self.close()
+                return
+
+
+class EventBroker:
+    """
+    Local pub/sub broker on a Unix-domain socket.
+    Clients send newline-delimited JSON: {"subscribe": [topics]} to receive
+    events, {"topic": ..., "data": ...} to publish. The last event of every
+    topic is retained and sent to new subscribers straight away. Every
+    subscriber is written to by its own thread, coalescing to the latest
+    event per topic, so a slow reader never holds up the others.
+    """
+
+    def __init__(self, path: str = config.EVENT_SOCKET):
+        self.path = path
+        self._server: Optional[socket.socket] = None
+        self._subscribers: Dict[str, List[_Subscriber]] = {}
+        self._retained: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Bind and serve on a daemon thread; False if another broker owns the socket"""
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(self.path)
+        except OSError:
+            if _broker_alive(self.path):
+                server.close()
+                return False
+            # Stale socket file left by a process that died
+            try:
+                os.unlink(self.path)
+                server.bind(self.path)
+            except OSError:
+                server.close()
+                return False
+        server.listen(16)
+        self._server = server
+        threading.Thread(target=self._accept_loop, name="event-broker", daemon=True).start()
+        return True
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._client_loop, args=(conn,), daemon=True).start()
+
+    def _client_loop(self, conn: socket.socket):
+        subscriber: Optional[_Subscriber] = None
+        try:
+            for line in conn.makefile("rb"):
+                message = json.loads(line)
+                if "subscribe" in message:
+                    if subscriber is None:
+                        subscriber = _Subscriber(conn)
+                    with self._lock:
+                        for topic in message["subscribe"]:
+                            self._subscribers.setdefault(topic, []).append(subscriber)
+                            if topic in self._retained:
+                                subscriber.send(topic, self._retained[topic])
+                elif "topic" in message:
+                    self._dispatch(message["topic"], line if line.endswith(b"\n") else line + b"\n")
+        except (OSError, ValueError):
+            pass
+        finally:
+            if subscriber is not None:
+                subscriber.close()
+                with self._lock:
+                    for subscribers in self._subscribers.values():
+                        if subscriber in subscribers:
+                            subscribers.remove(subscriber)
+            conn.close()
+
+    def _dispatch(self, topic: str, payload: bytes):
+        with self._lock:
+            self._retained[topic] = payload
+            subscribers = self._subscribers.get(topic, [])
+            subscribers[:] = [subscriber for subscriber in subscribers if not subscriber.closed]
+            # Only queued here; the socket writes happen on each subscriber's thread
+            for subscriber in subscribers:
+                subscriber.send(topic, payload)
+
+
+def _broker_alive(path: str) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def _connect(path: str, host_broker: bool) -> socket.socket:
+    """Connect to the broker, hosting one in this process if nobody else does"""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+        return conn
+    except OSError:
+        conn.close()
+        if not host_broker:
+            raise
+    EventBroker(path).start()
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(path)
+    return conn
+
+
+class EventPublisher:
+    """Best-effort publisher: events are dropped (never block the caller) if no broker is reachable"""
+
+    def __init__(self, path: str = config.EVENT_SOCKET, host_broker: bool = True):
+        self.path = path
+        self.host_broker = host_broker
+        self._conn: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def publish(self, topic: str, data: Any) -> bool:
+        if not CHANNEL_AVAILABLE:
+            return False
+        payload = _encode({"topic": topic, "data": data})
+        with self._lock:
+            for _ in range(2):
+                try:
+                    if self._conn is None:
+                        self._conn = _connect(self.path, self.host_broker)
+                    self._conn.sendall(payload)
+                    return True
+                except OSError:
+                    if self._conn is not None:
+                        self._conn.close()
+                    self._conn = None
+        return False
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def subscribe(topics: List[str], path: str = config.EVENT_SOCKET, idle_timeout: float = 5.0,
+              host_broker: bool = True) -> Iterator[Optional[Tuple[str, Any]]]:
+    """
+    Yield (topic, data) for every event on the given topics as it is published.
+    Yields None after idle_timeout seconds without events, or while no broker
+    can be reached, so callers can fall back to reading the output files.
+    """
+    conn = None
+    buffer = b""
+    while True:
+        if conn is None:
+            try:
+                if not CHANNEL_AVAILABLE:
+                    raise OSError("Unix-domain sockets are not available")
+                conn = _connect(path, host_broker)
+                conn.sendall(_encode({"subscribe": topics}))
+                conn.settimeout(idle_timeout)
+                buffer = b""
+            except OSError:
+                conn = None
+                time.sleep(idle_timeout)
+                yield None
+                continue
+        try:
+            chunk = conn.recv(65536)
+        except socket.timeout:
+            yield None
+            continue
+        except OSError:
+            chunk = b""
+        if not chunk:
+            # Broker went away; reconnect (or host a new one) on the next round
+            conn.close()
+            conn = None
+            yield None
+            continue
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            yield message.get("topic"), message.get("data")
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, Dict, Iterator, List
+
+# Keyword -> activity table the fake model "classifies" with
+KEYWORDS = [
+    ("coding", ("def ", "import ", "function", "class ", "visual studio code", "pycharm", "terminal")),
+    ("messaging", ("slack", "discord", "whatsapp", "messages", "chatgpt")),
+    ("emailing", ("inbox", "mail", "subject:", "outlook")),
+    ("watching", ("youtube", "netflix", "vlc")),
+    ("researching", ("wikipedia", "arxiv", "documentation", "docs")),
+    ("browsing", ("chrome", "safari", "firefox")),
+]
+SNAPSHOT_HEADER = re.compile(r"^### Snapshot \d+$", re.M)
+PREVIOUS_CLASSIFICATION = re.compile(r"^Previous classification: (\w+) \(confidence ([\d.]+)\)", re.M)
+
+
+class FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeLLM:
+    """
+    Local stand-in for the Gemini chat model with configurable latency.
+    Supports the calls the analyzer makes (llm(messages), invoke, ainvoke,
+    stream) and answers with keyword-based classifications in the real JSON schema,
+    as a JSON array for multi-snapshot prompts. failure_rate makes a share of
+    calls raise, to exercise retries. stream() yields the same response in
+    chunk_chars pieces: the first after first_token of the latency, the rest
+    spread evenly over the remainder, like a model generating tokens.
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, failure_rate: float = 0.0,
+                 seed: int = 0, chunk_chars: int = 16, first_token: float = 0.25):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.chunk_chars = chunk_chars
+        self.first_token = first_token
+        self.calls = 0
+        self.prompt_chars = 0
+        self._random = random.Random(seed)
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    @staticmethod
+    def classify(text: str) -> Dict[str, Any]:
+        lowered = text.lower()
+        scores = [(sum(lowered.count(word) for word in words), activity) for activity, words in KEYWORDS]
+        score, activity = max(scores)
+        previous = PREVIOUS_CLASSIFICATION.search(text)
+        if not score and previous:
+            # Delta prompts: nothing new points elsewhere, so keep the previous activity
+            return {
+                "activity": previous.group(1),
+                "confidence": float(previous.group(2)),
+                "description": f"Fake model kept the previous {previous.group(1)} classification",
+                "details": "Generated by fake_llm.FakeLLM",
+                "data_sources": "Previous classification",
+                "timestamp": time.time()
+            }
+        if not score:
+            activity = "unknown"
+        return {
+            "activity": activity,
+            "confidence": round(min(0.95, 0.5 + 0.05 * score), 2) if score else 0.0,
+            "description": f"Fake model matched {score} {activity} keyword(s)",
+            "details": "Generated by fake_llm.FakeLLM",
+            "data_sources": "Keyword match over the prompt",
+            "timestamp": time.time()
+        }
+
+    def respond(self, messages: List[Any]) -> FakeMessage:
+        prompt = messages[-1].content if messages else ""
+        self.calls += 1
+        self.prompt_chars += sum(len(message.content) for message in messages)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RuntimeError("Fake LLM: simulated transient failure")
+        sections = SNAPSHOT_HEADER.split(prompt)[1:]
+        if sections:
+            return FakeMessage(json.dumps([self.classify(section) for section in sections]))
+        return FakeMessage("```json\n" + json.dumps(self.classify(prompt), indent=2) + "\n```")
+
+    def __call__(self, messages: List[Any]) -> FakeMessage:
+        time.sleep(self._delay())
+        return self.respond(messages)
+
+    def invoke(self, messages: List[Any]) -> FakeMessage:
+        return self(messages)
+
+    def stream(self, messages: List[Any]) -> Iterator[FakeMessage]:
+        delay = self._delay()
+        text = self.respond(messages).content
+        chunks = [text[start:start + self.chunk_chars] for start in range(0, len(text), self.chunk_chars)]
+        time.sleep(delay * self.first_token)
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(delay * (1.0 - self.first_token) / max(1, len(chunks) - 1))
+            yield FakeMessage(chunk)
+
+    async def ainvoke(self, messages: List[Any]) -> FakeMessage:
+        await asyncio.sleep(self._delay())
+        return self.respond(messages)
@@ -1,149 +1,155 @@
 import datetime
-import pytesseract
-from PIL import ImageGrab
-import subprocess
-import os
-import json
-import time
-import pyperclip
-import platform
-
-# On Windows, import win32gui for window title
-try:
-    import win32gui
-    import win32con
-except ImportError:
-    win32gui = None
-    win32con = None
-
-def is_windows():
-    return platform.system() == "Windows"
+
+import config
+from blob_store import BlobStore
+from capture_pipeline import AdaptiveSchedule, CapturePipeline, FixedSchedule
+from editor_ingest import EditorDeltaEncoder, EditorTextSource
+from event_channel import EventPublisher, write_json_atomic
+from metrics import gauge, span, start_metrics, timed
+from platform_probe import create_probe
+from retention import start_retention
+from screen_capture import ScreenCapture
+from search_index import SearchIndex
+from snapshot_store import SnapshotStore
+from text_regions import ocr_text_regions
+from tile_ocr import TiledOCR, ocr_tile
+
+# One long-lived platform probe serves window title, focused text and clipboard
+_probe = None
+
+def get_probe():
+    global _probe
+    if _probe is None:
+        _probe = create_probe()
+    return _probe
 
 # Get active window title (cross-platform)
 def get_active_window_title():
-    if is_windows():
-        try:
-            hwnd = win32gui.GetForegroundWindow()
-            return win32gui.GetWindowText(hwnd)
-        except Exception as e:
-            return f"Error (Win): {e}"
-    else:
-        try:
-            script = 'tell application "System Events" to get name of (processes where frontmost is true)'
-            output = subprocess.check_output(['osascript', '-e', script]).decode().strip()
-            return output
-        except Exception as e:
-            return f"Error (Mac): {e}"
-
-# Improved function: get_focused_text() returns the AXValue string or error message, not printing anything
+    return get_probe().probe().window_title
+
+# Focused element text (AXValue on macOS, the clipboard on Windows)
 def get_focused_text():
-    if is_windows():
-        # Just return clipboard text on Windows
-        try:
-            return pyperclip.paste()
-        except Exception as e:
-            return f"Clipboard error (Win): {e}"
-    else:
-        try:
-            script = '''
-            tell application "System Events"
-                set frontApp to name of first application process whose frontmost is true
-                if frontApp is "Visual Studio Code" then
-                    keystroke "a" using command down
-                    delay 0.2
-                    keystroke "c" using command down
-                    delay 0.2
-                    return "CLIPBOARD"
-                else
-                    tell application process frontApp
-                        try
-                            set focusedElement to value of attribute "AXFocusedUIElement"
-                            set focusedValue to value of attribute "AXValue" of focusedElement
-                            return focusedValue
-                        on error
-                            return "Could not extract AXValue from focused element"
-                        end try
-                    end tell
-                end if
-            end tell
-            '''
-            result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
-            output = result.stdout.strip()
-            if output == "CLIPBOARD":
-                time.sleep(0.3)
-                clipboard_content = pyperclip.paste()
-                return clipboard_content
-            elif output == "":
-                return "Could not extract AXValue from focused element"
-            else:
-                return output
-        except Exception as e:
-            return f"Error (Mac): {e}"
-
-# Take screenshot
-def capture_screenshot(filename):
-    img = ImageGrab.grab()
-    img.save(f"output/{filename}")
-    return img
+    return get_probe().probe().focused_text
 
 # Run OCR on image
 def run_ocr(image):
+    import pytesseract  # Imported on first use; it pulls in PIL
     text = pytesseract.image_to_string(image)
     return text.strip()
 
-## Main capture logic (unchanged)
+# VS Code live text; the file is only re-read when its size or mtime changed
+_editor_source = None
+
+def read_vscode_text():
+    global _editor_source
+    if _editor_source is None:
+        _editor_source = EditorTextSource()
+    return _editor_source.read()
+
+# Collects everything except OCR for one snapshot; runs on the pipeline's sampling thread
+class SnapshotCollector:
+    def __init__(self, keep_screenshots=False):
+        self.keep_screenshots = keep_screenshots
+        self._capture = None
+
+    @property
+    def capture(self):
+        # mss handles are per-thread, so the capture backend is created on first use
+        if self._capture is None:
+            self._capture = ScreenCapture(keep_screenshots=self.keep_screenshots)
+        return self._capture
+
+    # Cheap change signals polled by the adaptive scheduler
+    def signals(self):
+        probed = get_probe().probe()
+        return probed.window_title, probed.clipboard
+
+    # Screen thumbnail; a full grab, so the scheduler polls it less often
+    def screen(self):
+        return self.capture.thumbnail()
+
+    def __call__(self):
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        # Window, focused text and clipboard in one probe round-trip
+        with span("probe"):
+            probed = get_probe().probe()
+        # Grayscale frame straight from memory, limited to the foreground window
+        # when the probe knows where it is; copied because the backend reuses its buffer
+        bounds = probed.window_bounds if config.CAPTURE_CROP_WINDOW else None
+        with span("grab"):
+            frame = self.capture.grab(timestamp, bounds).copy()
+        with span("vscode_read"):
+            vscode_text = read_vscode_text()
+        data = {
+            "timestamp": timestamp,
+            "active_window": probed.window_title,
+            "focused_text": probed.focused_text,
+            "clipboard": probed.clipboard,
+            "vscode_text": vscode_text,
+            "ocr_text": ""
+        }
+        return data, frame
+
+# Write a finished snapshot to the segmented store and search index and push it to subscribers
+@timed("persist")
+def save_snapshot(store, blobs, editor, search, publisher, data):
+    # Editor text becomes a line diff against the previous snapshot; large text
+    # fields go to the blob store once and the record only keeps references
+    with span("store_append"):
+        store.append(blobs.pack(editor.encode(data)))
+    if search is not None:
+        with span("search_index"):
+            search.add(data)
+    publisher.publish("snapshot", data)
+    if config.FILE_SINKS:
+        with span("file_sink"):
+            write_json_atomic("output/live_output.json", data, indent=4)
+
+## Main capture logic
 
 if __name__ == "__main__":
-    import json
-    import time
-    import pyperclip
+    import sys
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+    keep_screenshots = config.KEEP_SCREENSHOTS or "--keep-screenshots" in sys.argv
+    # Dirty tiles are OCR'd in a process pool so tesseract uses every core
+    ocr_pool = ProcessPoolExecutor(max_workers=config.OCR_WORKERS or None)
+    # Only the detected text lines of each band go to tesseract
+    tiled_ocr = TiledOCR(ocr_func=ocr_text_regions if config.OCR_TEXT_REGIONS else ocr_tile, executor=ocr_pool)
+    collector = SnapshotCollector(keep_screenshots)
+    # Snapshot on window/clipboard/screen changes, backing off while idle
+    if config.CAPTURE_SCHEDULE == "fixed":
+        schedule = FixedSchedule()
+    else:
+        schedule = AdaptiveSchedule(collector.signals, collector.screen)
+    store = SnapshotStore()
+    search = SearchIndex() if config.SEARCH_ENABLED else None
+    pipeline = CapturePipeline(
+        collect=collector,
+        schedule=schedule,
+        ocr=timed("ocr")(tiled_ocr.run),
+        persist=partial(save_snapshot, store, BlobStore(), EditorDeltaEncoder(), search, EventPublisher())
+    )
+    exporter = start_metrics("capture", config.METRICS_CAPTURE_PORT)
+    gauge("dropped_frames", "Frames dropped while OCR was busy", function=lambda: pipeline.dropped_frames)
+    gauge("ocr_tile_cache_hits", "OCR tile cache hits", function=lambda: tiled_ocr.cache.hits)
+    gauge("ocr_tile_cache_misses", "OCR tile cache misses", function=lambda: tiled_ocr.cache.misses)
+    gauge("ocr_dirty_tiles", "Tiles sent to tesseract for the last frame", function=lambda: tiled_ocr.last_dirty)
+    pipeline.start()
+    # Old snapshots are rolled up and deleted on a background thread
+    start_retention()
     try:
-        while True:
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            screenshot_path = f"screenshot_{timestamp}.png"
-            active_window = get_active_window_title()
-            # Use get_focused_text() for textbox_text
-            textbox_text = get_focused_text()
-            # Clipboard logic: On Windows, clipboard and focused_text are the same; on Mac, they may differ
-            if is_windows():
-                clipboard_content = textbox_text
-            else:
-                clipboard_content = pyperclip.paste()
-            image = capture_screenshot(screenshot_path)
-            ocr_text = run_ocr(image)
-            # Delete the screenshot after OCR
-            try:
-                os.remove(f"output/{screenshot_path}")
-            except Exception as e:
-                print(f"[Warning] Failed to delete screenshot: {e}")
-            import os
-            # Read the VS Code live text file (cross-platform)
-            vscode_text = ""
-            if platform.system() == "Darwin":
-                path = os.path.expanduser("~/Desktop/vscode_live_text.txt")
-            elif platform.system() == "Windows":
-                path = os.path.expanduser("~/Desktop/vscode_live_text.txt")
-            else:
-                path = "/tmp/vscode_live_text.txt"
-
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    vscode_text = f.read().strip()
-            except FileNotFoundError:
-                vscode_text = "VS Code text not found."
-
-            data = {
-                "timestamp": timestamp,
-                "active_window": active_window,
-                "focused_text": textbox_text,
-                "clipboard": clipboard_content,
-                "vscode_text": vscode_text,
-                "ocr_text": ocr_text
-            }
-            with open(f"output/user_data_{timestamp}.json", "w") as f:
-                json.dump(data, f, indent=2)
-            with open("output/live_output.json", "w") as f:
-                json.dump(data, f, indent=4)
-            time.sleep(20)
+        pipeline.wait()
     except KeyboardInterrupt:
-        print("Program interrupted by user.")
\ No newline at end of file
+        print("Program interrupted by user.")
+    finally:
+        pipeline.stop()
+        ocr_pool.shutdown(cancel_futures=True)
+        store.close()
+        if search is not None:
+            search.close()
+        get_probe().close()
+        if exporter is not None:
+            exporter.stop()
+        if pipeline.dropped_frames:
+            print(f"[Info] Dropped {pipeline.dropped_frames} stale frame(s) while OCR was busy.")
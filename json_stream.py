@@ -0,0 +1,102 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class IncrementalJSONParser:
+    """
+    Tolerant, incremental reader for the JSON object (or array) in an LLM
+    response. Text is fed in chunks as it streams in; anything before the
+    first opening bracket in openers (markdown fences, prose) and after the
+    matching close is ignored. Pass openers="{" when the schema is an
+    object, so a bracketed "[1]" in the prose is not taken for the answer.
+    Each top-level member is decoded as soon as the comma or bracket that
+    ends it arrives, so the first fields are available before the rest of
+    the response. A trailing comma is accepted; if a candidate turns out
+    not to be JSON, scanning resumes after its opening bracket.
+    """
+
+    def __init__(self, openers: str = "{["):
+        self.openers = openers
+        self.text = ""
+        self.fields: Dict[str, Any] = {}
+        self.items: List[Any] = []
+        self.done = False
+        self._pos = 0
+        self._reset()
+
+    def _reset(self):
+        self._start: Optional[int] = None
+        self._kind = ""
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = 0
+        self.fields = {}
+        self.items = []
+
+    @property
+    def value(self) -> Any:
+        """The decoded object or array once done"""
+        return self.fields if self._kind == "{" else self.items
+
+    def _finish_member(self, end: int) -> List[Tuple[Any, Any]]:
+        member = self.text[self._member_start:end].strip()
+        if not member:
+            return []
+        if self._kind == "{":
+            decoded = json.loads("{" + member + "}")
+            self.fields.update(decoded)
+            return list(decoded.items())
+        decoded = json.loads(member)
+        self.items.append(decoded)
+        return [(len(self.items) - 1, decoded)]
+
+    def feed(self, chunk: str) -> List[Tuple[Any, Any]]:
+        """Add streamed text; returns the (key or index, value) members completed by it"""
+        self.text += chunk
+        completed: List[Tuple[Any, Any]] = []
+        text = self.text
+        position = self._pos
+        while position < len(text) and not self.done:
+            char = text[position]
+            if self._start is None:
+                if char in self.openers:
+                    self._start, self._kind, self._depth = position, char, 1
+                    self._member_start = position + 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]" or (char == "," and self._depth == 1):
+                if char != ",":
+                    self._depth -= 1
+                if self._depth == 0 or char == ",":
+                    try:
+                        completed.extend(self._finish_member(position))
+                    except json.JSONDecodeError:
+                        # Not the JSON we are after; look for the next candidate
+                        position = self._start + 1
+                        self._reset()
+                        completed = []
+                        continue
+                    self._member_start = position + 1
+                    self.done = self._depth == 0
+            position += 1
+        self._pos = position
+        return completed
+
+
+def parse_json_text(text: str, openers: str = "{[") -> Any:
+    """First complete JSON value opened by one of openers in text; raises json.JSONDecodeError"""
+    parser = IncrementalJSONParser(openers)
+    parser.feed(text)
+    if not parser.done:
+        raise json.JSONDecodeError("No complete JSON value in the response", text, len(text))
+    return parser.value
@@ -0,0 +1,140 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import config
+
+_STOP = object()
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+class JsonlLog:
+    """
+    Append-only JSONL log written by a background thread.
+    append() only enqueues, so callers on latency-sensitive threads (input
+    listeners) never touch the disk. The writer drains the queue in batches
+    and flushes once per batch; when the file passes max_bytes it is rotated
+    to path.1, path.2, ... keeping `backups` old files.
+    """
+
+    def __init__(self, path: str, max_bytes: int = config.CLICK_LOG_MAX_BYTES,
+                 backups: int = config.CLICK_LOG_BACKUPS,
+                 flush_interval: float = config.CLICK_LOG_FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._start_lock = threading.Lock()
+
+    def append(self, entry: Dict[str, Any]):
+        """Queue one entry for writing; never blocks on I/O"""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._writer_loop, name="jsonl-log", daemon=True)
+                    self._thread.start()
+        self._queue.put(entry)
+
+    def flush(self):
+        """Block until every queued entry is on disk"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _writer_loop(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        try:
+            while True:
+                batch = [self._queue.get()]
+                # Gather whatever else arrives within the flush interval
+                deadline = time.monotonic() + self.flush_interval
+                while batch[-1] is not _STOP:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                stop = batch[-1] is _STOP
+                entries = batch[:-1] if stop else batch
+                try:
+                    if entries:
+                        self._file.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+                        self._file.flush()
+                        if self._file.tell() >= self.max_bytes:
+                            self._rotate()
+                except OSError as e:
+                    print(f"[Warning] Could not write {self.path}: {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        self._file.close()
+        if self.backups > 0:
+            for number in range(self.backups - 1, 0, -1):
+                older = f"{self.path}.{number}"
+                if os.path.exists(older):
+                    os.replace(older, f"{self.path}.{number + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def files(self) -> List[str]:
+        """Log files from newest to oldest"""
+        paths = [self.path] + [f"{self.path}.{number}" for number in range(1, self.backups + 1)]
+        return [path for path in paths if os.path.exists(path)]
+
+    def tail(self, count: int) -> List[Dict[str, Any]]:
+        """Last `count` entries, oldest first, read backwards from the end of the log"""
+        lines: List[bytes] = []
+        for path in self.files():
+            if len(lines) >= count:
+                break
+            lines = _tail_lines(path, count - len(lines)) + lines
+        entries = []
+        for line in lines[-count:] if count > 0 else []:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries
+
+
+def _tail_lines(path: str, count: int) -> List[bytes]:
+    """Last `count` non-empty lines of a file, reading fixed-size blocks from the end"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(TAIL_BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = [line for line in data.split(b"\n") if line.strip()]
+    if position > 0:
+        # The first line may be cut off mid-record
+        lines = lines[1:]
+    return lines[-count:]
@@ -0,0 +1,138 @@
+import time
+from typing import Any, Dict, List
+
+from json_stream import parse_json_text
+
+# Prompt construction and response parsing for the activity LLM
+
+SYSTEM_PROMPT = """You are an AI assistant that analyzes user activity data to determine what the user is currently doing. 
+
+    You have access to multiple data sources:
+    - Active Window: The currently active application
+    - Focused Text: Text from the focused element
+    - Clipboard: Content in the clipboard
+    - VS Code Text: Text from VS Code editor (if available)
+    - Screen OCR: Text extracted from screen capture
+
+    Analyze this data and classify the user's activity into one of these categories:
+    - coding: Writing, editing, or reviewing code (Python, JavaScript, etc.)
+    - researching: Reading articles, papers, documentation, or searching for information
+    - browsing: General web browsing, social media, or casual internet use
+    - emailing: Composing, reading, or managing emails
+    - messaging: Using chat applications, messaging apps, or communication tools
+    - gaming: Playing video games or game-related activities
+    - watching: Watching videos, streams, or multimedia content
+    - writing: Writing documents, notes, or creative content
+    - designing: Working on design, graphics, or creative projects
+    - working: General work activities not covered by other categories
+    - unknown: Unable to determine the activity
+
+    Consider the following patterns:
+    - Coding: Look for code syntax, function definitions, imports, IDE elements
+    - Messaging: Look for chat interfaces, message bubbles, contact names
+    - Researching: Look for articles, documentation, search results
+    - Browsing: Look for web browser elements, URLs, navigation
+
+    Return your response in valid JSON format with these fields:
+    - activity: The classified activity (string)
+    - confidence: Confidence level 0.0-1.0 (float)
+    - description: Brief description of what you observed (string)
+    - details: Additional context or specific tools/applications detected (string)
+    - data_sources: Which data sources were most useful for classification (string)
+    - timestamp: Current timestamp (float)
+
+    Example response:
+    {
+        "activity": "coding",
+        "confidence": 0.85,
+        "description": "User appears to be writing Python code in Cursor IDE",
+        "details": "Detected Python imports, function definitions, and Cursor IDE interface",
+        "data_sources": "VS Code text and active window",
+        "timestamp": 1234567890.123
+    }
+
+    Only return valid JSON, no additional text."""
+
+# Short system prompt for delta prompts: the model already classified the
+# previous snapshot and only sees what changed since then
+DELTA_SYSTEM_PROMPT = """You track what a user is doing on their computer. You are given your previous
+classification and what changed on screen since then (window, focused text,
+clipboard, lines added to or removed from the screen OCR).
+
+Categories: coding, researching, browsing, emailing, messaging, gaming, watching,
+writing, designing, working, unknown.
+
+Keep the previous activity unless the changes point to a different one.
+Return only valid JSON with the fields activity, confidence (0.0-1.0),
+description, details, data_sources and timestamp (float)."""
+
+BATCH_INSTRUCTIONS = """You will receive several numbered snapshots of user activity data.
+Analyze each snapshot independently and return a JSON array with exactly one
+object per snapshot, in the same order, each following the format above."""
+
+
+def build_combined_text(user_data: Dict[str, Any]) -> str:
+    """Combine the text sources of a snapshot into the analysis input"""
+    active_window = user_data.get("active_window", "")
+    focused_text = user_data.get("focused_text", "")
+    clipboard_content = user_data.get("clipboard", "")
+    ocr_text = user_data.get("ocr_text", "")
+    return f"""
+Active Window: {active_window}
+Focused Text: {focused_text}
+Clipboard: {clipboard_content}
+Screen OCR: {ocr_text}
+    """.strip()
+
+
+def build_human_prompt(combined_text: str) -> str:
+    return f"Here's the user activity data to analyze:\n\n{combined_text}\n\nPlease analyze this data and determine what the user is doing."
+
+
+def build_batch_prompt(combined_texts: List[str]) -> str:
+    """Human prompt asking for several snapshots in one call"""
+    sections = [f"### Snapshot {number}\n{text}" for number, text in enumerate(combined_texts, 1)]
+    return (f"Here are {len(combined_texts)} user activity snapshots to analyze:\n\n"
+            + "\n\n".join(sections)
+            + f"\n\nReturn a JSON array of {len(combined_texts)} results, one per snapshot, in order.")
+
+
+def build_messages(human_prompt: str, system_prompt: str = SYSTEM_PROMPT) -> list:
+    from langchain.schema import HumanMessage, SystemMessage
+
+    return [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=human_prompt)
+    ]
+
+
+def parse_llm_response(response_text: str, openers: str = "{") -> Any:
+    """
+    Decode the JSON in an LLM response; raises json.JSONDecodeError.
+    Markdown fences and prose around the JSON are skipped. Responses are
+    objects; batch responses pass openers="[" for their array.
+    """
+    return parse_json_text(response_text, openers)
+
+
+def parse_failure_result(response_text: str) -> Dict[str, Any]:
+    """Fallback if JSON parsing fails"""
+    return {
+        "activity": "unknown",
+        "confidence": 0.0,
+        "description": "Failed to parse LLM response",
+        "details": response_text,
+        "data_sources": "LLM response parsing failed",
+        "timestamp": time.time()
+    }
+
+
+def error_result(error: Exception) -> Dict[str, Any]:
+    return {
+        "activity": "unknown",
+        "confidence": 0.0,
+        "description": f"Error analyzing user data: {str(error)}",
+        "details": "",
+        "data_sources": "Error occurred during analysis",
+        "timestamp": time.time()
+    }
@@ -0,0 +1,199 @@
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import config
+from prediction_cache import normalize_tokens
+
+# App-name rules for apps that only ever mean one thing. They are matched
+# against app_name() only, never the document or page part of a title.
+# Browsers are deliberately absent: what happens in a browser depends on the
+# page.
+WINDOW_RULES: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"\b(?:visual studio code|code|pycharm|intellij idea|cursor|xcode|sublime text|n?vim|"
+                r"terminal|iterm2?)\b", re.I), "coding"),
+    (re.compile(r"\b(?:slack|discord|messages|whatsapp|telegram|microsoft teams|signal|zoom)\b", re.I), "messaging"),
+    (re.compile(r"\b(?:mail|outlook|thunderbird|spark|airmail)\b", re.I), "emailing"),
+    (re.compile(r"\b(?:figma|photoshop|illustrator|sketch|affinity \w+|blender)\b", re.I), "designing"),
+    (re.compile(r"\b(?:microsoft word|word|pages|notion|obsidian|bear|scrivener)\b", re.I), "writing"),
+    (re.compile(r"\b(?:quicktime player|vlc media player|vlc|iina|tv)\b", re.I), "watching"),
+    (re.compile(r"\b(?:steam|epic games launcher|minecraft|battle\.net)\b", re.I), "gaming"),
+]
+# Windows and X11 titles read "Document - App" (Firefox uses an em dash)
+TITLE_SEPARATOR = re.compile(r" [-\u2013\u2014] ")
+RULE_CONFIDENCE = 0.9
+
+# Text model thresholds: the best class must be this similar to the snapshot
+# and this far ahead of the runner-up before the answer is trusted.
+MIN_SIMILARITY = 0.2
+MIN_EXAMPLES_PER_ACTIVITY = 3
+
+
+def app_name(active_window: str) -> str:
+    """The application part of a window title: the text after the last separator"""
+    return TITLE_SEPARATOR.split(active_window)[-1].strip()
+
+
+def _vector(tokens: Counter, idf: Dict[str, float]) -> Dict[str, float]:
+    vector = {token: (1 + math.log(count)) * idf[token] for token, count in tokens.items() if token in idf}
+    norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+    return {token: value / norm for token, value in vector.items()}
+
+
+class TfidfModel:
+    """Nearest-centroid TF-IDF classifier over snapshot text"""
+
+    def __init__(self, idf: Dict[str, float], centroids: Dict[str, Dict[str, float]]):
+        self.idf = idf
+        self.centroids = centroids
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, str]]) -> Optional["TfidfModel"]:
+        """Build a model from (text, activity) pairs"""
+        documents = [(normalize_tokens(text), activity) for text, activity in examples]
+        per_activity = Counter(activity for _, activity in documents)
+        documents = [(tokens, activity) for tokens, activity in documents
+                     if per_activity[activity] >= MIN_EXAMPLES_PER_ACTIVITY]
+        if len({activity for _, activity in documents}) < 2:
+            return None
+        document_frequency = Counter()
+        for tokens, _ in documents:
+            document_frequency.update(tokens.keys())
+        total = len(documents)
+        idf = {token: math.log((1 + total) / (1 + df)) + 1 for token, df in document_frequency.items() if df > 1}
+        sums: Dict[str, Counter] = {}
+        for tokens, activity in documents:
+            sums.setdefault(activity, Counter()).update(_vector(tokens, idf))
+        centroids = {}
+        for activity, summed in sums.items():
+            norm = math.sqrt(sum(value * value for value in summed.values())) or 1.0
+            centroids[activity] = {token: value / norm for token, value in summed.items()}
+        return cls(idf, centroids)
+
+    def predict(self, text: str) -> Tuple[str, float, float]:
+        """Best activity, its cosine similarity and the runner-up's similarity"""
+        vector = _vector(normalize_tokens(text), self.idf)
+        scores = sorted(
+            ((sum(weight * centroid.get(token, 0.0) for token, weight in vector.items()), activity)
+             for activity, centroid in self.centroids.items()),
+            reverse=True
+        )
+        best_score, best = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        return best, best_score, runner_up
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"idf": self.idf, "centroids": self.centroids}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["TfidfModel"]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(data["idf"], data["centroids"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+
+class LocalClassifier:
+    """
+    Millisecond fast path in front of the LLM.
+    Window-title rules settle the unambiguous apps; otherwise the TF-IDF
+    model trained on past LLM predictions answers if it is confident enough.
+    Everything else is escalated. Results use the LLM's JSON schema plus
+    "source": "local".
+    """
+
+    def __init__(self, model_path: str = config.LOCAL_MODEL_FILE,
+                 threshold: float = config.LOCAL_CLASSIFIER_THRESHOLD):
+        self.model_path = model_path
+        self.threshold = threshold
+        self.model = TfidfModel.load(model_path)
+        self.local_hits = 0
+        self.escalations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.local_hits + self.escalations
+        return self.local_hits / total if total else 0.0
+
+    def _result(self, activity: str, confidence: float, description: str,
+                details: str, data_sources: str) -> Dict[str, Any]:
+        self.local_hits += 1
+        return {
+            "activity": activity,
+            "confidence": round(confidence, 2),
+            "description": description,
+            "details": details,
+            "data_sources": data_sources,
+            "timestamp": time.time(),
+            "source": "local"
+        }
+
+    def classify(self, active_window: str, text: str) -> Optional[Dict[str, Any]]:
+        """Local prediction when confident, None when the LLM should decide"""
+        app = app_name(active_window or "")
+        for pattern, activity in WINDOW_RULES:
+            if app and pattern.search(app):
+                return self._result(
+                    activity, RULE_CONFIDENCE,
+                    f"User is in {active_window}, which is classified as {activity}",
+                    "Matched a local window-title rule",
+                    "Active window"
+                )
+        if self.model is not None:
+            activity, best, runner_up = self.model.predict(f"{active_window}\n{text}")
+            # Share of the top two similarities that belongs to the winner
+            confidence = best / (best + runner_up) if best > 0 else 0.0
+            if best >= MIN_SIMILARITY and confidence >= self.threshold:
+                return self._result(
+                    activity, confidence,
+                    f"Screen content resembles earlier {activity} snapshots",
+                    f"Local TF-IDF model (similarity {best:.2f})",
+                    "Screen OCR and active window"
+                )
+        self.escalations += 1
+        return None
+
+
+def training_examples(predictions, snapshots, blobs, min_confidence: float = 0.7):
+    """(text, activity) pairs from logged LLM predictions joined with their snapshots"""
+    for record in predictions:
+        prediction = record.get("prediction", {})
+        # Learn only from confident, first-hand LLM answers
+        if prediction.get("source") == "local" or prediction.get("cached"):
+            continue
+        if prediction.get("activity", "unknown") == "unknown" or prediction.get("confidence", 0) < min_confidence:
+            continue
+        snapshot = snapshots.get(record.get("timestamp", ""))
+        if not snapshot:
+            continue
+        snapshot = blobs.lazy(snapshot)
+        text = "\n".join(str(snapshot.get(field, "")) for field in ("active_window", "focused_text", "ocr_text"))
+        yield text, prediction["activity"]
+
+
+if __name__ == "__main__":
+    import sys
+
+    from blob_store import BlobStore
+    from snapshot_store import SnapshotStore
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--train":
+        examples = list(training_examples(SnapshotStore(config.PREDICTION_DIR), SnapshotStore(), BlobStore()))
+        model = TfidfModel.train(examples)
+        if model is None:
+            print(f"❌ Not enough labelled snapshots to train ({len(examples)} usable predictions)")
+        else:
+            model.save(config.LOCAL_MODEL_FILE)
+            print(f"✅ Trained on {len(examples)} predictions: {', '.join(sorted(model.centroids))}")
+    else:
+        print("Usage:")
+        print("  python local_classifier.py --train   # Train the local model from logged predictions")
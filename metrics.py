@@ -0,0 +1,281 @@
+import bisect
+import functools
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+from jsonl_log import JsonlLog
+
+# Histogram buckets: latencies in seconds, payload sizes in characters
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (64, 256, 1024, 2048, 4096, 8192, 16384, 65536, 262144)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _label_text(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Set explicitly, or computed from a callback each time metrics are read"""
+
+    def __init__(self, function: Optional[Callable[[], float]] = None):
+        self.function = function
+        self._value = 0.0
+
+    def set(self, value: float):
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        if self.function is None:
+            return self._value
+        try:
+            return float(self.function())
+        except Exception:
+            return float("nan")
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and a locked increment"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate from the buckets, interpolating linearly inside the bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class Registry:
+    """Named metrics with optional labels, rendered as Prometheus text or a JSON summary"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Tuple[str, str, Dict[Labels, object]]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str, help_text: str, labels: Optional[Dict[str, str]], factory):
+        key = tuple(sorted((labels or {}).items()))
+        family = self._metrics.get(name)
+        if family is None or key not in family[2]:
+            with self._lock:
+                family = self._metrics.setdefault(name, (kind, help_text, {}))
+                family[2].setdefault(key, factory())
+        return family[2][key]
+
+    def counter(self, name: str, help_text: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def gauge(self, name: str, help_text: str = "", labels: Optional[Dict[str, str]] = None,
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        gauge = self._get("gauge", name, help_text, labels, Gauge)
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+    def histogram(self, name: str, help_text: str = "", labels: Optional[Dict[str, str]] = None,
+                  buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines: List[str] = []
+        for name, (kind, help_text, children) in sorted(self._metrics.items()):
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in list(children.items()):
+                if kind == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (float("inf"),), metric.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else _format(bound)
+                        bucket_labels = _label_text(labels, 'le="' + le + '"')
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{name}_sum{_label_text(labels)} {_format(metric.sum)}")
+                    lines.append(f"{name}_count{_label_text(labels)} {metric.count}")
+                else:
+                    lines.append(f"{name}{_label_text(labels)} {_format(metric.value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, object]:
+        """Compact JSON-friendly view: histograms as count/mean/p50/p90/p99"""
+        result: Dict[str, object] = {}
+        for name, (kind, _, children) in sorted(self._metrics.items()):
+            for labels, metric in list(children.items()):
+                key = f"{name}{_label_text(labels)}"
+                if kind == "histogram":
+                    result[key] = {
+                        "count": metric.count,
+                        "mean": round(metric.sum / metric.count, 6) if metric.count else 0.0,
+                        "p50": round(metric.quantile(0.5), 6),
+                        "p90": round(metric.quantile(0.9), 6),
+                        "p99": round(metric.quantile(0.99), 6),
+                    }
+                else:
+                    result[key] = metric.value
+        return result
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help_text: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+    return REGISTRY.counter(f"buddy_{name}", help_text, labels)
+
+
+def gauge(name: str, help_text: str = "", labels: Optional[Dict[str, str]] = None,
+          function: Optional[Callable[[], float]] = None) -> Gauge:
+    return REGISTRY.gauge(f"buddy_{name}", help_text, labels, function)
+
+
+def histogram(name: str, help_text: str = "", labels: Optional[Dict[str, str]] = None,
+              buckets=LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(f"buddy_{name}", help_text, labels, buckets)
+
+
+class span:
+    """Context manager timing one pipeline stage into buddy_stage_seconds{stage=...}"""
+
+    def __init__(self, stage: str):
+        self.histogram = histogram("stage_seconds", "Latency of each pipeline stage", {"stage": stage})
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._started)
+        return False
+
+
+def timed(stage: str):
+    """Decorator form of span()"""
+    def decorate(function):
+        stage_histogram = histogram("stage_seconds", "Latency of each pipeline stage", {"stage": stage})
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stage_histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsExporter:
+    """
+    Serves /metrics on localhost and appends a summary line to a rolling
+    JSONL file every `interval` seconds, both from daemon threads.
+    """
+
+    def __init__(self, process: str, port: int, interval: float = config.METRICS_INTERVAL,
+                 path: Optional[str] = None):
+        self.process = process
+        self.port = port
+        self.interval = interval
+        self.log = JsonlLog(path or os.path.join(config.METRICS_DIR, f"metrics_{process}.jsonl"),
+                            max_bytes=config.METRICS_FILE_MAX_BYTES, backups=config.METRICS_FILE_BACKUPS)
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+
+    def start(self) -> "MetricsExporter":
+        if self.port > 0:
+            try:
+                self._server = ThreadingHTTPServer(("127.0.0.1", self.port), _MetricsHandler)
+                self._server.daemon_threads = True
+                threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+                print(f"📈 Metrics on http://127.0.0.1:{self.port}/metrics")
+            except OSError as e:
+                print(f"[Warning] Metrics endpoint not started on port {self.port}: {e}")
+        if self.interval > 0:
+            threading.Thread(target=self._flush_loop, name="metrics-file", daemon=True).start()
+        return self
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        self.log.append({"timestamp": time.time(), "process": self.process, "metrics": REGISTRY.summary()})
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self.flush()
+        self.log.close()
+
+
+def start_metrics(process: str, port: int) -> Optional[MetricsExporter]:
+    """Start the exporter for this process, unless metrics are disabled"""
+    if not config.METRICS_ENABLED:
+        return None
+    return MetricsExporter(process, port).start()
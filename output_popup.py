@@ -4,34 +4,56 @@ import os
 import time
 import threading
 
+from event_channel import subscribe
+
 # Path to your prediction file
 PREDICTION_FILE = os.path.join("output", "prediction_output.json")
 
+def format_prediction(data):
+    return (
+        f"🧠 Activity: {data.get('activity')}\n"
+        f"🔍 Confidence: {data.get('confidence')}\n"
+        f"📝 Description: {data.get('description')}\n"
+        f"📄 Details: {data.get('details')}\n"
+        f"📡 Sources: {data.get('data_sources')}\n"
+        f"🕒 Time: {time.ctime(data.get('timestamp'))}"
+    )
+
 def load_prediction():
     try:
         with open(PREDICTION_FILE, "r") as f:
             data = json.load(f)
-        formatted = (
-            f"🧠 Activity: {data.get('activity')}\n"
-            f"🔍 Confidence: {data.get('confidence')}\n"
-            f"📝 Description: {data.get('description')}\n"
-            f"📄 Details: {data.get('details')}\n"
-            f"📡 Sources: {data.get('data_sources')}\n"
-            f"🕒 Time: {time.ctime(data.get('timestamp'))}"
-        )
-        return formatted
+        return format_prediction(data)
     except Exception as e:
         return f"[Error reading JSON: {str(e)}]"
 
-def update_text_periodically(text_widget):
+def update_text_on_change(text_widget):
+    def show(new_text):
+        text_widget.after(0, lambda: (
+            text_widget.delete("1.0", tk.END),
+            text_widget.insert(tk.END, new_text)
+        ))
+
     def loop():
-        while True:
-            new_text = load_prediction()
-            text_widget.after(0, lambda: (
-                text_widget.delete("1.0", tk.END),
-                text_widget.insert(tk.END, new_text)
-            ))
-            time.sleep(2)
+        shown = None
+        last_mtime = None
+        # Predictions are pushed by activity_analyzer.py; while the channel is
+        # idle, the prediction file is re-read only if it changed on disk
+        for event in subscribe(["prediction"], idle_timeout=2.0):
+            if event is not None:
+                new_text = format_prediction(event[1])
+            else:
+                try:
+                    mtime = os.stat(PREDICTION_FILE).st_mtime
+                except OSError:
+                    mtime = None
+                if mtime == last_mtime and shown is not None:
+                    continue
+                last_mtime = mtime
+                new_text = load_prediction()
+            if new_text != shown:
+                shown = new_text
+                show(new_text)
     threading.Thread(target=loop, daemon=True).start()
 
 def main():
@@ -51,7 +73,7 @@ def main():
     )
     text_box.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-    update_text_periodically(text_box)
+    update_text_on_change(text_box)
 
     popup.mainloop()
 
@@ -0,0 +1,342 @@
+import abc
+import json
+import os
+import platform
+import select
+import subprocess
+import threading
+import time
+from typing import Optional, Tuple
+
+import config
+
+# Optional platform libraries
+try:
+    import win32clipboard
+    import win32gui
+except ImportError:
+    win32clipboard = None
+    win32gui = None
+
+try:
+    from Xlib import X, display as xdisplay
+except ImportError:
+    X = None
+    xdisplay = None
+
+NO_FOCUSED_TEXT = "Could not extract AXValue from focused element"
+
+# (left, top, width, height) of the foreground window in screen coordinates
+Bounds = Tuple[int, int, int, int]
+
+
+class ProbeResult:
+    """Window title, focused text and clipboard read in one round-trip"""
+
+    def __init__(self, window_title: str = "", focused_text: str = "", clipboard: str = "",
+                 clipboard_changed: bool = False, window_bounds: Optional[Bounds] = None):
+        self.window_title = window_title
+        self.focused_text = focused_text
+        self.clipboard = clipboard
+        # True when the clipboard was actually re-read on this probe
+        self.clipboard_changed = clipboard_changed
+        # None when the backend can't tell where the window is
+        self.window_bounds = window_bounds
+
+
+class Probe(abc.ABC):
+    """
+    Long-lived source of desktop state.
+    Backends keep their connection to the platform open between calls and
+    only re-read the clipboard when the platform's change counter moved.
+    """
+
+    def __init__(self):
+        self._clipboard = ""
+        self._lock = threading.Lock()
+
+    def probe(self) -> ProbeResult:
+        with self._lock:
+            return self._probe()
+
+    @abc.abstractmethod
+    def _probe(self) -> ProbeResult:
+        """Read the desktop state; called with the probe lock held"""
+
+    def close(self):
+        pass
+
+
+class FakeProbe(Probe):
+    """Scripted probe for tests; assign window_title, focused_text and clipboard freely"""
+
+    def __init__(self, window_title: str = "", focused_text: str = "", clipboard: str = "",
+                 window_bounds: Optional[Bounds] = None):
+        super().__init__()
+        self.window_title = window_title
+        self.focused_text = focused_text
+        self.clipboard = clipboard
+        self.window_bounds = window_bounds
+        self.calls = 0
+
+    def _probe(self) -> ProbeResult:
+        self.calls += 1
+        changed = self.clipboard != self._clipboard
+        self._clipboard = self.clipboard
+        return ProbeResult(self.window_title, self.focused_text, self.clipboard, changed, self.window_bounds)
+
+
+# JXA loop run by one persistent osascript process: every line on stdin is a
+# probe request, every line on stdout a JSON answer. The clipboard text is
+# only sent when NSPasteboard's changeCount moved since the previous answer.
+MAC_PROBE_SCRIPT = r"""
+ObjC.import('Foundation');
+ObjC.import('AppKit');
+const systemEvents = Application('System Events');
+const input = $.NSFileHandle.fileHandleWithStandardInput;
+const output = $.NSFileHandle.fileHandleWithStandardOutput;
+let lastChangeCount = -1;
+let pending = '';
+
+function readRequest() {
+    while (pending.indexOf('\n') < 0) {
+        const chunk = input.availableData;
+        if (chunk.length == 0) return false;
+        pending += $.NSString.alloc.initWithDataEncoding(chunk, $.NSUTF8StringEncoding).js;
+    }
+    pending = pending.slice(pending.indexOf('\n') + 1);
+    return true;
+}
+
+function probe() {
+    const answer = {window: '', focused: null, clipboard: null, bounds: null};
+    try {
+        const process = systemEvents.processes.whose({frontmost: true})[0];
+        answer.window = process.name();
+        try {
+            const front = process.windows[0];
+            const position = front.position();
+            const size = front.size();
+            answer.bounds = [position[0], position[1], size[0], size[1]];
+        } catch (e) {}
+        try {
+            const element = process.attributes.byName('AXFocusedUIElement').value();
+            answer.focused = String(element.attributes.byName('AXValue').value());
+        } catch (e) {}
+    } catch (e) {
+        answer.window = 'Error (Mac): ' + e;
+    }
+    const pasteboard = $.NSPasteboard.generalPasteboard;
+    const changeCount = pasteboard.changeCount;
+    if (changeCount !== lastChangeCount) {
+        lastChangeCount = changeCount;
+        const text = pasteboard.stringForType($.NSPasteboardTypeString);
+        answer.clipboard = text.isNil() ? '' : text.js;
+    }
+    return answer;
+}
+
+while (readRequest()) {
+    const line = JSON.stringify(probe()) + '\n';
+    output.writeData($(line).dataUsingEncoding($.NSUTF8StringEncoding));
+}
+"""
+
+
+class MacProbe(Probe):
+    """
+    macOS backend: a single osascript (JXA) process answers every probe,
+    instead of forking osascript and pbpaste on each call.
+    """
+
+    def __init__(self, timeout: float = config.PROBE_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+        self._proc: Optional[subprocess.Popen] = None
+        self._buffer = b""
+
+    def _start(self):
+        self._proc = subprocess.Popen(
+            ["osascript", "-l", "JavaScript", "-e", MAC_PROBE_SCRIPT],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._buffer = b""
+
+    def _request(self) -> dict:
+        if self._proc is None or self._proc.poll() is not None:
+            self._start()
+        self._proc.stdin.write(b"probe\n")
+        self._proc.stdin.flush()
+        deadline = time.monotonic() + self.timeout
+        fd = self._proc.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError("osascript probe timed out")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError("osascript probe exited")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def _probe(self) -> ProbeResult:
+        try:
+            answer = self._request()
+        except Exception as e:
+            # Restart the helper on the next call
+            self.close()
+            return ProbeResult(f"Error (Mac): {e}", NO_FOCUSED_TEXT, self._clipboard)
+        changed = answer.get("clipboard") is not None
+        if changed:
+            self._clipboard = answer["clipboard"]
+        bounds = answer.get("bounds")
+        return ProbeResult(answer.get("window", ""), answer.get("focused") or NO_FOCUSED_TEXT,
+                           self._clipboard, changed, tuple(bounds) if bounds else None)
+
+    def close(self):
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+
+class WindowsProbe(Probe):
+    """Windows backend using win32 calls; the clipboard sequence number gates re-reads"""
+
+    def __init__(self):
+        super().__init__()
+        self._sequence = None
+
+    def _read_clipboard(self) -> bool:
+        sequence = win32clipboard.GetClipboardSequenceNumber()
+        if sequence == self._sequence:
+            return False
+        self._sequence = sequence
+        win32clipboard.OpenClipboard()
+        try:
+            if win32clipboard.IsClipboardFormatAvailable(win32clipboard.CF_UNICODETEXT):
+                self._clipboard = win32clipboard.GetClipboardData(win32clipboard.CF_UNICODETEXT)
+            else:
+                self._clipboard = ""
+        finally:
+            win32clipboard.CloseClipboard()
+        return True
+
+    def _probe(self) -> ProbeResult:
+        bounds = None
+        try:
+            window = win32gui.GetForegroundWindow()
+            title = win32gui.GetWindowText(window)
+            left, top, right, bottom = win32gui.GetWindowRect(window)
+            bounds = (left, top, right - left, bottom - top)
+        except Exception as e:
+            title = f"Error (Win): {e}"
+        try:
+            changed = self._read_clipboard()
+        except Exception as e:
+            return ProbeResult(title, f"Clipboard error (Win): {e}", self._clipboard, window_bounds=bounds)
+        # Windows has no focused-element text; the clipboard stands in for it
+        return ProbeResult(title, self._clipboard, self._clipboard, changed, bounds)
+
+
+class X11Probe(Probe):
+    """
+    Linux/X11 backend over one python-xlib connection.
+    The window title comes from _NET_ACTIVE_WINDOW; the clipboard is only
+    re-read (through pyperclip) after XFixes reports a new selection owner.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._display = xdisplay.Display()
+        self._root = self._display.screen().root
+        self._atoms = {name: self._display.intern_atom(name) for name in
+                       ("_NET_ACTIVE_WINDOW", "_NET_WM_NAME", "UTF8_STRING", "CLIPBOARD")}
+        self._xfixes = False
+        self._clipboard_stale = True
+        try:
+            from Xlib.ext import xfixes
+            self._display.xfixes_query_version()
+            self._display.xfixes_select_selection_input(
+                self._root, self._atoms["CLIPBOARD"], xfixes.XFixesSetSelectionOwnerNotifyMask)
+            self._xfixes = True
+        except Exception:
+            pass
+
+    def _active_window(self):
+        active = self._root.get_full_property(self._atoms["_NET_ACTIVE_WINDOW"], X.AnyPropertyType)
+        if not active or not active.value or not active.value[0]:
+            return None
+        return self._display.create_resource_object("window", active.value[0])
+
+    def _window_title(self, window) -> str:
+        name = window.get_full_property(self._atoms["_NET_WM_NAME"], self._atoms["UTF8_STRING"])
+        if name and name.value:
+            value = name.value
+            return value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+        return window.get_wm_name() or ""
+
+    def _window_bounds(self, window) -> Optional[Bounds]:
+        geometry = window.get_geometry()
+        origin = window.translate_coords(self._root, 0, 0)
+        # translate_coords gives the root origin in window coordinates
+        return (-origin.x, -origin.y, geometry.width, geometry.height)
+
+    def _clipboard_changed(self) -> bool:
+        if not self._xfixes:
+            return True
+        # python-xlib registers extension subevents as a (type, sub_code) pair
+        owner_changed = self._display.extension_event.SetSelectionOwnerNotify
+        while self._display.pending_events():
+            event = self._display.next_event()
+            if (event.type, getattr(event, "sub_code", None)) == owner_changed:
+                self._clipboard_stale = True
+        changed, self._clipboard_stale = self._clipboard_stale, False
+        return changed
+
+    def _probe(self) -> ProbeResult:
+        title, bounds = "", None
+        try:
+            window = self._active_window()
+            if window is not None:
+                title = self._window_title(window)
+                bounds = self._window_bounds(window)
+        except Exception as e:
+            title = f"Error (X11): {e}"
+        changed = self._clipboard_changed()
+        if changed:
+            try:
+                import pyperclip
+                self._clipboard = pyperclip.paste()
+            except Exception as e:
+                self._clipboard = f"Clipboard error (X11): {e}"
+        return ProbeResult(title, "Could not extract focused text on X11", self._clipboard, changed, bounds)
+
+    def close(self):
+        self._display.close()
+
+
+def create_probe(backend: str = config.PROBE_BACKEND) -> Probe:
+    """Probe for this platform ("auto") or a named backend: mac, windows, x11, fake"""
+    if backend == "auto":
+        system = platform.system()
+        if system == "Darwin":
+            backend = "mac"
+        elif system == "Windows":
+            backend = "windows"
+        else:
+            backend = "x11"
+    if backend == "mac":
+        return MacProbe()
+    if backend == "windows":
+        if win32gui is None:
+            raise RuntimeError("The Windows probe needs pywin32")
+        return WindowsProbe()
+    if backend == "x11":
+        if xdisplay is None:
+            raise RuntimeError("The X11 probe needs python-xlib")
+        return X11Probe()
+    if backend == "fake":
+        return FakeProbe()
+    raise ValueError(f"Unknown probe backend: {backend}")
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional
+
+import config
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]{2,}")
+# The window title counts this many times as much as a single text token
+WINDOW_WEIGHT = 8
+
+
+def normalize_tokens(text: str) -> Counter:
+    """Lower-cased word tokens with digits folded, so clocks and counters don't matter"""
+    return Counter(TOKEN_PATTERN.findall(re.sub(r"\d", "0", text.lower())))
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(window: str, text: str) -> int:
+    """64-bit SimHash over the normalized text tokens plus the window title"""
+    weights = [0] * 64
+    tokens = normalize_tokens(text)
+    for token in normalize_tokens(window):
+        tokens[f"window:{token}"] += WINDOW_WEIGHT
+    for token, count in tokens.items():
+        value = _token_hash(token)
+        for bit in range(64):
+            weights[bit] += count if value >> bit & 1 else -count
+    fingerprint = 0
+    for bit in range(64):
+        if weights[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class PredictionCache:
+    """
+    Near-duplicate prediction cache.
+    Predictions are keyed on a SimHash fingerprint of the snapshot; a new
+    snapshot whose fingerprint is within max_distance bits of a cached one
+    (and has the same active window) reuses that classification. Entries
+    expire after ttl seconds, the least recently used ones are evicted past
+    max_entries, and the cache is saved to disk so it survives restarts.
+    """
+
+    def __init__(self, path: str = config.PREDICTION_CACHE_FILE,
+                 max_entries: int = config.PREDICTION_CACHE_SIZE,
+                 ttl: float = config.PREDICTION_CACHE_TTL,
+                 max_distance: int = config.PREDICTION_CACHE_DISTANCE):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        now = time.time()
+        for entry in entries:
+            if now - entry.get("created", 0) < self.ttl:
+                self._entries[entry["fingerprint"]] = entry
+
+    def save(self):
+        """Write the cache to disk atomically"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self._entries.values()), f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[Warning] Failed to save prediction cache: {e}")
+
+    def lookup(self, window: str, text: str) -> Optional[Dict[str, Any]]:
+        """Cached prediction for a near-duplicate snapshot, or None"""
+        fingerprint = simhash(window, text)
+        now = time.time()
+        best_key, best_distance = None, self.max_distance + 1
+        for key, entry in list(self._entries.items()):
+            if now - entry["created"] >= self.ttl:
+                del self._entries[key]
+                continue
+            if entry["window"] != window:
+                continue
+            distance = hamming(fingerprint, int(key, 16))
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+        if best_key is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(best_key)
+        self.hits += 1
+        return dict(self._entries[best_key]["result"])
+
+    def put(self, window: str, text: str, result: Dict[str, Any]):
+        """Remember a fresh prediction and persist the cache"""
+        key = f"{simhash(window, text):016x}"
+        self._entries[key] = {
+            "fingerprint": key,
+            "window": window,
+            "created": time.time(),
+            "result": result
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.save()
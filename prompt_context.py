@@ -0,0 +1,123 @@
+import math
+import re
+from typing import Any, Dict, List
+
+import config
+
+# (field, label, weight) in priority order. When a line appears in several
+# sources it is kept in the first one; the weights split the token budget.
+SOURCES = [
+    ("focused_text", "Focused Text", 3),
+    ("clipboard", "Clipboard", 2),
+    ("ocr_text", "Screen OCR", 4),
+]
+# OCR lines with a lower share of letters, digits, spaces and common
+# punctuation than this are treated as recognition garbage
+MIN_LINE_QUALITY = 0.75
+GOOD_PUNCTUATION = set(".,:;'\"()[]{}-_/@#?!=+*<>%&$")
+WORD_PATTERN = re.compile(r"[A-Za-z]{3,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return math.ceil(len(text) / 4)
+
+
+def line_quality(line: str) -> float:
+    good = sum(1 for char in line if char.isalnum() or char.isspace() or char in GOOD_PUNCTUATION)
+    return good / len(line) if line else 0.0
+
+
+def is_garbage(line: str) -> bool:
+    """Heuristic for OCR noise: too short, no real word, or mostly odd symbols"""
+    return len(line) < 3 or not WORD_PATTERN.search(line) or line_quality(line) < MIN_LINE_QUALITY
+
+
+def normalize_line(line: str) -> str:
+    return " ".join(line.lower().split())
+
+
+def take_lines(lines: List[str], budget: int) -> List[str]:
+    """Leading lines that fit in the budget, plus a marker for what was cut"""
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            if not kept and budget > 0:
+                # A single oversized line (minified code, long paste) keeps its head
+                kept.append(line[:budget * 4] + " [...]")
+            if len(lines) > len(kept):
+                kept.append(f"[... {len(lines) - len(kept)} more line(s) truncated]")
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def snapshot_lines(user_data: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Non-empty lines of each source, without cross-source repeats or OCR garbage"""
+    seen = set()
+    lines: Dict[str, List[str]] = {}
+    for field, _, _ in SOURCES:
+        kept = []
+        for line in str(user_data.get(field, "") or "").splitlines():
+            line = line.strip()
+            key = normalize_line(line)
+            if not key or key in seen:
+                continue
+            if field == "ocr_text" and is_garbage(line):
+                continue
+            seen.add(key)
+            kept.append(line)
+        lines[field] = kept
+    return lines
+
+
+class PromptContext:
+    """Budgeted prompt text for one snapshot plus its before/after token counts"""
+
+    def __init__(self, text: str, tokens_before: int, tokens_after: int):
+        self.text = text
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+
+
+def build_prompt_context(user_data: Dict[str, Any], budget: int = config.PROMPT_TOKEN_BUDGET) -> PromptContext:
+    """
+    Build the snapshot part of the prompt within a token budget.
+    Lines repeated across sources are kept once, garbage OCR lines are
+    dropped, and the budget is split between sources by weight: a source
+    that needs less than its share hands the rest to the others.
+    """
+    window_line = f"Active Window: {user_data.get('active_window', '')}"
+    raw = {field: str(user_data.get(field, "") or "") for field, _, _ in SOURCES}
+    tokens_before = estimate_tokens("\n".join([window_line] + [f"{label}: {raw[field]}" for field, label, _ in SOURCES]))
+
+    lines = snapshot_lines(user_data)
+
+    # Water-filling: satisfy every source that fits its weighted share, then
+    # split what is left between the rest
+    remaining = budget - estimate_tokens(window_line) - sum(estimate_tokens(label) + 2 for _, label, _ in SOURCES)
+    needs = {field: sum(estimate_tokens(line) + 1 for line in lines[field]) for field, _, _ in SOURCES}
+    weights = {field: weight for field, _, weight in SOURCES}
+    active = [field for field, _, _ in SOURCES if needs[field]]
+    allotment = {field: 0 for field, _, _ in SOURCES}
+    while active:
+        total_weight = sum(weights[field] for field in active)
+        shares = {field: max(0, remaining) * weights[field] / total_weight for field in active}
+        satisfied = [field for field in active if needs[field] <= shares[field]]
+        if not satisfied:
+            for field in active:
+                allotment[field] = int(shares[field])
+            break
+        for field in satisfied:
+            allotment[field] = needs[field]
+            remaining -= needs[field]
+            active.remove(field)
+
+    sections = [window_line]
+    for field, label, _ in SOURCES:
+        kept = take_lines(lines[field], allotment[field])
+        sections.append(f"{label}: " + "\n".join(kept))
+    text = "\n".join(sections)
+    return PromptContext(text, tokens_before, estimate_tokens(text))
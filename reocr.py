@@ -0,0 +1,193 @@
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import config
+from blob_store import BlobStore
+from editor_ingest import EditorDeltaEncoder, EditorTextResolver
+from event_channel import write_json_atomic
+from retention import SCREENSHOT_PATTERN
+from snapshot_store import SnapshotStore
+
+# Per-process OCR state, set up by _init_worker
+_worker_ocr = None
+_worker_scale = 1.0
+
+
+def archived_screenshots(start: Optional[str] = None, end: Optional[str] = None,
+                         directory: str = "output") -> List[Tuple[str, str]]:
+    """(timestamp, path) of every output/screenshot_<timestamp>.png in [start, end], oldest first"""
+    shots = []
+    for path in glob.glob(os.path.join(directory, "screenshot_*.png")):
+        match = SCREENSHOT_PATTERN.search(path)
+        if not match:
+            continue
+        timestamp = match.group(1)
+        if (start is None or timestamp >= start) and (end is None or timestamp <= end):
+            shots.append((timestamp, path))
+    return sorted(shots)
+
+
+def _init_worker(scale: float, text_regions: bool):
+    global _worker_ocr, _worker_scale
+    # One tesseract per core: stop each one from spreading over all cores itself
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    from text_regions import ocr_text_regions
+    from tile_ocr import TiledOCR, ocr_tile
+    # Frames of a chunk are neighbours in time, so the band cache and diff still pay off
+    _worker_ocr = TiledOCR(ocr_func=ocr_text_regions if text_regions else ocr_tile)
+    _worker_scale = scale
+
+
+def ocr_screenshot(job: Tuple[str, str]) -> Tuple[str, Optional[str], str]:
+    """(timestamp, OCR text or None, error) for one archived screenshot; runs in a worker"""
+    import cv2
+
+    timestamp, path = job
+    try:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            return timestamp, None, "unreadable image"
+        if _worker_scale < 1.0:
+            gray = cv2.resize(gray, None, fx=_worker_scale, fy=_worker_scale, interpolation=cv2.INTER_AREA)
+        return timestamp, _worker_ocr.run(gray), ""
+    except Exception as e:
+        return timestamp, None, str(e)
+
+
+class Reprocessor:
+    """
+    Rebuilds ocr_text for archived screenshots into a separate snapshot
+    store (REOCR_DIR), leaving the live store untouched. Screenshots stream
+    through a process pool in chunks, and results come back in time order.
+    Each one is merged with the stored snapshot of the same timestamp (or
+    becomes a minimal snapshot if there is none). They are written in
+    batches, and a checkpoint is saved after every batch, so an interrupted
+    run resumes after the last batch written.
+    """
+
+    def __init__(self, source: Optional[SnapshotStore] = None, target: Optional[SnapshotStore] = None,
+                 state_file: str = config.REOCR_STATE_FILE, batch: int = config.REOCR_BATCH):
+        self.source = source or SnapshotStore()
+        self.target = target or SnapshotStore(config.REOCR_DIR)
+        self.state_file = state_file
+        self.batch = batch
+        self.blobs = BlobStore()
+        self.resolver = EditorTextResolver(self.source, self.blobs)
+        self.editor = EditorDeltaEncoder()
+        self._pending: Optional[Dict[str, Any]] = None
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {"done_to": "", "frames": 0, "failed": 0}
+        # A batch may have been written without its checkpoint
+        latest = self.target.latest(1)
+        if latest and latest[0].get("timestamp", "") > state["done_to"]:
+            state["done_to"] = latest[0]["timestamp"]
+        return state
+
+    def _merge(self, records: Iterator[Dict[str, Any]], timestamp: str, text: str) -> Dict[str, Any]:
+        """The stored snapshot for timestamp with its OCR text replaced"""
+        while self._pending is not None and self._pending.get("timestamp", "") < timestamp:
+            self._pending = next(records, None)
+        if self._pending is not None and self._pending.get("timestamp") == timestamp:
+            snapshot = self.blobs.lazy(self._pending, self.resolver).to_dict()
+        else:
+            snapshot = {"timestamp": timestamp, "active_window": "", "focused_text": "", "clipboard": "",
+                        "vscode_text": ""}
+        snapshot["ocr_text"] = text
+        return snapshot
+
+    def _write(self, snapshots: List[Dict[str, Any]]):
+        for snapshot in snapshots:
+            self.target.append(self.blobs.pack(self.editor.encode(snapshot)))
+        self.state["done_to"] = snapshots[-1]["timestamp"]
+        self.state["frames"] += len(snapshots)
+        write_json_atomic(self.state_file, self.state, indent=2)
+
+    def run(self, jobs: List[Tuple[str, str]], workers: int = 0, chunksize: int = config.REOCR_CHUNKSIZE,
+            scale: float = 1.0, text_regions: bool = config.OCR_TEXT_REGIONS) -> Dict[str, Any]:
+        jobs = [job for job in jobs if job[0] > self.state["done_to"]]
+        workers = workers or os.cpu_count() or 1
+        print(f"🔁 Re-OCR of {len(jobs)} screenshot(s) on {workers} worker(s), chunks of {chunksize}")
+        if not jobs:
+            if not self.state["done_to"]:
+                print("   No archived screenshots found. They are only written when gatheruserdata.py runs with "
+                      "--keep-screenshots (BUDDY_KEEP_SCREENSHOTS=1), and retention deletes them after "
+                      "BUDDY_RETENTION_SCREENSHOT_DAYS if that is set.")
+            return {"frames": 0, "failed": 0, "seconds": 0.0, "fps": 0.0}
+        records = self.source.iter_range(jobs[0][0], None)
+        self._pending = next(records, None)
+        started = time.perf_counter()
+        done = failed = 0
+        pending: List[Dict[str, Any]] = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(scale, text_regions)) as pool:
+            # map() hands out chunksize jobs per round trip and yields results in job order
+            for timestamp, text, error in pool.map(ocr_screenshot, jobs, chunksize=max(1, chunksize)):
+                done += 1
+                if text is None:
+                    failed += 1
+                    self.state["failed"] += 1
+                    print(f"[Warning] {timestamp}: {error}")
+                else:
+                    pending.append(self._merge(records, timestamp, text))
+                if len(pending) >= self.batch:
+                    self._write(pending)
+                    pending = []
+                    elapsed = time.perf_counter() - started
+                    print(f"  {done}/{len(jobs)} frames, {done / elapsed:.2f} fps, "
+                          f"~{(len(jobs) - done) / (done / elapsed):.0f}s left")
+            if pending:
+                self._write(pending)
+        elapsed = time.perf_counter() - started
+        return {"frames": done, "failed": failed, "seconds": round(elapsed, 2),
+                "fps": round(done / elapsed, 2) if elapsed else 0.0}
+
+    def close(self):
+        self.target.close()
+
+
+if __name__ == "__main__":
+    import shutil
+    import sys
+
+    args = sys.argv[1:]
+    if "--help" in args or "-h" in args:
+        print("Usage:")
+        print("  python reocr.py [--from ts] [--to ts] [--workers n] [--chunksize n] [--scale s]")
+        print("                  [--no-regions] [--restart]")
+        print("  Rebuilds ocr_text for output/screenshot_*.png into output/reocr; resumes unless --restart.")
+        sys.exit(0)
+
+    def option(name: str, default: Optional[str] = None) -> Optional[str]:
+        return args[args.index(name) + 1] if name in args and args.index(name) + 1 < len(args) else default
+
+    if "--restart" in args:
+        shutil.rmtree(config.REOCR_DIR, ignore_errors=True)
+        if os.path.exists(config.REOCR_STATE_FILE):
+            os.remove(config.REOCR_STATE_FILE)
+    reprocessor = Reprocessor()
+    try:
+        stats = reprocessor.run(
+            archived_screenshots(option("--from"), option("--to")),
+            workers=int(option("--workers", str(config.OCR_WORKERS))),
+            chunksize=int(option("--chunksize", str(config.REOCR_CHUNKSIZE))),
+            scale=float(option("--scale", str(config.CAPTURE_SCALE or 1.0))),
+            text_regions="--no-regions" not in args and config.OCR_TEXT_REGIONS,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted; run again to resume from the last batch written.")
+        sys.exit(1)
+    finally:
+        reprocessor.close()
+    print(f"✅ Re-OCR'd {stats['frames']} frame(s) in {stats['seconds']}s ({stats['fps']} fps, "
+          f"{stats['failed']} failed) into {config.REOCR_DIR}")
+    print(f"   Re-analyze them with: BUDDY_SNAPSHOT_DIR={config.REOCR_DIR} python activity_analyzer.py --backfill")
@@ -0,0 +1,245 @@
+import datetime
+import glob
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import config
+from blob_store import BLOB_REF, BlobStore, is_blob_ref
+from editor_ingest import DELTA_REF, is_delta_ref
+from event_channel import write_json_atomic
+from prompt_context import build_prompt_context
+from snapshot_store import TIMESTAMP_FORMAT, SnapshotStore
+
+SCREENSHOT_PATTERN = re.compile(r"screenshot_(.+)\.png$")
+
+
+def bucket_start(timestamp: str, minutes: int) -> str:
+    """Start of the rollup bucket a snapshot timestamp falls in"""
+    moment = datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    moment = moment.replace(minute=moment.minute - moment.minute % minutes, second=0)
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+
+def horizon(days: float, minutes: int) -> str:
+    """Bucket-aligned timestamp before which snapshots are rolled up and deleted"""
+    moment = datetime.datetime.now() - datetime.timedelta(days=days)
+    return bucket_start(moment.strftime(TIMESTAMP_FORMAT), minutes)
+
+
+def build_rollup(start: str, snapshots: List[Any], predictions: List[Dict[str, Any]],
+                 minutes: int) -> Dict[str, Any]:
+    """One summary record for all snapshots and predictions of a bucket"""
+    windows = Counter(snapshot.get("active_window", "") for snapshot in snapshots)
+    main_window = windows.most_common(1)[0][0]
+    # The latest snapshot of the dominant window stands in for the whole bucket
+    representative = [snapshot for snapshot in snapshots if snapshot.get("active_window", "") == main_window][-1]
+    rollup = {
+        "timestamp": start,
+        "end": snapshots[-1].get("timestamp", ""),
+        "minutes": minutes,
+        "snapshots": len(snapshots),
+        "active_window": main_window,
+        "windows": dict(windows.most_common(5)),
+        "text": build_prompt_context(representative, config.ROLLUP_TOKEN_BUDGET).text,
+        "prediction": None,
+    }
+    activities = Counter(p.get("activity", "unknown") for p in predictions if p.get("activity", "unknown") != "unknown")
+    if activities:
+        activity = activities.most_common(1)[0][0]
+        confidences = [p.get("confidence", 0.0) for p in predictions if p.get("activity") == activity]
+        rollup["prediction"] = {
+            "activity": activity,
+            "confidence": round(sum(confidences) / len(confidences), 2),
+            "activities": dict(activities),
+        }
+    return rollup
+
+
+class Compactor:
+    """
+    Keeps full-fidelity snapshots for `raw_days` and folds older ones into
+    per-bucket rollups (a SnapshotStore under ROLLUP_DIR). Work is done in
+    bounded passes that resume from a state file, and raw data is only ever
+    deleted as whole sealed segments that have been rolled up, so capture
+    and readers are never blocked.
+    """
+
+    def __init__(self, snapshots: Optional[SnapshotStore] = None, predictions: Optional[SnapshotStore] = None,
+                 rollups: Optional[SnapshotStore] = None, blobs: Optional[BlobStore] = None,
+                 raw_days: float = config.RETENTION_RAW_DAYS, minutes: int = config.ROLLUP_MINUTES,
+                 screenshot_days: float = config.RETENTION_SCREENSHOT_DAYS,
+                 state_file: str = config.RETENTION_STATE_FILE, reocr_dir: str = config.REOCR_DIR):
+        self.snapshots = snapshots or SnapshotStore()
+        self.predictions = predictions or SnapshotStore(config.PREDICTION_DIR)
+        self.rollups = rollups or SnapshotStore(config.ROLLUP_DIR)
+        self.blobs = blobs or BlobStore()
+        self.raw_days = raw_days
+        self.minutes = minutes
+        self.screenshot_days = screenshot_days
+        self.state_file = state_file
+        self.reocr_dir = reocr_dir
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"rolled_up_to": ""}
+
+    def _save_state(self):
+        write_json_atomic(self.state_file, self.state, indent=2)
+
+    def roll_up(self, cutoff: str, max_snapshots: int = config.RETENTION_BATCH) -> int:
+        """
+        Fold snapshots older than cutoff into rollups, resuming where the last
+        pass stopped. Stops at a bucket boundary after about max_snapshots;
+        returns how many snapshots were folded.
+        """
+        start = self.state.get("rolled_up_to") or None
+        bucket, members, folded = None, [], 0
+        for record in self.snapshots.iter_range(start, None):
+            timestamp = record.get("timestamp", "")
+            if timestamp >= cutoff:
+                break
+            key = bucket_start(timestamp, self.minutes)
+            if key != bucket:
+                if members:
+                    self._write_rollup(bucket, members, key)
+                    folded += len(members)
+                    if folded >= max_snapshots:
+                        return folded
+                bucket, members = key, []
+            members.append(self.blobs.lazy(record))
+        if members:
+            # cutoff is bucket-aligned, so the last bucket is complete as well
+            self._write_rollup(bucket, members, cutoff)
+            folded += len(members)
+        return folded
+
+    def _write_rollup(self, bucket: str, members: List[Any], next_start: str):
+        predictions = [record.get("prediction", {}) for record in
+                       self.predictions.iter_range(bucket, members[-1].get("timestamp", ""))]
+        self.rollups.append(build_rollup(bucket, members, predictions, self.minutes))
+        self.state["rolled_up_to"] = next_start
+        self._save_state()
+
+    def _deletable_segments(self, store: SnapshotStore, cutoff: str, field: Optional[str] = None) -> List[int]:
+        """Sealed segments whose records all lie before cutoff"""
+        starts = store.segment_starts()
+        deletable = [segment for (segment, _), (_, next_key) in zip(starts, starts[1:]) if next_key < cutoff]
+        if field is None or not deletable:
+            return deletable
+        # Keep the segment holding the editor keyframe the first retained record needs
+        index = len(deletable)
+        needed = starts[index][1]
+        value = (store.first_record(starts[index][0]) or {}).get(field)
+        if is_delta_ref(value):
+            needed = min(needed, value[DELTA_REF]["key"])
+        while deletable and starts[index][1] > needed:
+            deletable.pop()
+            index -= 1
+        return deletable
+
+    def delete_raw(self, cutoff: str) -> int:
+        """Delete rolled-up snapshot and prediction segments, and screenshots past their own limit"""
+        rolled_up_to = self.state.get("rolled_up_to", "")
+        limit = min(cutoff, rolled_up_to)
+        removed = 0
+        for segment in self._deletable_segments(self.snapshots, limit, "vscode_text"):
+            self.snapshots.drop_segment(segment)
+            removed += 1
+        for segment in self._deletable_segments(self.predictions, limit):
+            self.predictions.drop_segment(segment)
+            removed += 1
+        return removed + self.delete_screenshots()
+
+    def delete_screenshots(self) -> int:
+        """
+        Delete kept screenshots older than screenshot_days. They are an opt-in
+        archive for reocr.py, so they are kept indefinitely by default
+        (screenshot_days = 0), independent of raw snapshot retention.
+        """
+        if self.screenshot_days <= 0:
+            return 0
+        limit = horizon(self.screenshot_days, self.minutes)
+        removed = 0
+        for path in glob.glob(os.path.join("output", "screenshot_*.png")):
+            match = SCREENSHOT_PATTERN.search(path)
+            if match and match.group(1) < limit:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def collect_blobs(self) -> int:
+        """Delete blobs no retained snapshot (live or re-OCR'd by reocr.py) refers to"""
+        stores = [self.snapshots]
+        # Only opened if it exists: SnapshotStore would create the directory
+        if os.path.isdir(self.reocr_dir):
+            stores.append(SnapshotStore(self.reocr_dir))
+        referenced = set()
+        for store in stores:
+            for record in store:
+                for field in self.blobs.fields:
+                    value = record.get(field)
+                    if is_blob_ref(value):
+                        referenced.add(value[BLOB_REF])
+        return self.blobs.collect_garbage(referenced, config.BLOB_GC_GRACE)
+
+    def run_once(self) -> Dict[str, int]:
+        """One bounded pass: roll up, then delete what has been rolled up"""
+        cutoff = horizon(self.raw_days, self.minutes)
+        folded = self.roll_up(cutoff)
+        removed = self.delete_raw(cutoff)
+        blobs = self.collect_blobs() if removed else 0
+        return {"folded": folded, "removed": removed, "blobs": blobs}
+
+
+def start_retention(interval: float = config.RETENTION_INTERVAL) -> Optional[threading.Thread]:
+    """Run compaction passes on a low-priority daemon thread"""
+    if interval <= 0:
+        return None
+
+    def loop():
+        compactor = Compactor()
+        while True:
+            try:
+                stats = compactor.run_once()
+                if stats["folded"] or stats["removed"]:
+                    print(f"🗜️ Retention: folded {stats['folded']} snapshot(s), removed {stats['removed']} "
+                          f"file(s) and {stats['blobs']} blob(s)")
+                # Keep going while there is a backlog, otherwise wait for the next round
+                time.sleep(1.0 if stats["folded"] >= config.RETENTION_BATCH else interval)
+            except Exception as e:
+                print(f"[Warning] Retention pass failed: {e}")
+                time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="retention", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        compactor = Compactor()
+        totals = Counter()
+        while True:
+            stats = compactor.run_once()
+            totals.update(stats)
+            if stats["folded"] < config.RETENTION_BATCH:
+                break
+        print(f"✅ Folded {totals['folded']} snapshot(s) into rollups, removed {totals['removed']} "
+              f"file(s) and {totals['blobs']} blob(s)")
+    else:
+        print("Usage:")
+        print("  python retention.py --run   # Roll up and delete snapshots older than BUDDY_RETENTION_RAW_DAYS")
@@ -0,0 +1,106 @@
+import os
+from typing import Optional, Tuple
+
+import cv2
+import mss
+import numpy as np
+
+import config
+
+# Regions smaller than this (in screen units) are treated as bogus bounds
+MIN_REGION = 32
+
+
+def clip_region(bounds: Tuple[int, int, int, int], area: dict) -> Optional[dict]:
+    """Intersect (left, top, width, height) window bounds with an mss monitor area"""
+    left, top, width, height = bounds
+    x0, y0 = max(left, area["left"]), max(top, area["top"])
+    x1 = min(left + width, area["left"] + area["width"])
+    y1 = min(top + height, area["top"] + area["height"])
+    if x1 - x0 < MIN_REGION or y1 - y0 < MIN_REGION:
+        return None
+    return {"left": x0, "top": y0, "width": x1 - x0, "height": y1 - y0}
+
+
+class ScreenCapture:
+    """
+    In-memory screen capture built on mss.
+    The raw BGRA buffer is wrapped in a NumPy view without copying, then
+    converted to grayscale and downscaled into buffers that are reused from
+    one frame to the next. Nothing is written to disk unless keep_screenshots
+    is on. grab() can be limited to a region such as the foreground window,
+    so only that part of the desktop is copied and OCR'd.
+    """
+
+    def __init__(self, monitor: int = config.CAPTURE_MONITOR,
+                 scale: Optional[float] = config.CAPTURE_SCALE,
+                 keep_screenshots: bool = config.KEEP_SCREENSHOTS,
+                 output_dir: str = "output"):
+        self.monitor = monitor
+        # None means "auto": scale HiDPI captures back down to logical pixels
+        self.scale = scale
+        self.keep_screenshots = keep_screenshots
+        self.output_dir = output_dir
+        # Opened on first grab, so preprocess() also works without a display
+        self._sct = None
+        self._gray: Optional[np.ndarray] = None
+        self._small: Optional[np.ndarray] = None
+        self._auto_scale = 1.0
+
+    def close(self):
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+    def grab_raw(self, bounds: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """Return the screen, or the part of it inside bounds, as an (h, w, 4) BGRA view over mss's buffer"""
+        if self._sct is None:
+            self._sct = mss.mss()
+        area = self._sct.monitors[self.monitor]
+        if bounds is not None:
+            # Window bounds outside this monitor fall back to the whole area
+            area = clip_region(bounds, area) or area
+        shot = self._sct.grab(area)
+        frame = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        if self.scale is None:
+            self._auto_scale = area["width"] / shot.width
+        return frame
+
+    def preprocess(self, bgra: np.ndarray) -> np.ndarray:
+        """Grayscale and downscale a BGRA frame into the reusable buffers"""
+        height, width = bgra.shape[:2]
+        if self._gray is None or self._gray.shape != (height, width):
+            self._gray = np.empty((height, width), dtype=np.uint8)
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=self._gray)
+
+        scale = self.scale if self.scale is not None else self._auto_scale
+        if scale >= 1.0:
+            return self._gray
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        if self._small is None or self._small.shape != (size[1], size[0]):
+            self._small = np.empty((size[1], size[0]), dtype=np.uint8)
+        cv2.resize(self._gray, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        return self._small
+
+    def thumbnail(self, size=(64, 40)) -> np.ndarray:
+        """Tiny grayscale copy of the screen used for cheap change detection"""
+        bgra = self.grab_raw()
+        small = cv2.resize(bgra, size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGRA2GRAY)
+
+    def save(self, bgra: np.ndarray, timestamp: str) -> str:
+        """Write a full-resolution PNG of the frame to the output directory"""
+        path = os.path.join(self.output_dir, f"screenshot_{timestamp}.png")
+        cv2.imwrite(path, bgra)
+        return path
+
+    def grab(self, timestamp: Optional[str] = None,
+             bounds: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """Capture the screen (or only bounds) and return the grayscale frame that goes to OCR"""
+        bgra = self.grab_raw(bounds)
+        if self.keep_screenshots and timestamp:
+            try:
+                self.save(bgra, timestamp)
+            except Exception as e:
+                print(f"[Warning] Failed to save screenshot: {e}")
+        return self.preprocess(bgra)
@@ -0,0 +1,447 @@
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import config
+from event_channel import write_json_atomic
+
+TOKEN_PATTERN = re.compile(r"[^\W_]{2,32}")
+# Snapshot fields that are indexed; the window title makes "when was I in X" work
+SEARCH_FIELDS = ("active_window", "focused_text", "clipboard", "ocr_text")
+# Every SPARSE_EVERY-th term of a segment is kept in memory to seek into its term file
+SPARSE_EVERY = 64
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+Posting = Tuple[int, int]
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def document_terms(snapshot: Mapping[str, Any]) -> Counter:
+    """Term frequencies of the searchable fields of a snapshot"""
+    terms = Counter()
+    for field in SEARCH_FIELDS:
+        value = snapshot.get(field)
+        if isinstance(value, str):
+            terms.update(tokenize(value))
+    return terms
+
+
+def encode_postings(postings: List[Posting]) -> bytes:
+    """Varint-encoded (doc id gap, term frequency) pairs; doc ids must be ascending"""
+    out = bytearray()
+    previous = 0
+    for doc, frequency in postings:
+        for value in (doc - previous, frequency):
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        previous = doc
+    return bytes(out)
+
+
+def decode_postings(data: bytes) -> List[Posting]:
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    postings = []
+    doc = 0
+    for index in range(0, len(values), 2):
+        doc += values[index]
+        postings.append((doc, values[index + 1]))
+    return postings
+
+
+class Segment:
+    """
+    One immutable piece of the index, written once and only ever replaced by
+    a merge. <name>.terms holds "term, df, offset, length" lines in term
+    order, <name>.post the encoded postings and <name>.json the timestamp and
+    length of every document plus a sparse term index into the term file.
+    """
+
+    def __init__(self, directory: str, name: str):
+        self.directory = directory
+        self.name = name
+        with open(self.path("json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.docs: List[str] = meta["docs"]
+        self.lengths: List[int] = meta["lengths"]
+        self.total_length: int = meta["total_length"]
+        self._sparse_terms = [term for term, _ in meta["sparse"]]
+        self._sparse_offsets = [offset for _, offset in meta["sparse"]]
+
+    def path(self, kind: str) -> str:
+        return os.path.join(self.directory, f"{self.name}.{kind}")
+
+    def files(self) -> List[str]:
+        return [self.path(kind) for kind in ("json", "terms", "post")]
+
+    def lookup(self, term: str) -> Optional[Tuple[int, int, int]]:
+        """(df, offset, length) of a term's postings, or None"""
+        index = bisect.bisect_right(self._sparse_terms, term) - 1
+        if index < 0:
+            return None
+        with open(self.path("terms"), "r", encoding="utf-8") as f:
+            f.seek(self._sparse_offsets[index])
+            for _ in range(SPARSE_EVERY):
+                line = f.readline()
+                if not line:
+                    break
+                name, df, offset, length = line.rstrip("\n").split("\t")
+                if name == term:
+                    return int(df), int(offset), int(length)
+                if name > term:
+                    break
+        return None
+
+    def postings(self, entry: Tuple[int, int, int]) -> List[Posting]:
+        with open(self.path("post"), "rb") as f:
+            f.seek(entry[1])
+            return decode_postings(f.read(entry[2]))
+
+    def terms(self) -> Iterator[Tuple[str, List[Posting]]]:
+        """Every term with its postings, in term order"""
+        with open(self.path("terms"), "r", encoding="utf-8") as terms, open(self.path("post"), "rb") as post:
+            for line in terms:
+                name, _, offset, length = line.rstrip("\n").split("\t")
+                post.seek(int(offset))
+                yield name, decode_postings(post.read(int(length)))
+
+
+def write_segment(directory: str, name: str, docs: List[str], lengths: List[int],
+                  terms: Iterator[Tuple[str, List[Posting]]]) -> Segment:
+    """Write a segment from terms given in sorted order"""
+    sparse = []
+    base = os.path.join(directory, name)
+    with open(f"{base}.terms", "w", encoding="utf-8", newline="\n") as term_file, \
+            open(f"{base}.post", "wb") as post_file:
+        offset = 0
+        for count, (term, postings) in enumerate(terms):
+            if count % SPARSE_EVERY == 0:
+                sparse.append([term, term_file.tell()])
+            data = encode_postings(postings)
+            post_file.write(data)
+            term_file.write(f"{term}\t{len(postings)}\t{offset}\t{len(data)}\n")
+            offset += len(data)
+    # The metadata file goes last: a segment without it is an unfinished write
+    write_json_atomic(f"{base}.json", {"docs": docs, "lengths": lengths,
+                                       "total_length": sum(lengths), "sparse": sparse})
+    return Segment(directory, name)
+
+
+def merge_terms(segments: List[Segment]) -> Iterator[Tuple[str, List[Posting]]]:
+    """Stream the union of the segments' terms, renumbering doc ids in segment order"""
+    bases, base = [], 0
+    for segment in segments:
+        bases.append(base)
+        base += len(segment.docs)
+    def stream(index: int, segment: Segment):
+        for term, postings in segment.terms():
+            yield term, index, postings
+
+    streams = [stream(index, segment) for index, segment in enumerate(segments)]
+    current, merged = None, []
+    for term, index, postings in heapq.merge(*streams, key=lambda item: (item[0], item[1])):
+        if term != current:
+            if merged:
+                yield current, merged
+            current, merged = term, []
+        merged.extend((doc + bases[index], frequency) for doc, frequency in postings)
+    if merged:
+        yield current, merged
+
+
+def _memory_terms(buffer: List[Tuple[str, Counter]]) -> Dict[str, List[Posting]]:
+    postings: Dict[str, List[Posting]] = {}
+    for doc, (_, terms) in enumerate(buffer):
+        for term, frequency in terms.items():
+            postings.setdefault(term, []).append((doc, frequency))
+    return postings
+
+
+class SearchIndex:
+    """
+    BM25 full-text index over the text fields of every snapshot.
+    add() appends the snapshot's term counts to a journal and an in-memory
+    buffer; every flush_docs snapshots the buffer is written out as an
+    immutable segment. A background thread merges runs of merge_factor
+    neighbouring segments of similar size, so a query only touches a
+    logarithmic number of segments. manifest.json lists the live segments in
+    time order and is replaced atomically; readers in other processes
+    reload it (and the journal) when it changes.
+    """
+
+    def __init__(self, directory: str = config.SEARCH_DIR, flush_docs: int = config.SEARCH_FLUSH_DOCS,
+                 merge_factor: int = config.SEARCH_MERGE_FACTOR, readonly: bool = False):
+        self.directory = directory
+        self.flush_docs = flush_docs
+        self.merge_factor = max(2, merge_factor)
+        self.readonly = readonly
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+        self.segments: List[Segment] = []
+        self.manifest: Dict[str, Any] = {"segments": [], "next_id": 1, "indexed_to": ""}
+        self._buffer: List[Tuple[str, Counter]] = []
+        self._buffer_postings: Optional[Dict[str, List[Posting]]] = None
+        self._manifest_stamp = None
+        self._journal_stamp = None
+        self._journal = None
+        self._lock = threading.Lock()
+        self._merge_wanted = threading.Event()
+        self._merger: Optional[threading.Thread] = None
+        self._closed = False
+        os.makedirs(directory, exist_ok=True)
+        self.refresh()
+
+    # -- loading -------------------------------------------------------------
+
+    @staticmethod
+    def _stamp(path: str):
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def refresh(self):
+        """Reload the manifest and the journal if another process changed them"""
+        stamp = self._stamp(self.manifest_path)
+        if stamp != self._manifest_stamp:
+            self._manifest_stamp = stamp
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+            loaded = {segment.name: segment for segment in self.segments}
+            self.segments = [loaded.get(name) or Segment(self.directory, name) for name in self.manifest["segments"]]
+            self._journal_stamp = None
+        stamp = self._stamp(self.journal_path)
+        if stamp != self._journal_stamp:
+            self._journal_stamp = stamp
+            self._load_journal()
+
+    def _load_journal(self):
+        self._buffer = []
+        self._buffer_postings = None
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        timestamp, terms = json.loads(line)
+                    except ValueError:
+                        continue
+                    # Already in a segment if the last flush died before truncating the journal
+                    if timestamp > self.manifest["indexed_to"]:
+                        self._buffer.append((timestamp, Counter(terms)))
+        except FileNotFoundError:
+            pass
+
+    # -- writing -------------------------------------------------------------
+
+    def add(self, snapshot: Mapping[str, Any]):
+        """Index one snapshot; snapshots must arrive in timestamp order"""
+        timestamp = snapshot.get("timestamp", "")
+        last = self._buffer[-1][0] if self._buffer else self.manifest["indexed_to"]
+        if self.readonly or not timestamp or timestamp <= last:
+            return
+        terms = document_terms(snapshot)
+        with self._lock:
+            if self._journal is None:
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal.write(json.dumps([timestamp, terms], separators=(",", ":")) + "\n")
+            self._journal.flush()
+            self._buffer.append((timestamp, terms))
+            self._buffer_postings = None
+        if len(self._buffer) >= self.flush_docs:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered snapshots as a new segment"""
+        with self._lock:
+            if self.readonly or not self._buffer:
+                return
+            name = f"seg_{self.manifest['next_id']:06d}"
+            postings = _memory_terms(self._buffer)
+            segment = write_segment(self.directory, name, [timestamp for timestamp, _ in self._buffer],
+                                    [sum(terms.values()) for _, terms in self._buffer],
+                                    ((term, postings[term]) for term in sorted(postings)))
+            self.segments.append(segment)
+            self.manifest = {"segments": [s.name for s in self.segments], "next_id": self.manifest["next_id"] + 1,
+                             "indexed_to": self._buffer[-1][0]}
+            self._write_manifest()
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = open(self.journal_path, "w", encoding="utf-8")
+            self._buffer = []
+            self._buffer_postings = None
+        self._start_merger()
+        self._merge_wanted.set()
+
+    def _write_manifest(self):
+        write_json_atomic(self.manifest_path, self.manifest)
+        self._manifest_stamp = self._stamp(self.manifest_path)
+
+    def _tier(self, segment: Segment) -> int:
+        return int(math.log(max(1.0, len(segment.docs) / self.flush_docs), self.merge_factor))
+
+    def _merge_candidate(self) -> Optional[List[Segment]]:
+        """merge_factor neighbouring segments of the same size tier"""
+        segments = self.segments
+        for start in range(len(segments) - self.merge_factor + 1):
+            run = segments[start:start + self.merge_factor]
+            if len({self._tier(segment) for segment in run}) == 1:
+                return run
+        return None
+
+    def merge_once(self) -> bool:
+        """Merge one run of segments; returns False when there is nothing to merge"""
+        with self._lock:
+            run = self._merge_candidate()
+            if run is None:
+                return False
+            name = f"seg_{self.manifest['next_id']:06d}"
+            self.manifest["next_id"] += 1
+        # Segments are immutable, so the merge runs without holding the lock
+        try:
+            merged = write_segment(self.directory, name, [doc for segment in run for doc in segment.docs],
+                                   [length for segment in run for length in segment.lengths], merge_terms(run))
+        except Exception:
+            for kind in ("json", "terms", "post"):
+                try:
+                    os.remove(os.path.join(self.directory, f"{name}.{kind}"))
+                except OSError:
+                    pass
+            raise
+        with self._lock:
+            start = self.segments.index(run[0])
+            self.segments[start:start + len(run)] = [merged]
+            self.manifest["segments"] = [segment.name for segment in self.segments]
+            self._write_manifest()
+        for segment in run:
+            for path in segment.files():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return True
+
+    def _start_merger(self):
+        if self._merger is None and not self.readonly:
+            self._merger = threading.Thread(target=self._merge_loop, name="search-merge", daemon=True)
+            self._merger.start()
+
+    def _merge_loop(self):
+        while not self._closed:
+            self._merge_wanted.wait()
+            self._merge_wanted.clear()
+            try:
+                while not self._closed and self.merge_once():
+                    pass
+            except Exception as e:
+                print(f"[Warning] Search index merge failed: {e}")
+
+    def close(self):
+        self.flush()
+        self._closed = True
+        self._merge_wanted.set()
+        if self._merger is not None:
+            self._merger.join()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    # -- queries -------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return sum(len(segment.docs) for segment in self.segments) + len(self._buffer)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[float, str]]:
+        """Best-matching snapshots as (BM25 score, timestamp), best first"""
+        for _ in range(3):
+            try:
+                self.refresh()
+                return self._search(query, limit)
+            except FileNotFoundError:
+                # A merge replaced some segments while they were being read
+                self._manifest_stamp = None
+        return []
+
+    def _search(self, query: str, limit: int) -> List[Tuple[float, str]]:
+        terms = set(tokenize(query))
+        if not terms or not len(self):
+            return []
+        if self._buffer_postings is None:
+            self._buffer_postings = _memory_terms(self._buffer)
+        buffer_docs = [timestamp for timestamp, _ in self._buffer]
+        buffer_lengths = [sum(counts.values()) for _, counts in self._buffer]
+        total = len(self)
+        average = (sum(segment.total_length for segment in self.segments) + sum(buffer_lengths)) / total or 1.0
+
+        scores: Dict[str, float] = {}
+        for term in terms:
+            # (timestamps, lengths, postings) per segment that has the term
+            hits = []
+            for segment in self.segments:
+                entry = segment.lookup(term)
+                if entry is not None:
+                    hits.append((segment.docs, segment.lengths, segment.postings(entry)))
+            if term in self._buffer_postings:
+                hits.append((buffer_docs, buffer_lengths, self._buffer_postings[term]))
+            df = sum(len(postings) for _, _, postings in hits)
+            if not df:
+                continue
+            idf = math.log(1.0 + (total - df + 0.5) / (df + 0.5))
+            for docs, lengths, postings in hits:
+                for doc, frequency in postings:
+                    norm = K1 * (1.0 - B + B * lengths[doc] / average)
+                    timestamp = docs[doc]
+                    scores[timestamp] = scores.get(timestamp, 0.0) + idf * frequency * (K1 + 1) / (frequency + norm)
+        # Ties go to the most recent snapshot
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [(round(score, 4), timestamp) for timestamp, score in best]
+
+
+def rebuild(index: SearchIndex) -> int:
+    """Index every stored snapshot from scratch"""
+    from blob_store import BlobStore
+    from snapshot_store import SnapshotStore
+
+    blobs = BlobStore()
+    count = 0
+    for record in SnapshotStore():
+        index.add(blobs.lazy(record))
+        count += 1
+    index.close()
+    return count
+
+
+if __name__ == "__main__":
+    import shutil
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--rebuild":
+        shutil.rmtree(config.SEARCH_DIR, ignore_errors=True)
+        count = rebuild(SearchIndex())
+        print(f"✅ Indexed {count} stored snapshot(s) into {config.SEARCH_DIR}")
+    else:
+        print("Usage:")
+        print("  python search_index.py --rebuild   # Rebuild the search index from output/snapshots")
@@ -0,0 +1,217 @@
+import datetime
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+import config
+from event_channel import write_json_atomic
+from snapshot_store import TIMESTAMP_FORMAT, SnapshotStore
+
+HOUR_FORMAT = "%Y-%m-%d %H"
+DAY_FORMAT = "%Y-%m-%d"
+
+
+def _empty_state() -> Dict[str, Any]:
+    return {"by_activity": {}, "by_day": {}, "by_hour": {}, "current": None, "last": ""}
+
+
+def _add_seconds(totals: Dict[str, float], activity: str, seconds: float):
+    totals[activity] = round(totals.get(activity, 0.0) + seconds, 3)
+
+
+class SessionIndex:
+    """
+    Running activity totals and sessions built from predictions as they arrive.
+    The time between two predictions (capped at `gap` seconds) is credited to
+    the earlier prediction's activity, split across hour boundaries, into
+    per-activity, per-day and per-hour totals. Consecutive predictions of the
+    same activity form a session; a change of activity or a gap longer than
+    `gap` closes it and appends it to the session store.
+
+    Each update is O(1): the prediction is appended to a journal and the
+    totals are checkpointed to a JSON file every `checkpoint_every` updates.
+    Loading replays the journal on top of the checkpoint; updates not newer
+    than the last one seen are ignored, so replaying twice is harmless.
+    """
+
+    def __init__(self, path: str = config.SESSION_INDEX_FILE, sessions_dir: str = config.SESSION_DIR,
+                 gap: float = config.SESSION_GAP, checkpoint_every: int = 200, readonly: bool = False):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.gap = gap
+        self.checkpoint_every = checkpoint_every
+        self.readonly = readonly
+        self.sessions = SnapshotStore(sessions_dir)
+        # Sessions replayed from the journal may already be in the store
+        latest = self.sessions.latest(1)
+        self._last_session = latest[0].get("timestamp", "") if latest else ""
+        self.state = self._load()
+        self._journal = None
+        self._pending = 0
+
+    # -- persistence ---------------------------------------------------------
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.state = _empty_state()
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        timestamp, activity = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._apply(timestamp, activity)
+        except FileNotFoundError:
+            pass
+        return self.state
+
+    def checkpoint(self):
+        """Write the totals and start a new journal"""
+        if self.readonly:
+            return
+        write_json_atomic(self.path, self.state)
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self.journal_path, "w", encoding="utf-8")
+        self._pending = 0
+
+    def close(self):
+        if self._journal is not None:
+            self.checkpoint()
+            self._journal.close()
+            self._journal = None
+
+    # -- updates -------------------------------------------------------------
+
+    def _credit(self, activity: str, start: datetime.datetime, seconds: float):
+        """Add seconds starting at `start` to the totals, split per hour"""
+        _add_seconds(self.state["by_activity"], activity, seconds)
+        while seconds > 0:
+            hour_end = start.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+            part = min(seconds, (hour_end - start).total_seconds())
+            _add_seconds(self.state["by_day"].setdefault(start.strftime(DAY_FORMAT), {}), activity, part)
+            _add_seconds(self.state["by_hour"].setdefault(start.strftime(HOUR_FORMAT), {}), activity, part)
+            start, seconds = hour_end, seconds - part
+
+    def _close_session(self, end: str):
+        current = self.state["current"]
+        if current is None:
+            return
+        self.state["current"] = None
+        if self.readonly or current["start"] <= self._last_session:
+            return
+        self.sessions.append({"timestamp": current["start"], "end": end, "activity": current["activity"],
+                              "seconds": current["seconds"], "predictions": current["predictions"]})
+        self._last_session = current["start"]
+
+    def _apply(self, timestamp: str, activity: str) -> bool:
+        if not timestamp or timestamp <= self.state["last"]:
+            return False
+        moment = datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+        current = self.state["current"]
+        if current is not None:
+            previous = datetime.datetime.strptime(self.state["last"], TIMESTAMP_FORMAT)
+            elapsed = (moment - previous).total_seconds()
+            credited = min(elapsed, self.gap)
+            self._credit(current["activity"], previous, credited)
+            current["seconds"] = round(current["seconds"] + credited, 3)
+            if elapsed > self.gap:
+                self._close_session((previous + datetime.timedelta(seconds=credited)).strftime(TIMESTAMP_FORMAT))
+            elif current["activity"] != activity:
+                self._close_session(timestamp)
+        if self.state["current"] is None:
+            self.state["current"] = {"activity": activity, "start": timestamp, "seconds": 0.0, "predictions": 0}
+        self.state["current"]["predictions"] += 1
+        self.state["last"] = timestamp
+        return True
+
+    def add(self, timestamp: str, activity: str):
+        """Record one prediction made for the snapshot taken at `timestamp`"""
+        activity = activity or "unknown"
+        if not self._apply(timestamp, activity) or self.readonly:
+            return
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps([timestamp, activity]) + "\n")
+        self._journal.flush()
+        self._pending += 1
+        if self._pending >= self.checkpoint_every:
+            self.checkpoint()
+
+    # -- queries -------------------------------------------------------------
+
+    def totals(self, start_day: Optional[str] = None, end_day: Optional[str] = None) -> Dict[str, float]:
+        """Seconds per activity over the days start_day..end_day (inclusive, YYYY-MM-DD)"""
+        if start_day is None and end_day is None:
+            return dict(self.state["by_activity"])
+        result: Dict[str, float] = {}
+        for day, activities in self.state["by_day"].items():
+            if (start_day is None or day >= start_day) and (end_day is None or day <= end_day):
+                for activity, seconds in activities.items():
+                    _add_seconds(result, activity, seconds)
+        return result
+
+    def hours(self, day: str) -> Dict[str, Dict[str, float]]:
+        """Seconds per activity for every hour of a day"""
+        prefix = f"{day} "
+        return {hour[len(prefix):]: dict(activities) for hour, activities in sorted(self.state["by_hour"].items())
+                if hour.startswith(prefix)}
+
+    def sessions_between(self, start_day: str, end_day: str) -> Iterator[Dict[str, Any]]:
+        yield from self.sessions.iter_range(f"{start_day}_00-00-00", f"{end_day}_23-59-59")
+        current = self.state["current"]
+        if current and start_day <= current["start"][:10] <= end_day:
+            yield dict(current, timestamp=current["start"], end=self.state["last"], open=True)
+
+
+def rebuild(predictions: SnapshotStore, index: SessionIndex) -> int:
+    """Feed the whole prediction log into an empty index"""
+    count = 0
+    for record in predictions:
+        index.add(record.get("timestamp", ""), record.get("prediction", {}).get("activity", "unknown"))
+        count += 1
+    index.checkpoint()
+    return count
+
+
+def report_range(period: str) -> List[str]:
+    """[start_day, end_day] for today, yesterday, week, month, a YYYY-MM-DD day or all; ValueError otherwise"""
+    today = datetime.date.today()
+    if period == "today":
+        return [today.isoformat(), today.isoformat()]
+    if period == "yesterday":
+        day = (today - datetime.timedelta(days=1)).isoformat()
+        return [day, day]
+    if period == "week":
+        return [(today - datetime.timedelta(days=today.weekday())).isoformat(), today.isoformat()]
+    if period == "month":
+        return [today.replace(day=1).isoformat(), today.isoformat()]
+    if period == "all":
+        return ["0000-00-00", "9999-99-99"]
+    try:
+        datetime.datetime.strptime(period, DAY_FORMAT)
+    except ValueError:
+        raise ValueError(f"Unknown report period: {period!r}") from None
+    return [period, period]
+
+
+if __name__ == "__main__":
+    import shutil
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--rebuild":
+        for path in (config.SESSION_INDEX_FILE, f"{config.SESSION_INDEX_FILE}.journal"):
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(config.SESSION_DIR, ignore_errors=True)
+        index = SessionIndex()
+        count = rebuild(SnapshotStore(config.PREDICTION_DIR), index)
+        index.close()
+        print(f"✅ Rebuilt the session index from {count} logged prediction(s)")
+    else:
+        print("Usage:")
+        print("  python session_index.py --rebuild   # Rebuild sessions and totals from output/predictions")
@@ -0,0 +1,271 @@
+import bisect
+import glob
+import json
+import os
+import re
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import config
+
+SEGMENT_PATTERN = re.compile(r"segment_(\d+)\.jsonl$")
+LEGACY_PATTERN = re.compile(r"user_data_(.+)\.json$")
+# Snapshot timestamps sort lexicographically in time order
+TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
+
+
+def snapshot_name(timestamp: str) -> str:
+    """Legacy-style file name of a snapshot, used to refer to stored records"""
+    return f"user_data_{timestamp}.json"
+
+
+def timestamp_from_name(name: str) -> Optional[str]:
+    """Timestamp part of a user_data_<timestamp>.json name"""
+    match = LEGACY_PATTERN.search(os.path.basename(name))
+    return match.group(1) if match else None
+
+
+class SnapshotStore:
+    """
+    Append-only snapshot store made of rolled JSONL segment files.
+    Records are written as one compact JSON line each to segment_<n>.jsonl;
+    a new segment is started once the current one exceeds segment_bytes.
+    A sparse index (index.jsonl) holds [timestamp, segment, offset] for the
+    first record of every segment and then every index_every records, so a
+    time-range query bisects the index and streams from a single seek.
+    Records must be appended in timestamp order, and there is one writer per
+    store; readers in other processes pick up new data through refresh().
+    """
+
+    def __init__(self, directory: str = config.SNAPSHOT_DIR,
+                 segment_bytes: int = config.SNAPSHOT_SEGMENT_BYTES,
+                 index_every: int = config.SNAPSHOT_INDEX_EVERY):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.index_every = index_every
+        self._keys: List[str] = []
+        self._entries: List[Tuple[int, int]] = []
+        self._index_read = 0
+        self._index_inode = None
+        self._writer = None
+        self._segment = 0
+        self._since_index = 0
+        os.makedirs(directory, exist_ok=True)
+        self.refresh()
+
+    # -- paths ---------------------------------------------------------------
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment_{segment:06d}.jsonl")
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "index.jsonl")
+
+    def segments(self) -> List[int]:
+        """Numbers of the segment files currently on disk, oldest first"""
+        numbers = []
+        for path in glob.glob(os.path.join(self.directory, "segment_*.jsonl")):
+            match = SEGMENT_PATTERN.search(path)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    # -- index ---------------------------------------------------------------
+
+    def refresh(self):
+        """Load index entries appended since the last call"""
+        try:
+            with open(self._index_path, "rb") as f:
+                inode = os.fstat(f.fileno()).st_ino
+                if inode != self._index_inode:
+                    # The index was compacted (replaced); read it again from the start
+                    self._index_inode = inode
+                    self._keys, self._entries, self._index_read = [], [], 0
+                f.seek(self._index_read)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    self._index_read += len(line)
+                    key, segment, offset = json.loads(line)
+                    self._keys.append(key)
+                    self._entries.append((segment, offset))
+        except FileNotFoundError:
+            pass
+
+    def _add_index(self, key: str, segment: int, offset: int):
+        with open(self._index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps([key, segment, offset]) + "\n")
+        self._keys.append(key)
+        self._entries.append((segment, offset))
+        self._index_read = os.path.getsize(self._index_path)
+        self._since_index = 0
+
+    def _compact_index(self, segments: List[int]):
+        """Drop index entries of deleted segments; only done by the single writer"""
+        existing = set(segments)
+        kept = [(key, entry) for key, entry in zip(self._keys, self._entries) if entry[0] in existing]
+        if len(kept) == len(self._keys):
+            return
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for key, (segment, offset) in kept:
+                f.write(json.dumps([key, segment, offset]) + "\n")
+        os.replace(tmp_path, self._index_path)
+        self.refresh()
+
+    def segment_starts(self) -> List[Tuple[int, str]]:
+        """(segment, timestamp of its first record) for every segment on disk, oldest first"""
+        self.refresh()
+        existing = set(self.segments())
+        starts = {}
+        for key, (segment, offset) in zip(self._keys, self._entries):
+            if offset == 0 and segment in existing:
+                starts.setdefault(segment, key)
+        return sorted(starts.items())
+
+    def first_record(self, segment: int) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._segment_path(segment), "rb") as f:
+                line = f.readline()
+            return json.loads(line) if line.endswith(b"\n") else None
+        except (OSError, ValueError):
+            return None
+
+    def drop_segment(self, segment: int):
+        """
+        Delete a sealed segment file. Readers skip missing segments and the
+        writer drops their index entries the next time it opens the store.
+        """
+        segments = self.segments()
+        if segments and segment == segments[-1]:
+            raise ValueError("The newest segment is still being written")
+        try:
+            os.remove(self._segment_path(segment))
+        except FileNotFoundError:
+            pass
+
+    # -- writing -------------------------------------------------------------
+
+    def _open_writer(self):
+        self.refresh()
+        segments = self.segments()
+        self._compact_index(segments)
+        self._segment = segments[-1] if segments else 1
+        self._writer = open(self._segment_path(self._segment), "ab")
+        # Records written after the last index entry of this segment
+        self._since_index = 0
+        if self._entries and self._entries[-1][0] == self._segment:
+            for _ in self._scan(len(self._entries) - 1):
+                self._since_index += 1
+
+    def append(self, record: Dict[str, Any]):
+        """Append one snapshot; it must not be older than the last one"""
+        if self._writer is None:
+            self._open_writer()
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        offset = self._writer.tell()
+        if offset and offset + len(line) > self.segment_bytes:
+            self._writer.close()
+            self._segment += 1
+            self._writer = open(self._segment_path(self._segment), "ab")
+            offset = 0
+        if offset == 0 or self._since_index >= self.index_every:
+            self._add_index(record.get("timestamp", ""), self._segment, offset)
+        self._writer.write(line)
+        self._writer.flush()
+        self._since_index += 1
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    # -- reading -------------------------------------------------------------
+
+    def _scan(self, entry: int) -> Iterator[Dict[str, Any]]:
+        """Stream records from index entry onwards, across later segments"""
+        segment, offset = self._entries[entry]
+        last = self._entries[-1][0]
+        while segment <= last:
+            try:
+                with open(self._segment_path(segment), "rb") as f:
+                    f.seek(offset)
+                    for line in f:
+                        # A line without newline is still being written
+                        if not line.endswith(b"\n"):
+                            break
+                        yield json.loads(line)
+            except FileNotFoundError:
+                pass
+            segment += 1
+            offset = 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_range()
+
+    def iter_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream records with start <= timestamp <= end, oldest first"""
+        self.refresh()
+        if not self._entries:
+            return
+        entry = 0
+        if start is not None:
+            entry = max(0, bisect.bisect_left(self._keys, start) - 1)
+        for record in self._scan(entry):
+            timestamp = record.get("timestamp", "")
+            if start is not None and timestamp < start:
+                continue
+            if end is not None and timestamp > end:
+                return
+            yield record
+
+    def get(self, timestamp: str) -> Optional[Dict[str, Any]]:
+        """Return the first record with exactly this timestamp"""
+        for record in self.iter_range(timestamp, timestamp):
+            return record
+        return None
+
+    def latest(self, count: int = 1) -> List[Dict[str, Any]]:
+        """Return the newest count records, oldest first"""
+        self.refresh()
+        if not self._entries or count <= 0:
+            return []
+        step = count // self.index_every + 2
+        entry = max(0, len(self._entries) - step)
+        while True:
+            records = deque(self._scan(entry), maxlen=count)
+            if len(records) >= count or entry == 0:
+                return list(records)
+            entry = max(0, entry - step)
+
+
+def import_legacy_files(store: SnapshotStore, directory: str = "output") -> int:
+    """Append output/user_data_*.json files newer than the store's last record"""
+    latest = store.latest(1)
+    newest = latest[0].get("timestamp", "") if latest else ""
+    imported = 0
+    for name in sorted(os.listdir(directory)):
+        timestamp = timestamp_from_name(name)
+        if not timestamp or timestamp <= newest:
+            continue
+        try:
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                store.append(json.load(f))
+            imported += 1
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[Warning] Skipping {name}: {e}")
+    return imported
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--import-legacy":
+        store = SnapshotStore()
+        count = import_legacy_files(store)
+        store.close()
+        print(f"✅ Imported {count} legacy snapshot file(s) into {store.directory}")
+    else:
+        print("Usage:")
+        print("  python snapshot_store.py --import-legacy   # Copy output/user_data_*.json into the store")
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# The scripts are flat top-level modules; make them importable from here
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory so relative "output/..." paths stay out of the repo"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "output").mkdir()
+    return tmp_path
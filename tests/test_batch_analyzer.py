@@ -0,0 +1,121 @@
+import asyncio
+import json
+import time
+
+from batch_analyzer import BatchAnalyzer, TokenBucket
+from fake_llm import FakeLLM, FakeMessage
+
+
+def snapshots(count):
+    windows = ["Visual Studio Code", "Slack", "Inbox - Outlook", "YouTube - Chrome"]
+    return [{"timestamp": f"2026-10-18_10-00-{n:02d}", "active_window": windows[n % 4], "ocr_text": ""}
+            for n in range(count)]
+
+
+def test_results_keep_input_order(tmp_path):
+    output = tmp_path / "results.jsonl"
+    seen = []
+    analyzer = BatchAnalyzer(FakeLLM(latency=0.0, jitter=0.0), concurrency=4, rate=1000, burst=1000,
+                             on_result=seen.append, output_path=str(output))
+    results = analyzer.run(snapshots(12))
+    assert [result["activity"] for result in results] == ["coding", "messaging", "emailing", "watching"] * 3
+    assert seen == results
+    assert results[5]["source_file"] == "user_data_2026-10-18_10-00-05.json"
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [line["source_file"] for line in lines] == [result["source_file"] for result in results]
+
+
+def test_packs_use_one_call_per_pack():
+    client = FakeLLM(latency=0.0)
+    analyzer = BatchAnalyzer(client, rate=1000, burst=1000, pack_size=4)
+    results = analyzer.run(snapshots(8))
+    assert client.calls == 2
+    assert [result["activity"] for result in results] == ["coding", "messaging", "emailing", "watching"] * 2
+
+
+class WrongCountLLM(FakeLLM):
+    """Answers multi-snapshot prompts with one result too few"""
+
+    def respond(self, messages):
+        message = super().respond(messages)
+        data = json.loads(message.content) if message.content.startswith("[") else None
+        if data is not None:
+            return FakeMessage(json.dumps(data[:-1]))
+        return message
+
+
+def test_bad_pack_answer_falls_back_to_single_calls():
+    client = WrongCountLLM(latency=0.0)
+    results = BatchAnalyzer(client, rate=1000, burst=1000, pack_size=3).run(snapshots(3))
+    assert client.calls == 4
+    assert [result["activity"] for result in results] == ["coding", "messaging", "emailing"]
+
+
+def test_failed_calls_are_retried():
+    client = FakeLLM(latency=0.0, failure_rate=0.5, seed=3)
+    analyzer = BatchAnalyzer(client, rate=1000, burst=1000, retries=10, base_delay=0.0)
+    results = analyzer.run(snapshots(10))
+    assert analyzer.retried_calls > 0
+    assert all(result["activity"] != "unknown" for result in results)
+
+
+def test_exhausted_retries_give_an_error_result():
+    client = FakeLLM(latency=0.0, failure_rate=1.0)
+    results = BatchAnalyzer(client, rate=1000, burst=1000, retries=1, base_delay=0.0).run(snapshots(1))
+    assert results[0]["activity"] == "unknown"
+    assert results[0]["description"].startswith("Error analyzing user data")
+    assert client.calls == 2
+
+
+def test_unparseable_answer_gives_a_parse_failure():
+    class ProseLLM(FakeLLM):
+        def respond(self, messages):
+            return FakeMessage("I cannot tell")
+
+    results = BatchAnalyzer(ProseLLM(latency=0.0), rate=1000, burst=1000).run(snapshots(1))
+    assert results[0]["description"] == "Failed to parse LLM response"
+    assert results[0]["details"] == "I cannot tell"
+
+
+def test_prefilter_skips_the_llm():
+    client = FakeLLM(latency=0.0)
+    local = {"activity": "coding", "confidence": 0.9, "source": "local"}
+    analyzer = BatchAnalyzer(client, rate=1000, burst=1000,
+                             prefilter=lambda user_data: dict(local) if "Code" in user_data["active_window"] else None)
+    results = analyzer.run(snapshots(4))
+    assert results[0]["source"] == "local"
+    assert client.calls == 3
+
+
+def test_concurrency_overlaps_calls():
+    client = FakeLLM(latency=0.1)
+    started = time.perf_counter()
+    BatchAnalyzer(client, concurrency=8, rate=1000, burst=1000).run(snapshots(8))
+    assert time.perf_counter() - started < 0.5
+
+
+def test_token_bucket_limits_the_rate():
+    async def acquire(count):
+        bucket = TokenBucket(rate=50, capacity=1)
+        for _ in range(count):
+            await bucket.acquire()
+
+    started = time.perf_counter()
+    asyncio.run(acquire(6))
+    # The first token is free, the other five arrive 20 ms apart
+    assert time.perf_counter() - started >= 0.09
+
+
+def test_client_is_only_built_when_a_request_is_sent():
+    built = []
+
+    def get_client():
+        built.append(1)
+        return FakeLLM(latency=0.0)
+
+    answered = {"activity": "coding", "confidence": 1.0}
+    results = BatchAnalyzer(rate=1000, burst=1000, prefilter=lambda user_data: dict(answered),
+                            get_client=get_client).run(snapshots(3))
+    assert [result["activity"] for result in results] == ["coding"] * 3 and built == []
+    results = BatchAnalyzer(rate=1000, burst=1000, pack_size=2, get_client=get_client).run(snapshots(4))
+    assert len(results) == 4 and built == [1]
@@ -0,0 +1,31 @@
+import numpy as np
+
+from benchmarks.run import percentiles, run
+from benchmarks.synthetic import frame_sequence
+
+
+def test_percentiles_in_milliseconds():
+    summary = percentiles([i / 1000 for i in range(1, 101)])
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 51.0 and summary["p99_ms"] == 100.0 and summary["max_ms"] == 100.0
+    assert summary["mean_ms"] == 50.5
+    assert percentiles([]) == {"count": 0}
+
+
+def test_synthetic_frames_are_deterministic_and_change_one_line():
+    first = list(frame_sequence(3, 400, 300, seed=5))
+    again = list(frame_sequence(3, 400, 300, seed=5))
+    assert all(np.array_equal(a, b) for a, b in zip(first, again))
+    assert first[0].shape == (300, 400, 4)
+    changed_rows = np.flatnonzero((first[0] != first[1]).any(axis=(1, 2)))
+    assert 0 < len(changed_rows) < 40
+
+
+def test_small_run_produces_every_section(workdir):
+    results = run(synthetic_frames=2, width=320, height=240, snapshots=4, latency=0.0)
+    assert {"preprocess", "persist", "prompt_context", "analyze_llm"} <= set(results["stages"])
+    assert results["stages"]["preprocess"]["count"] >= 2
+    assert results["bytes_per_snapshot"] > 0
+    assert results["throughput"]["batch_snapshots_per_s"] > 0
+    # Without tesseract the OCR stages are skipped, not failed
+    assert "ocr_cold" in results["stages"] or "ocr: tesseract not found" in results["skipped"]
@@ -0,0 +1,81 @@
+import os
+import time
+
+from blob_store import BLOB_REF, BlobStore, is_blob_ref
+
+
+def make_store(tmp_path, min_size=16):
+    return BlobStore(str(tmp_path / "blobs"), min_size=min_size, fields=("ocr_text", "clipboard"))
+
+
+def test_pack_and_resolve_round_trip(tmp_path):
+    blobs = make_store(tmp_path)
+    record = {"timestamp": "t", "ocr_text": "long text " * 10, "clipboard": "short", "active_window": "x" * 100}
+    packed = blobs.pack(record)
+    assert is_blob_ref(packed["ocr_text"])
+    # Short values and fields not listed stay inline
+    assert packed["clipboard"] == "short" and packed["active_window"] == "x" * 100
+    assert record["ocr_text"] == "long text " * 10
+    assert blobs.lazy(packed).to_dict() == record
+
+
+def test_unicode_survives_the_round_trip(tmp_path):
+    blobs = make_store(tmp_path)
+    text = "naïve café — 日本語 🎉 " * 5
+    assert BlobStore(blobs.directory).get(blobs.put(text)) == text
+
+
+def test_identical_values_are_stored_once(tmp_path):
+    blobs = make_store(tmp_path)
+    first = blobs.pack({"ocr_text": "same screen text"})
+    second = blobs.pack({"ocr_text": "same screen text"})
+    assert first == second
+    assert len(list((tmp_path / "blobs").rglob("*.z"))) == 1
+
+
+def test_is_blob_ref_only_matches_references():
+    assert is_blob_ref({BLOB_REF: "abc"})
+    assert not is_blob_ref({BLOB_REF: "abc", "other": 1})
+    assert not is_blob_ref("abc")
+    assert not is_blob_ref(None)
+
+
+def test_missing_blob_resolves_to_a_marker(tmp_path):
+    blobs = make_store(tmp_path)
+    assert blobs.resolve({BLOB_REF: "0" * 40}).startswith("[Missing blob:")
+    assert blobs.resolve("inline") == "inline"
+
+
+def test_lazy_snapshot_loads_fields_on_access(tmp_path):
+    blobs = make_store(tmp_path)
+    packed = blobs.pack({"timestamp": "t", "ocr_text": "screen text " * 5})
+    snapshot = BlobStore(blobs.directory).lazy(packed)
+    assert snapshot._resolved == {}
+    assert snapshot["timestamp"] == "t"
+    assert snapshot._resolved == {}
+    assert snapshot.get("ocr_text") == "screen text " * 5
+    assert set(snapshot) == {"timestamp", "ocr_text"} and len(snapshot) == 2
+    assert blobs.lazy(None).to_dict() == {}
+
+
+def test_collect_garbage_keeps_referenced_and_recent_blobs(tmp_path):
+    blobs = make_store(tmp_path)
+    kept = blobs.put("referenced blob")
+    old = blobs.put("old orphan")
+    recent = blobs.put("recent orphan")
+    past = time.time() - 1000
+    for digest in (kept, old):
+        os.utime(blobs._path(digest), (past, past))
+    assert blobs.collect_garbage({kept}, grace=100) == 1
+    assert blobs.get(kept) == "referenced blob"
+    assert blobs.get(recent) == "recent orphan"
+    assert not os.path.exists(blobs._path(old))
+
+
+def test_put_touches_a_reused_blob(tmp_path):
+    blobs = make_store(tmp_path)
+    digest = blobs.put("reused")
+    past = time.time() - 1000
+    os.utime(blobs._path(digest), (past, past))
+    blobs.put("reused")
+    assert blobs.collect_garbage(set(), grace=100) == 0
@@ -0,0 +1,161 @@
+import threading
+import time
+
+import numpy as np
+
+from capture_pipeline import AdaptiveSchedule, CapturePipeline, FixedSchedule, screen_change
+
+
+class CountedSchedule:
+    """Fires a fixed number of ticks back to back, then stops"""
+
+    def __init__(self, ticks):
+        self.ticks = ticks
+
+    def wait(self, stop):
+        if self.ticks == 0 or stop.is_set():
+            return False
+        self.ticks -= 1
+        return True
+
+
+def test_pipeline_persists_every_frame_in_order():
+    counter = iter(range(100))
+    saved = []
+
+    def collect():
+        n = next(counter)
+        return {"n": n}, f"frame {n}"
+
+    pipeline = CapturePipeline(collect, lambda frame: frame.upper(), saved.append,
+                               schedule=CountedSchedule(20), queue_size=100)
+    pipeline.start()
+    pipeline.wait()
+    assert [data["n"] for data in saved] == list(range(20))
+    assert saved[3]["ocr_text"] == "FRAME 3"
+    assert pipeline.dropped_frames == 0
+
+
+def test_failing_stages_do_not_stop_the_pipeline():
+    counter = iter(range(100))
+    saved = []
+
+    def ocr(frame):
+        if frame == 1:
+            raise RuntimeError("tesseract crashed")
+        return "text"
+
+    def persist(data):
+        if data["n"] == 2:
+            raise OSError("disk full")
+        saved.append(data)
+
+    def collect():
+        n = next(counter)
+        return {"n": n}, n
+
+    pipeline = CapturePipeline(collect, ocr, persist, schedule=CountedSchedule(4), queue_size=10)
+    pipeline.start()
+    pipeline.wait()
+    assert [data["n"] for data in saved] == [0, 1, 3]
+    assert "ocr_text" not in saved[1]
+
+
+def test_coalesce_keeps_the_newest_frames():
+    pipeline = CapturePipeline(None, None, None, queue_size=2, backpressure="coalesce")
+    for n in range(5):
+        pipeline._offer(n)
+    assert [pipeline.ocr_queue.get_nowait() for _ in range(2)] == [3, 4]
+    assert pipeline.dropped_frames == 3
+
+
+def test_drop_keeps_the_oldest_frames():
+    pipeline = CapturePipeline(None, None, None, queue_size=2, backpressure="drop")
+    for n in range(5):
+        pipeline._offer(n)
+    assert [pipeline.ocr_queue.get_nowait() for _ in range(2)] == [0, 1]
+    assert pipeline.dropped_frames == 3
+
+
+def test_fixed_schedule_skips_missed_ticks():
+    schedule = FixedSchedule(interval=0.01)
+    stop = threading.Event()
+    assert schedule.wait(stop)
+    time.sleep(0.055)
+    assert schedule.wait(stop)
+    assert schedule.skipped >= 4
+    stop.set()
+    assert not schedule.wait(stop)
+
+
+class Signals:
+    """Scripted window/clipboard and screen thumbnail for AdaptiveSchedule"""
+
+    def __init__(self):
+        self.window = "editor"
+        self.clipboard = ""
+        self.thumbnail = np.zeros((40, 64), dtype=np.uint8)
+        self.screen_calls = 0
+
+    def signals(self):
+        return self.window, self.clipboard
+
+    def screen(self):
+        self.screen_calls += 1
+        return self.thumbnail.copy()
+
+
+def test_screen_change_is_the_changed_pixel_share():
+    before = np.zeros((10, 10), dtype=np.uint8)
+    after = before.copy()
+    after[:2] = 200
+    after[2, 0] = 5
+    assert screen_change(before, after) == 0.2
+
+
+def test_adaptive_schedule_fires_on_window_change_and_backs_off():
+    scripted = Signals()
+    schedule = AdaptiveSchedule(scripted.signals, scripted.screen, min_interval=0.02, max_interval=0.08,
+                                poll_interval=0.005, backoff=2.0, screen_interval=0.0)
+    stop = threading.Event()
+    assert schedule.wait(stop) and schedule.last_reason == "start"
+    assert schedule.wait(stop) and schedule.last_reason == "timeout"
+    assert schedule.interval == 0.04
+    assert schedule.wait(stop) and schedule.interval == 0.08
+    assert schedule.wait(stop) and schedule.interval == 0.08
+    scripted.window = "browser"
+    assert schedule.wait(stop) and schedule.last_reason == "window"
+    assert schedule.interval == 0.02
+
+
+def test_adaptive_schedule_fires_on_clipboard_and_screen_changes():
+    scripted = Signals()
+    schedule = AdaptiveSchedule(scripted.signals, scripted.screen, min_interval=0.0, max_interval=10.0,
+                                poll_interval=0.005, screen_interval=0.0)
+    stop = threading.Event()
+    schedule.wait(stop)
+    scripted.clipboard = "copied"
+    assert schedule.wait(stop) and schedule.last_reason == "clipboard"
+    scripted.thumbnail[:] = 255
+    assert schedule.wait(stop) and schedule.last_reason == "screen"
+
+
+def test_adaptive_schedule_polls_the_screen_less_often():
+    scripted = Signals()
+    schedule = AdaptiveSchedule(scripted.signals, scripted.screen, min_interval=0.0, max_interval=0.2,
+                                poll_interval=0.005, screen_interval=10.0)
+    stop = threading.Event()
+    schedule.wait(stop)
+    scripted.thumbnail[:] = 255
+    assert schedule.wait(stop) and schedule.last_reason == "timeout"
+    assert scripted.screen_calls == 1
+
+
+def test_adaptive_schedule_survives_a_failing_probe():
+    def broken():
+        raise RuntimeError("probe died")
+
+    schedule = AdaptiveSchedule(broken, min_interval=0.0, max_interval=0.02, poll_interval=0.005)
+    stop = threading.Event()
+    assert schedule.wait(stop)
+    assert schedule.wait(stop) and schedule.last_reason == "timeout"
@@ -0,0 +1,88 @@
+from delta_prompt import DeltaPrompter
+from llm_prompts import DELTA_SYSTEM_PROMPT, SYSTEM_PROMPT
+
+RESULT = {"activity": "coding", "confidence": 0.9, "description": "Editing the parser"}
+
+
+def snapshot(lines, window="parser.py - Visual Studio Code", clipboard=""):
+    return {"timestamp": "2026-10-18_10-00-00", "active_window": window, "focused_text": "",
+            "clipboard": clipboard, "ocr_text": "\n".join(lines)}
+
+
+def code(count, start=0):
+    return [f"    value_{n} = compute_something(argument_{n}, option={n})" for n in range(start, start + count)]
+
+
+def committed(prompter=None, data=None):
+    prompter = prompter or DeltaPrompter(keyframe_every=10, max_change=0.5, budget=400)
+    data = data or snapshot(code(40))
+    prompter.commit(data, RESULT, prompter.prompt(data))
+    return prompter
+
+
+def test_first_prompt_is_a_full_keyframe():
+    prompt = DeltaPrompter().prompt(snapshot(code(5)))
+    assert prompt.keyframe and prompt.reason == "start" and prompt.system == SYSTEM_PROMPT
+    assert "value_4" in prompt.human
+
+
+def test_small_change_is_sent_as_a_delta():
+    prompter = committed()
+    prompt = prompter.prompt(snapshot(code(40) + ["    return value_39"], clipboard="copied text"))
+    assert not prompt.keyframe and prompt.reason == "delta" and prompt.system == DELTA_SYSTEM_PROMPT
+    assert "Previous classification: coding (confidence 0.9): Editing the parser" in prompt.human
+    assert "Active Window: unchanged" in prompt.human
+    assert "Clipboard changed: yes ('copied text')" in prompt.human
+    assert "Screen OCR, new lines:\nreturn value_39\n" in prompt.human
+    assert "value_0 " not in prompt.human
+    assert prompt.tokens < DeltaPrompter().prompt(snapshot(code(40))).tokens
+
+
+def test_removed_lines_and_window_change_are_reported():
+    prompter = committed()
+    prompt = prompter.prompt(snapshot(code(39), window="Terminal"))
+    assert "Active Window: changed to 'Terminal'" in prompt.human
+    assert "Screen OCR, lines gone:\nvalue_39 = " in prompt.human
+    assert "Clipboard changed: no" in prompt.human
+
+
+def test_identical_snapshot_is_all_unchanged():
+    prompter = committed()
+    prompt = prompter.prompt(snapshot(code(40)))
+    assert not prompt.keyframe and "Screen OCR: unchanged" in prompt.human
+
+
+def test_large_change_sends_a_keyframe():
+    prompter = committed()
+    assert prompter.prompt(snapshot(code(40, start=100))).reason == "large change"
+
+
+def test_periodic_keyframe_after_keyframe_every_deltas():
+    prompter = committed(DeltaPrompter(keyframe_every=2, max_change=0.5, budget=400))
+    for extra in range(2):
+        data = snapshot(code(40 + extra + 1))
+        prompt = prompter.prompt(data)
+        assert prompt.reason == "delta"
+        prompter.commit(data, RESULT, prompt)
+    prompt = prompter.prompt(snapshot(code(43)))
+    assert prompt.reason == "periodic"
+    prompter.commit(snapshot(code(43)), RESULT, prompt)
+    assert (prompter.keyframes, prompter.deltas) == (2, 2)
+    assert prompter.prompt(snapshot(code(44))).reason == "delta"
+
+
+def test_keyframe_when_the_diff_is_not_smaller():
+    prompter = DeltaPrompter(keyframe_every=10, max_change=1.0, budget=400)
+    data = snapshot(["short screen"])
+    prompter.commit(data, dict(RESULT, description="long explanation " * 300), prompter.prompt(data))
+    assert prompter.prompt(snapshot(["short screen", "one more line"])).reason == "diff not smaller"
+
+
+def test_reset_and_commit_without_prompt():
+    prompter = committed()
+    prompter.reset()
+    assert prompter.prompt(snapshot(code(40))).reason == "start"
+    # A commit without a prompt sets the base but counts nothing
+    prompter.commit(snapshot(code(40)), RESULT)
+    assert (prompter.keyframes, prompter.deltas) == (1, 0)
+    assert prompter.prompt(snapshot(code(41))).reason == "delta"
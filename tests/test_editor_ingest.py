@@ -0,0 +1,118 @@
+import os
+import random
+
+import editor_ingest
+from blob_store import BlobStore
+from editor_ingest import (MISSING_TEXT, EditorDeltaEncoder, EditorTextResolver, EditorTextSource, apply_diff,
+                           is_delta_ref, line_diff)
+from snapshot_store import SnapshotStore
+
+
+def ts(n):
+    return f"2026-10-18_10-{n // 60:02d}-{n % 60:02d}"
+
+
+def edited_versions(count, seed=1):
+    """A 200-line file edited a little between snapshots"""
+    rng = random.Random(seed)
+    lines = [f"line {n} = compute(value_{n})" for n in range(200)]
+    versions = []
+    for _ in range(count):
+        position = rng.randrange(len(lines))
+        action = rng.choice(["edit", "insert", "delete"])
+        if action == "edit":
+            lines[position] += "  # changed"
+        elif action == "insert":
+            lines.insert(position, f"new line {rng.random()}")
+        elif len(lines) > 1:
+            del lines[position]
+        versions.append("\n".join(lines))
+    return versions
+
+
+def test_line_diff_round_trip():
+    rng = random.Random(0)
+    for _ in range(50):
+        old = [rng.choice("abcde") for _ in range(rng.randrange(0, 20))]
+        new = [rng.choice("abcde") for _ in range(rng.randrange(0, 20))]
+        assert apply_diff(old, line_diff(old, new)) == new
+
+
+def test_delta_snapshots_rebuild_the_exact_text(tmp_path):
+    store = SnapshotStore(str(tmp_path / "store"))
+    blobs = BlobStore(str(tmp_path / "blobs"), min_size=512)
+    encoder = EditorDeltaEncoder(keyframe_every=5)
+    versions = edited_versions(30)
+    for n, text in enumerate(versions):
+        store.append(blobs.pack(encoder.encode({"timestamp": ts(n), "vscode_text": text})))
+    records = list(store)
+    assert sum(is_delta_ref(record["vscode_text"]) for record in records) > 20
+    # A fresh resolver, reading in arbitrary order, rebuilds every version
+    resolver = EditorTextResolver(store, blobs, cache_size=4)
+    for n in [29, 3, 17, 0, 18, 12]:
+        assert resolver.text(records[n]) == versions[n]
+    assert [blobs.lazy(record, resolver)["vscode_text"] for record in records] == versions
+
+
+def test_keyframe_every_bounds_the_delta_chain():
+    encoder = EditorDeltaEncoder(keyframe_every=3)
+    kinds = [is_delta_ref(encoder.encode({"timestamp": ts(n), "vscode_text": text})["vscode_text"])
+             for n, text in enumerate(edited_versions(8))]
+    assert kinds == [False, True, True, True, False, True, True, True]
+
+
+def test_unrelated_text_is_stored_whole():
+    encoder = EditorDeltaEncoder()
+    encoder.encode({"timestamp": ts(0), "vscode_text": "\n".join(f"alpha {n}" for n in range(50))})
+    record = encoder.encode({"timestamp": ts(1), "vscode_text": "\n".join(f"beta {n}" for n in range(50))})
+    assert isinstance(record["vscode_text"], str)
+
+
+def test_records_without_editor_text_pass_through():
+    record = {"timestamp": ts(0)}
+    assert EditorDeltaEncoder().encode(record) is record
+
+
+def test_delta_without_its_keyframe_is_reported(tmp_path):
+    store = SnapshotStore(str(tmp_path / "store"))
+    orphan = {"timestamp": ts(5), "vscode_text": {"$delta": {"key": ts(1), "ops": []}}}
+    store.append(orphan)
+    resolver = EditorTextResolver(store, BlobStore(str(tmp_path / "blobs")))
+    assert resolver.text(orphan) == "[Missing editor keyframe]"
+
+
+def test_source_only_rereads_a_changed_file(tmp_path):
+    path = tmp_path / "vscode_live_text.txt"
+    source = EditorTextSource(str(path), mmap_bytes=1 << 20)
+    assert source.read() == MISSING_TEXT
+    path.write_text("first version\n")
+    assert source.read() == "first version"
+    assert source.read() == "first version"
+    assert (source.reads, source.skips) == (1, 1)
+    path.write_text("second version, longer\n")
+    assert source.read() == "second version, longer"
+
+
+def test_source_survives_truncation_after_the_stat(tmp_path, monkeypatch):
+    path = tmp_path / "vscode_live_text.txt"
+    path.write_text("x" * 100)
+    stale = os.stat(path)
+    path.write_text("")
+    # The editor emptied the file between os.stat and the memory map
+    real_stat = os.stat
+    monkeypatch.setattr(editor_ingest.os, "stat",
+                        lambda name, **kwargs: stale if name == str(path) else real_stat(name, **kwargs))
+    source = EditorTextSource(str(path), mmap_bytes=10)
+    assert source.read() == ""
+
+
+def test_source_hashes_large_files_through_mmap(tmp_path):
+    path = tmp_path / "vscode_live_text.txt"
+    path.write_text("x" * 100)
+    source = EditorTextSource(str(path), mmap_bytes=10)
+    assert source.read() == "x" * 100
+    # Same content rewritten: the mtime moves, the digest does not
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert source.read() == "x" * 100
+    assert source.reads == 2
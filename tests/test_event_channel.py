@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+
+import pytest
+
+from event_channel import CHANNEL_AVAILABLE, EventBroker, EventPublisher, _encode, subscribe, write_json_atomic
+
+needs_unix_sockets = pytest.mark.skipif(not CHANNEL_AVAILABLE, reason="Unix-domain sockets not available")
+
+
+@pytest.fixture
+def socket_path():
+    # AF_UNIX paths are limited to about 100 characters, so not under tmp_path
+    directory = tempfile.mkdtemp(prefix="evt", dir="/tmp")
+    yield os.path.join(directory, "events.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def raw_subscriber(path, topics):
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(path)
+    conn.sendall(_encode({"subscribe": topics}))
+    conn.settimeout(2.0)
+    return conn, conn.makefile("rb")
+
+
+def test_write_json_atomic_replaces_the_file(tmp_path):
+    path = str(tmp_path / "live.json")
+    write_json_atomic(path, {"a": 1})
+    write_json_atomic(path, {"b": 2}, indent=2)
+    assert json.loads(open(path).read()) == {"b": 2}
+    assert os.listdir(tmp_path) == ["live.json"]
+
+
+@needs_unix_sockets
+def test_events_reach_subscribers_of_their_topic(socket_path):
+    assert EventBroker(socket_path).start()
+    conn, reader = raw_subscriber(socket_path, ["prediction"])
+    time.sleep(0.1)
+    publisher = EventPublisher(socket_path, host_broker=False)
+    assert publisher.publish("snapshot", {"n": 1})
+    assert publisher.publish("prediction", {"activity": "coding"})
+    assert json.loads(reader.readline()) == {"topic": "prediction", "data": {"activity": "coding"}}
+    conn.close()
+
+
+@needs_unix_sockets
+def test_late_subscriber_gets_the_retained_event(socket_path):
+    EventBroker(socket_path).start()
+    publisher = EventPublisher(socket_path, host_broker=False)
+    publisher.publish("prediction", {"activity": "old"})
+    publisher.publish("prediction", {"activity": "new"})
+    time.sleep(0.1)
+    conn, reader = raw_subscriber(socket_path, ["prediction"])
+    assert json.loads(reader.readline())["data"] == {"activity": "new"}
+    conn.close()
+
+
+@needs_unix_sockets
+def test_slow_subscriber_does_not_block_the_publisher(socket_path):
+    EventBroker(socket_path).start()
+    conn, reader = raw_subscriber(socket_path, ["snapshot"])
+    time.sleep(0.1)
+    publisher = EventPublisher(socket_path, host_broker=False)
+    started = time.perf_counter()
+    # Far more than a socket buffer holds while nobody reads
+    for n in range(300):
+        assert publisher.publish("snapshot", {"n": n, "text": "x" * 50000})
+    assert time.perf_counter() - started < 5.0
+    time.sleep(0.3)
+    received = []
+    conn.settimeout(0.5)
+    try:
+        for line in reader:
+            received.append(json.loads(line)["data"]["n"])
+    except OSError:
+        pass
+    # Stale snapshots are coalesced away, the newest one always arrives
+    assert received[-1] == 299
+    assert received == sorted(received) and len(received) < 300
+    conn.close()
+
+
+@needs_unix_sockets
+def test_second_broker_does_not_steal_the_socket(socket_path):
+    assert EventBroker(socket_path).start()
+    assert not EventBroker(socket_path).start()
+
+
+@needs_unix_sockets
+def test_stale_socket_file_is_replaced(socket_path):
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    assert EventBroker(socket_path).start()
+
+
+def test_publish_without_broker_is_dropped(socket_path):
+    assert not EventPublisher(socket_path, host_broker=False).publish("snapshot", {})
+
+
+def test_subscribe_without_broker_yields_none(socket_path):
+    events = subscribe(["snapshot"], socket_path, idle_timeout=0.01, host_broker=False)
+    assert next(events) is None
+
+
+@needs_unix_sockets
+def test_subscribe_hosts_a_broker_and_receives_events(socket_path):
+    events = subscribe(["snapshot"], socket_path, idle_timeout=0.2)
+    assert next(events) is None
+    EventPublisher(socket_path, host_broker=False).publish("snapshot", {"n": 7})
+    assert next(event for event in events if event is not None) == ("snapshot", {"n": 7})
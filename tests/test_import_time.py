@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks import import_time
+
+HEAVY_MODULES = ("langchain_core", "langchain_google_genai", "google.generativeai", "pytesseract", "PIL")
+
+
+@pytest.mark.parametrize("module", sorted(import_time.BUDGETS_MS))
+def test_entry_points_import_without_heavy_dependencies(module):
+    env = dict(os.environ)
+    env.pop("GOOGLE_API_KEY", None)
+    code = f"import sys, {module}; print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=import_time.REPO_DIR, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1:] in ([], [""])
+
+
+def test_measure_reports_the_module_and_its_children():
+    total, children = import_time.measure("json")
+    assert total > 0
+    assert children and all(name.startswith("json.") and cumulative <= total for cumulative, name in children)
+    with pytest.raises(RuntimeError):
+        import_time.measure("no_such_module_here")
+
+
+def test_check_compares_the_median_against_the_budget(monkeypatch, capsys):
+    samples = {"fast": [(10.0, []), (12.0, []), (500.0, [])],
+               "slow": [(90.0, []), (300.0, []), (250.0, [(240.0, "slow_dependency")])]}
+    calls = {}
+
+    def measure(module):
+        calls[module] = calls.get(module, -1) + 1
+        return samples[module][calls[module]]
+
+    monkeypatch.setattr(import_time, "measure", measure)
+    # One outlier run does not fail the budget; a slow median does
+    assert import_time.check({"fast": 100}, runs=3)
+    assert not import_time.check({"slow": 100}, runs=3)
+    assert "slow_dependency" in capsys.readouterr().out
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from activity_analyzer import stream_llm_response
+from fake_llm import FakeLLM, FakeMessage
+from json_stream import IncrementalJSONParser, parse_json_text
+from llm_prompts import parse_llm_response
+
+RESULT = {"activity": "coding", "confidence": 0.9, "description": "Editing {braces} and \"quotes\" \\ [x]",
+          "details": {"files": ["a.py", "b.py"]}, "data_sources": "OCR"}
+
+
+def feed_in_chunks(text, size, openers="{["):
+    parser = IncrementalJSONParser(openers)
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return parser, completed
+
+
+@pytest.mark.parametrize("size", [1, 3, 16, 1000])
+def test_chunked_feed_round_trips(size):
+    text = "Here you go:\n```json\n" + json.dumps(RESULT, indent=2) + "\n```\nHope that helps."
+    parser, completed = feed_in_chunks(text, size)
+    assert parser.done and parser.value == RESULT
+    # Members are reported once each, in order
+    assert completed == list(RESULT.items())
+
+
+def test_members_complete_before_the_rest_arrives():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"activity": "email", "confidence": 0.') == [("activity", "email")]
+    assert parser.fields == {"activity": "email"} and not parser.done
+    assert parser.feed('7, "description": "x"}') == [("confidence", 0.7), ("description", "x")]
+    assert parser.done
+
+
+def test_prose_brackets_are_skipped_for_objects():
+    text = 'See [1] and [the docs] first.\n{"activity": "reading", "confidence": 0.5}'
+    assert parse_llm_response(text) == {"activity": "reading", "confidence": 0.5}
+    assert parse_json_text(text, "{[") == [1]
+    with pytest.raises(json.JSONDecodeError):
+        parse_llm_response("Options: [1, 2, 3]")
+
+
+def test_arrays_and_trailing_commas():
+    text = 'Results:\n[{"activity": "coding"}, {"activity": "email"},]\nDone.'
+    assert parse_llm_response(text, "[") == [{"activity": "coding"}, {"activity": "email"}]
+    assert parse_json_text('{"a": 1, "b": [1, 2],}') == {"a": 1, "b": [1, 2]}
+    # Only a top-level trailing comma is tolerated
+    with pytest.raises(json.JSONDecodeError):
+        parse_llm_response('{"a": 1, "b": [1, 2,]}')
+    assert parse_json_text("[]") == [] and parse_json_text("{}") == {}
+
+
+def test_invalid_candidates_are_skipped():
+    text = 'Use {placeholder} or {"a": nope} -- answer: {"activity": "chat", "confidence": 1}'
+    assert parse_json_text(text) == {"activity": "chat", "confidence": 1}
+    parser, _ = feed_in_chunks(text, 5)
+    assert parser.value == {"activity": "chat", "confidence": 1}
+
+
+def test_incomplete_json_raises():
+    for text in ("", "no json here", '{"activity": "coding", "confidence"', '"{"'):
+        with pytest.raises(json.JSONDecodeError):
+            parse_json_text(text)
+
+
+def test_text_after_the_value_is_ignored():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1} trailing {"b": 2}')
+    assert parser.done and parser.value == {"a": 1}
+    assert parser.feed(' more') == []
+
+
+class ScriptedLLM:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+
+    def stream(self, messages):
+        for chunk in self.chunks:
+            self.read += 1
+            yield FakeMessage(chunk)
+
+
+def test_stream_publishes_partial_fields_and_stops_at_the_end():
+    partials = []
+    llm = ScriptedLLM(["See [1].\n", '{"activity": "coding", ', '"confidence": 0.8, ', '"description": "d"}',
+                       " and some prose", " that is never read"])
+    text, value = stream_llm_response(llm, [], partials.append)
+    assert value == {"activity": "coding", "confidence": 0.8, "description": "d"}
+    assert llm.read == 4 and text.endswith("}")
+    assert len(partials) == 1 and partials[0]["partial"] and partials[0]["confidence"] == 0.8
+
+
+def test_stream_from_the_fake_model():
+    llm = FakeLLM(latency=0.0, chunk_chars=7)
+    text, value = stream_llm_response(llm, [FakeMessage("def main(): import os")], lambda partial: None)
+    assert value["activity"] == "coding" and text.startswith("```json")
+    assert stream_llm_response(ScriptedLLM(["no json"]), [], lambda partial: None) == ("no json", None)
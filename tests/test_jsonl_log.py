@@ -0,0 +1,66 @@
+import json
+import threading
+
+import jsonl_log
+from jsonl_log import JsonlLog
+
+
+def test_entries_are_written_in_order(tmp_path):
+    log = JsonlLog(str(tmp_path / "logs" / "clicks.jsonl"), flush_interval=0.01)
+    for n in range(50):
+        log.append({"n": n, "text": "ünïcode"})
+    log.flush()
+    lines = (tmp_path / "logs" / "clicks.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["n"] for line in lines] == list(range(50))
+    assert json.loads(lines[0])["text"] == "ünïcode"
+    log.close()
+
+
+def test_concurrent_appends_are_all_written(tmp_path):
+    log = JsonlLog(str(tmp_path / "clicks.jsonl"), flush_interval=0.01)
+    threads = [threading.Thread(target=lambda t=t: [log.append({"t": t, "n": n}) for n in range(100)])
+               for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log.close()
+    assert len(log.tail(1000)) == 400
+
+
+def test_rotation_keeps_the_configured_backups(tmp_path):
+    log = JsonlLog(str(tmp_path / "clicks.jsonl"), max_bytes=200, backups=2, flush_interval=0.0)
+    for n in range(40):
+        log.append({"n": n, "pad": "x" * 20})
+        log.flush()
+    log.close()
+    assert log.files() == [str(tmp_path / f) for f in ("clicks.jsonl", "clicks.jsonl.1", "clicks.jsonl.2")]
+    assert not (tmp_path / "clicks.jsonl.3").exists()
+    # The newest entries survive rotation, oldest first
+    tail = [entry["n"] for entry in log.tail(5)]
+    assert tail == list(range(35, 40))
+
+
+def test_tail_reads_across_rotated_files(tmp_path):
+    path = tmp_path / "clicks.jsonl"
+    (tmp_path / "clicks.jsonl.1").write_text("".join(json.dumps({"n": n}) + "\n" for n in range(5)))
+    path.write_text("".join(json.dumps({"n": n}) + "\n" for n in range(5, 7)))
+    log = JsonlLog(str(path), backups=1)
+    assert [entry["n"] for entry in log.tail(4)] == [3, 4, 5, 6]
+    assert log.tail(0) == []
+    assert [entry["n"] for entry in log.tail(100)] == list(range(7))
+
+
+def test_tail_skips_a_record_cut_by_the_block_boundary(tmp_path, monkeypatch):
+    monkeypatch.setattr(jsonl_log, "TAIL_BLOCK_SIZE", 16)
+    path = tmp_path / "clicks.jsonl"
+    path.write_text("".join(json.dumps({"n": n, "pad": "y" * 30}) + "\n" for n in range(10)) + "{broken\n")
+    log = JsonlLog(str(path), backups=0)
+    assert [entry["n"] for entry in log.tail(3)] == [8, 9]
+
+
+def test_empty_log(tmp_path):
+    log = JsonlLog(str(tmp_path / "none.jsonl"))
+    assert log.files() == [] and log.tail(5) == []
+    log.flush()
+    log.close()
@@ -0,0 +1,89 @@
+import pytest
+
+from blob_store import BlobStore
+from local_classifier import LocalClassifier, TfidfModel, app_name, training_examples
+
+CODING = ["def parse(self): return json loads buffer", "import numpy array shape dtype function",
+          "class Parser def feed return self buffer", "pytest assert function return value import"]
+EMAIL = ["inbox reply forward subject meeting invite", "dear team please find attached report regards",
+         "subject invoice reply forward inbox regards", "unread inbox subject attached please reply"]
+
+
+@pytest.fixture
+def classifier(tmp_path):
+    model = TfidfModel.train([(text, "coding") for text in CODING] + [(text, "emailing") for text in EMAIL])
+    model.save(str(tmp_path / "model.json"))
+    return LocalClassifier(str(tmp_path / "model.json"), threshold=0.6)
+
+
+@pytest.mark.parametrize("title, app", [
+    ("main.py - project - Visual Studio Code", "Visual Studio Code"),
+    ("CSS cursor property - MDN Web Docs — Mozilla Firefox", "Mozilla Firefox"),
+    ("Slack", "Slack"),
+    ("", ""),
+])
+def test_app_name_is_the_last_title_part(title, app):
+    assert app_name(title) == app
+
+
+@pytest.mark.parametrize("title, activity", [
+    ("main.py - project - Visual Studio Code", "coding"),
+    ("Code", "coding"),
+    ("Slack", "messaging"),
+    ("Inbox - me@example.com - Microsoft Outlook", "emailing"),
+    ("Untitled - Figma", "designing"),
+])
+def test_window_rules_match_the_app(tmp_path, title, activity):
+    result = LocalClassifier(str(tmp_path / "none.json")).classify(title, "")
+    assert result["activity"] == activity and result["source"] == "local"
+
+
+@pytest.mark.parametrize("title", [
+    "Signal processing - Wikipedia - Google Chrome",
+    "Vimeo - Mozilla Firefox",
+    "Apache Spark docs - Chrome",
+    "CSS cursor property - MDN",
+    "Codecademy - Safari",
+])
+def test_page_titles_do_not_trigger_window_rules(tmp_path, title):
+    classifier = LocalClassifier(str(tmp_path / "none.json"))
+    assert classifier.classify(title, "") is None
+    assert classifier.escalations == 1
+
+
+def test_model_answers_confident_snapshots(classifier):
+    result = classifier.classify("Google Chrome", "reply to the inbox subject with the attached report")
+    assert result["activity"] == "emailing"
+    assert 0.6 <= result["confidence"] <= 1.0
+    assert classifier.hit_rate == 1.0
+
+
+def test_model_escalates_unfamiliar_snapshots(classifier):
+    assert classifier.classify("Google Chrome", "weather forecast tomorrow sunny") is None
+
+
+def test_training_needs_two_activities_with_enough_examples():
+    assert TfidfModel.train([(text, "coding") for text in CODING]) is None
+    assert TfidfModel.train([(text, "coding") for text in CODING] + [(EMAIL[0], "emailing")]) is None
+
+
+def test_model_save_load_round_trip(tmp_path):
+    model = TfidfModel.train([(text, "coding") for text in CODING] + [(text, "emailing") for text in EMAIL])
+    model.save(str(tmp_path / "model.json"))
+    loaded = TfidfModel.load(str(tmp_path / "model.json"))
+    assert loaded.predict(CODING[0]) == model.predict(CODING[0])
+    assert TfidfModel.load(str(tmp_path / "missing.json")) is None
+
+
+def test_training_examples_skip_local_cached_and_unsure_predictions(tmp_path):
+    snapshots = {"t1": {"active_window": "Editor", "ocr_text": "code"}, "t2": {"active_window": "Mail"}}
+    predictions = [
+        {"timestamp": "t1", "prediction": {"activity": "coding", "confidence": 0.9}},
+        {"timestamp": "t2", "prediction": {"activity": "emailing", "confidence": 0.9, "source": "local"}},
+        {"timestamp": "t2", "prediction": {"activity": "emailing", "confidence": 0.9, "cached": True}},
+        {"timestamp": "t2", "prediction": {"activity": "emailing", "confidence": 0.3}},
+        {"timestamp": "t2", "prediction": {"activity": "unknown", "confidence": 0.9}},
+        {"timestamp": "t3", "prediction": {"activity": "coding", "confidence": 0.9}},
+    ]
+    examples = list(training_examples(predictions, snapshots, BlobStore(str(tmp_path))))
+    assert examples == [("Editor\n\ncode", "coding")]
@@ -0,0 +1,108 @@
+import json
+import math
+
+import metrics
+from metrics import Gauge, Histogram, MetricsExporter, Registry
+
+
+def test_counter_and_gauge_values():
+    registry = Registry()
+    registry.counter("frames_total").inc()
+    registry.counter("frames_total").inc(2)
+    registry.gauge("queue_depth").set(7)
+    assert registry.counter("frames_total").value == 3
+    assert registry.gauge("queue_depth").value == 7
+
+
+def test_labels_select_separate_children_in_any_order():
+    registry = Registry()
+    registry.counter("calls", labels={"kind": "ocr", "mode": "tile"}).inc()
+    registry.counter("calls", labels={"mode": "tile", "kind": "ocr"}).inc()
+    registry.counter("calls", labels={"kind": "llm"}).inc()
+    assert registry.summary() == {'calls{kind="llm"}': 1, 'calls{kind="ocr",mode="tile"}': 2}
+
+
+def test_gauge_callback_failure_reads_as_nan():
+    assert Gauge(lambda: 4).value == 4.0
+    assert math.isnan(Gauge(lambda: 1 / 0).value)
+
+
+def test_render_writes_nan_and_infinities():
+    registry = Registry()
+    registry.gauge("broken", function=lambda: 1 / 0)
+    registry.gauge("high").set(float("inf"))
+    registry.gauge("low").set(float("-inf"))
+    lines = registry.render().splitlines()
+    assert "broken NaN" in lines and "high +Inf" in lines and "low -Inf" in lines
+
+
+def test_histogram_quantiles_interpolate_inside_buckets():
+    histogram = Histogram((1, 2, 4))
+    assert histogram.quantile(0.5) == 0.0
+    for value in (0.5, 1.5, 1.5, 3):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2, 1, 0]
+    assert histogram.count == 4 and histogram.sum == 6.5
+    assert histogram.quantile(0.5) == 1.5
+    assert histogram.quantile(1.0) == 4
+
+
+def test_histogram_overflow_is_capped_at_the_last_bound():
+    histogram = Histogram((1, 2, 4))
+    histogram.observe(100)
+    assert histogram.counts == [0, 0, 0, 1]
+    assert histogram.quantile(0.99) == 4
+
+
+def test_render_is_prometheus_text():
+    registry = Registry()
+    registry.counter("frames_total", "Frames captured").inc(3)
+    histogram = registry.histogram("ocr_seconds", labels={"stage": "ocr"}, buckets=(0.5, 1))
+    histogram.observe(0.25)
+    histogram.observe(2)
+    assert registry.render().splitlines() == [
+        "# HELP frames_total Frames captured",
+        "# TYPE frames_total counter",
+        "frames_total 3",
+        "# TYPE ocr_seconds histogram",
+        'ocr_seconds_bucket{stage="ocr",le="0.5"} 1',
+        'ocr_seconds_bucket{stage="ocr",le="1"} 1',
+        'ocr_seconds_bucket{stage="ocr",le="+Inf"} 2',
+        'ocr_seconds_sum{stage="ocr"} 2.25',
+        'ocr_seconds_count{stage="ocr"} 2',
+    ]
+
+
+def test_summary_of_an_empty_histogram():
+    registry = Registry()
+    registry.histogram("idle_seconds")
+    assert registry.summary() == {"idle_seconds": {"count": 0, "mean": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0}}
+
+
+def test_span_and_timed_record_into_stage_seconds():
+    with metrics.span("test_span_stage"):
+        pass
+
+    @metrics.timed("test_timed_stage")
+    def failing():
+        raise RuntimeError("boom")
+
+    try:
+        failing()
+    except RuntimeError:
+        pass
+    summary = metrics.REGISTRY.summary()
+    assert summary['buddy_stage_seconds{stage="test_span_stage"}']["count"] == 1
+    # A stage that raises is still timed
+    assert summary['buddy_stage_seconds{stage="test_timed_stage"}']["count"] == 1
+    assert failing.__name__ == "failing"
+
+
+def test_exporter_flushes_a_summary_on_stop(tmp_path):
+    metrics.counter("test_exporter_total").inc()
+    exporter = MetricsExporter("test", port=0, interval=0, path=str(tmp_path / "metrics.jsonl")).start()
+    exporter.stop()
+    lines = (tmp_path / "metrics.jsonl").read_text(encoding="utf-8").splitlines()
+    entry = json.loads(lines[-1])
+    assert entry["process"] == "test"
+    assert entry["metrics"]["buddy_test_exporter_total"] == 1
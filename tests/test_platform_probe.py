@@ -0,0 +1,110 @@
+import os
+import stat
+import sys
+import textwrap
+
+import pytest
+
+from platform_probe import NO_FOCUSED_TEXT, FakeProbe, MacProbe, Probe, X11Probe, create_probe
+
+
+def test_fake_probe_reports_clipboard_changes():
+    probe = FakeProbe("Editor", "text", "one", window_bounds=(0, 0, 100, 100))
+    first = probe.probe()
+    assert (first.window_title, first.clipboard, first.clipboard_changed) == ("Editor", "one", True)
+    assert first.window_bounds == (0, 0, 100, 100)
+    assert not probe.probe().clipboard_changed
+    probe.clipboard = "two"
+    assert probe.probe().clipboard_changed
+    assert probe.calls == 3
+
+
+def test_create_probe_backends():
+    assert isinstance(create_probe("fake"), FakeProbe)
+    with pytest.raises(ValueError):
+        create_probe("amiga")
+
+
+@pytest.fixture
+def fake_osascript(tmp_path, monkeypatch):
+    """An osascript stand-in speaking the probe protocol; sends the clipboard on every other answer"""
+    script = tmp_path / "osascript"
+    script.write_text(textwrap.dedent(f"""\
+        #!{sys.executable}
+        import json, sys
+        for count, line in enumerate(sys.stdin):
+            if count == 2:
+                sys.exit(0)
+            answer = {{"window": "Code", "focused": "", "bounds": [1, 2, 300, 400]}}
+            if count % 2 == 0:
+                answer["clipboard"] = f"clip {{count}}"
+            print(json.dumps(answer), flush=True)
+        """))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs select() on pipes")
+def test_mac_probe_keeps_one_helper_and_caches_the_clipboard(fake_osascript):
+    probe = MacProbe(timeout=5.0)
+    first = probe.probe()
+    assert (first.window_title, first.focused_text, first.clipboard) == ("Code", NO_FOCUSED_TEXT, "clip 0")
+    assert first.clipboard_changed and first.window_bounds == (1, 2, 300, 400)
+    second = probe.probe()
+    assert second.clipboard == "clip 0" and not second.clipboard_changed
+    # The helper exits on the third request; the probe reports it and restarts it next time
+    assert probe.probe().window_title.startswith("Error (Mac)")
+    assert probe.probe().clipboard == "clip 0"
+    probe.close()
+
+
+class FakeEvent:
+    def __init__(self, type, sub_code):
+        self.type = type
+        self.sub_code = sub_code
+
+
+class FakeDisplay:
+    class extension_event:
+        SetSelectionOwnerNotify = (87, 0)
+
+    def __init__(self, events):
+        self.events = list(events)
+
+    def pending_events(self):
+        return len(self.events)
+
+    def next_event(self):
+        return self.events.pop(0)
+
+
+def x11_probe(events):
+    probe = X11Probe.__new__(X11Probe)
+    probe._display = FakeDisplay(events)
+    probe._xfixes = True
+    probe._clipboard_stale = False
+    return probe
+
+
+def test_x11_owner_change_event_marks_the_clipboard_stale():
+    probe = x11_probe([FakeEvent(87, 0)])
+    assert probe._clipboard_changed()
+    assert not probe._clipboard_changed()
+
+
+def test_x11_other_events_leave_the_clipboard_alone():
+    assert not x11_probe([FakeEvent(87, 1), FakeEvent(12, None)])._clipboard_changed()
+
+
+def test_x11_without_xfixes_always_rereads():
+    probe = x11_probe([])
+    probe._xfixes = False
+    assert probe._clipboard_changed() and probe._clipboard_changed()
+
+
+def test_backend_without_probe_cannot_be_created():
+    class Incomplete(Probe):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
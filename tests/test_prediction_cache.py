@@ -0,0 +1,71 @@
+import time
+
+from prediction_cache import PredictionCache, hamming, normalize_tokens, simhash
+
+SCREEN = "\n".join(f"def handler_{name}(request): return render(request, template)"
+                   for name in ("index", "detail", "edit", "delete", "list", "search"))
+RESULT = {"activity": "coding", "confidence": 0.9, "description": "Editing views"}
+
+
+def make_cache(tmp_path, **kwargs):
+    return PredictionCache(str(tmp_path / "cache.json"), **kwargs)
+
+
+def test_normalize_tokens_folds_case_and_digits():
+    assert normalize_tokens("Meeting at 10:45, ROOM 12") == normalize_tokens("meeting at 11:30, room 98")
+
+
+def test_simhash_is_stable_and_close_for_near_duplicates():
+    assert simhash("Editor", SCREEN) == simhash("Editor", SCREEN)
+    near = hamming(simhash("Editor", SCREEN), simhash("Editor", SCREEN + "\nclock 12:01"))
+    far = hamming(simhash("Editor", SCREEN), simhash("Browser", "weather forecast rain tomorrow sunny"))
+    assert near < far
+
+
+def test_near_duplicate_snapshot_reuses_the_prediction(tmp_path):
+    cache = make_cache(tmp_path, max_distance=6)
+    cache.put("Editor", SCREEN, RESULT)
+    assert cache.lookup("Editor", SCREEN.replace("index", "home")) == RESULT
+    assert cache.hits == 1
+
+
+def test_different_window_or_content_misses(tmp_path):
+    cache = make_cache(tmp_path, max_distance=3)
+    cache.put("Editor", SCREEN, RESULT)
+    assert cache.lookup("Terminal", SCREEN) is None
+    assert cache.lookup("Editor", "quarterly revenue spreadsheet totals forecast budget") is None
+    assert cache.misses == 2
+
+
+def test_lookup_returns_a_copy(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("Editor", SCREEN, RESULT)
+    cache.lookup("Editor", SCREEN)["activity"] = "gaming"
+    assert cache.lookup("Editor", SCREEN)["activity"] == "coding"
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = make_cache(tmp_path, ttl=0.05)
+    cache.put("Editor", SCREEN, RESULT)
+    time.sleep(0.06)
+    assert cache.lookup("Editor", SCREEN) is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2, max_distance=0)
+    cache.put("A", "alpha text", RESULT)
+    cache.put("B", "beta text", RESULT)
+    cache.lookup("A", "alpha text")
+    cache.put("C", "gamma text", RESULT)
+    assert cache.lookup("B", "beta text") is None
+    assert cache.lookup("A", "alpha text") is not None
+
+
+def test_cache_survives_a_restart(tmp_path):
+    make_cache(tmp_path).put("Editor", SCREEN, RESULT)
+    assert make_cache(tmp_path).lookup("Editor", SCREEN) == RESULT
+
+
+def test_corrupt_cache_file_starts_empty(tmp_path):
+    (tmp_path / "cache.json").write_text("{not json")
+    assert make_cache(tmp_path).lookup("Editor", SCREEN) is None
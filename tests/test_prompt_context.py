@@ -0,0 +1,58 @@
+from prompt_context import build_prompt_context, estimate_tokens, is_garbage, snapshot_lines, take_lines
+
+
+def test_is_garbage():
+    assert is_garbage("~|#@ %%^")
+    assert is_garbage("ab")
+    assert is_garbage("12 34 56")
+    assert not is_garbage("def main(): return 0")
+
+
+def test_snapshot_lines_drop_repeats_across_sources_and_ocr_noise():
+    lines = snapshot_lines({
+        "focused_text": "Hello world\n\n  Hello   WORLD ",
+        "clipboard": "hello world\nCopied line",
+        "ocr_text": "Copied line\n~#|@^ ^~\nMenu bar File Edit",
+    })
+    assert lines == {"focused_text": ["Hello world"], "clipboard": ["Copied line"],
+                     "ocr_text": ["Menu bar File Edit"]}
+
+
+def test_take_lines_marks_what_was_cut():
+    lines = ["a" * 8] * 10
+    kept = take_lines(lines, 9)
+    assert kept == ["a" * 8, "a" * 8, "a" * 8, "[... 7 more line(s) truncated]"]
+    assert take_lines(lines, 1000) == lines
+    assert take_lines([], 5) == []
+
+
+def test_take_lines_keeps_the_head_of_an_oversized_line():
+    assert take_lines(["x" * 1000], 10) == ["x" * 40 + " [...]"]
+    assert take_lines(["x" * 1000, "next"], 10) == ["x" * 40 + " [...]", "[... 1 more line(s) truncated]"]
+
+
+def test_small_snapshot_is_kept_whole():
+    context = build_prompt_context({"active_window": "Editor", "focused_text": "def main():",
+                                    "clipboard": "", "ocr_text": "File Edit View"}, budget=500)
+    assert context.text == "Active Window: Editor\nFocused Text: def main():\nClipboard: \nScreen OCR: File Edit View"
+    assert context.tokens_after == estimate_tokens(context.text)
+
+
+def test_large_snapshot_stays_within_budget():
+    user_data = {
+        "active_window": "Browser",
+        "focused_text": "\n".join(f"focused sentence number {n} with words" for n in range(200)),
+        "clipboard": "short clipboard",
+        "ocr_text": "\n".join(f"screen line {n} some readable words" for n in range(500)),
+    }
+    context = build_prompt_context(user_data, budget=300)
+    assert context.tokens_before > 3000
+    assert context.tokens_after <= 300 + 20
+    # A small source gets all it needs; the big ones share the rest
+    assert "short clipboard" in context.text
+    assert "focused sentence number 0" in context.text and "screen line 0" in context.text
+
+
+def test_missing_and_none_fields():
+    context = build_prompt_context({"clipboard": None})
+    assert context.text.startswith("Active Window: \nFocused Text: \nClipboard: \nScreen OCR: ")
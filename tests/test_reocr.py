@@ -0,0 +1,110 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+import reocr
+from reocr import Reprocessor, archived_screenshots, ocr_screenshot
+from snapshot_store import SnapshotStore
+
+
+def ts(n):
+    return f"2026-10-18_10-00-{n:02d}"
+
+
+def fake_init(scale, text_regions):
+    pass
+
+
+def fake_ocr(job):
+    timestamp, path = job
+    if os.path.getsize(path) == 0:
+        return timestamp, None, "unreadable image"
+    return timestamp, f"text of {timestamp}", ""
+
+
+def write_screenshots(workdir, numbers, broken=()):
+    for n in numbers:
+        path = workdir / "output" / f"screenshot_{ts(n)}.png"
+        if n in broken:
+            path.write_bytes(b"")
+        else:
+            cv2.imwrite(str(path), np.full((20, 20), 255, dtype=np.uint8))
+
+
+def make_reprocessor(workdir, batch=2):
+    return Reprocessor(SnapshotStore(str(workdir / "output" / "snapshots")),
+                       SnapshotStore(str(workdir / "output" / "reocr")),
+                       state_file=str(workdir / "output" / "reocr_state.json"), batch=batch)
+
+
+def run(reprocessor, workdir, monkeypatch):
+    monkeypatch.setattr(reocr, "_init_worker", fake_init)
+    monkeypatch.setattr(reocr, "ocr_screenshot", fake_ocr)
+    return reprocessor.run(archived_screenshots(directory=str(workdir / "output")), workers=2, chunksize=2)
+
+
+def test_archived_screenshots_are_filtered_and_sorted(workdir):
+    write_screenshots(workdir, [5, 1, 3])
+    (workdir / "output" / "screenshot.png").write_bytes(b"")
+    (workdir / "output" / "notes_2026-10-18_10-00-02.png").write_bytes(b"")
+    shots = archived_screenshots(directory="output")
+    assert [timestamp for timestamp, _ in shots] == [ts(1), ts(3), ts(5)]
+    assert [timestamp for timestamp, _ in archived_screenshots(ts(2), ts(5), "output")] == [ts(3), ts(5)]
+    assert archived_screenshots(directory=str(workdir / "missing")) == []
+
+
+def test_unreadable_screenshot_is_reported():
+    assert ocr_screenshot((ts(0), "does/not/exist.png")) == (ts(0), None, "unreadable image")
+
+
+def test_results_are_merged_with_stored_snapshots(workdir, monkeypatch):
+    source = SnapshotStore(str(workdir / "output" / "snapshots"))
+    for n in (1, 3):
+        source.append({"timestamp": ts(n), "active_window": f"window {n}", "focused_text": "", "clipboard": "clip",
+                       "vscode_text": "", "ocr_text": "old text"})
+    source.close()
+    write_screenshots(workdir, [1, 2, 3, 4], broken=[4])
+    reprocessor = make_reprocessor(workdir)
+    stats = run(reprocessor, workdir, monkeypatch)
+    reprocessor.close()
+    assert (stats["frames"], stats["failed"]) == (4, 1)
+    records = {record["timestamp"]: record for record in SnapshotStore(str(workdir / "output" / "reocr"))}
+    assert sorted(records) == [ts(1), ts(2), ts(3)]
+    assert records[ts(1)]["active_window"] == "window 1" and records[ts(1)]["clipboard"] == "clip"
+    assert records[ts(3)]["ocr_text"] == f"text of {ts(3)}"
+    # A screenshot without a stored snapshot becomes a minimal one
+    assert records[ts(2)]["active_window"] == "" and records[ts(2)]["ocr_text"] == f"text of {ts(2)}"
+    # The live store is left untouched
+    assert SnapshotStore(str(workdir / "output" / "snapshots")).get(ts(1))["ocr_text"] == "old text"
+    state = json.loads((workdir / "output" / "reocr_state.json").read_text())
+    assert state == {"done_to": ts(3), "frames": 3, "failed": 1}
+
+
+def test_run_resumes_after_the_last_batch(workdir, monkeypatch):
+    write_screenshots(workdir, range(5))
+    first = make_reprocessor(workdir)
+    assert run(first, workdir, monkeypatch)["frames"] == 5
+    first.close()
+    write_screenshots(workdir, [5, 6])
+    again = make_reprocessor(workdir)
+    assert run(again, workdir, monkeypatch)["frames"] == 2
+    again.close()
+    # A lost checkpoint is recovered from what the target store holds
+    os.remove(workdir / "output" / "reocr_state.json")
+    recovered = make_reprocessor(workdir)
+    assert recovered.state["done_to"] == ts(6)
+    assert run(recovered, workdir, monkeypatch)["frames"] == 0
+    recovered.close()
+    timestamps = [record["timestamp"] for record in SnapshotStore(str(workdir / "output" / "reocr"))]
+    assert timestamps == [ts(n) for n in range(7)]
+
+
+def test_no_archive_explains_where_screenshots_come_from(workdir, capsys):
+    reprocessor = make_reprocessor(workdir)
+    assert reprocessor.run([], workers=1)["frames"] == 0
+    reprocessor.close()
+    out = capsys.readouterr().out
+    assert "No archived screenshots found" in out
+    assert "--keep-screenshots" in out and "BUDDY_RETENTION_SCREENSHOT_DAYS" in out
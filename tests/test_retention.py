@@ -0,0 +1,132 @@
+import datetime
+import os
+
+import config
+from blob_store import BlobStore
+from retention import Compactor, bucket_start, build_rollup, horizon
+from snapshot_store import TIMESTAMP_FORMAT, SnapshotStore
+
+
+def ts(minute, second=0):
+    return f"2026-10-18_{minute // 60:02d}-{minute % 60:02d}-{second:02d}"
+
+
+def make_compactor(tmp_path, segment_bytes=1 << 20, **kwargs):
+    return Compactor(
+        snapshots=SnapshotStore(str(tmp_path / "snapshots"), segment_bytes=segment_bytes, index_every=4),
+        predictions=SnapshotStore(str(tmp_path / "predictions"), segment_bytes=segment_bytes, index_every=4),
+        rollups=SnapshotStore(str(tmp_path / "rollups")),
+        blobs=BlobStore(str(tmp_path / "blobs"), min_size=16, fields=("ocr_text",)),
+        minutes=5, state_file=str(tmp_path / "retention_state.json"), reocr_dir=str(tmp_path / "reocr"),
+        **kwargs)
+
+
+def test_bucket_start_and_horizon_are_aligned():
+    assert bucket_start("2026-10-18_09-58-41", 5) == "2026-10-18_09-55-00"
+    assert bucket_start("2026-10-18_10-00-00", 15) == "2026-10-18_10-00-00"
+    limit = datetime.datetime.strptime(horizon(1, 5), TIMESTAMP_FORMAT)
+    assert limit.minute % 5 == 0 and limit.second == 0
+    assert datetime.datetime.now() - limit >= datetime.timedelta(days=1)
+
+
+def test_build_rollup_summarizes_the_dominant_window():
+    snapshots = [
+        {"timestamp": ts(0), "active_window": "editor.py - Visual Studio Code", "ocr_text": "def main():"},
+        {"timestamp": ts(1), "active_window": "Slack", "ocr_text": "chat"},
+        {"timestamp": ts(2), "active_window": "editor.py - Visual Studio Code", "ocr_text": "return 0"},
+    ]
+    predictions = [{"activity": "coding", "confidence": 0.9}, {"activity": "coding", "confidence": 0.7},
+                   {"activity": "unknown", "confidence": 0.1}]
+    rollup = build_rollup(ts(0), snapshots, predictions, 5)
+    assert rollup["end"] == ts(2) and rollup["snapshots"] == 3
+    assert rollup["active_window"] == "editor.py - Visual Studio Code"
+    assert rollup["windows"] == {"editor.py - Visual Studio Code": 2, "Slack": 1}
+    # The latest snapshot of the dominant window stands in for the bucket
+    assert "return 0" in rollup["text"] and "chat" not in rollup["text"]
+    assert rollup["prediction"] == {"activity": "coding", "confidence": 0.8, "activities": {"coding": 2}}
+    assert build_rollup(ts(0), snapshots, [{"activity": "unknown"}], 5)["prediction"] is None
+
+
+def test_roll_up_folds_whole_buckets_and_resumes(tmp_path):
+    compactor = make_compactor(tmp_path)
+    for minute in range(20):
+        compactor.snapshots.append({"timestamp": ts(minute), "active_window": "Terminal", "ocr_text": ""})
+        compactor.predictions.append({"timestamp": ts(minute), "prediction": {"activity": "coding",
+                                                                              "confidence": 0.5}})
+    assert compactor.roll_up(ts(15)) == 15
+    assert [rollup["timestamp"] for rollup in compactor.rollups] == [ts(0), ts(5), ts(10)]
+    assert all(rollup["snapshots"] == 5 for rollup in compactor.rollups)
+    assert compactor.rollups.get(ts(5))["prediction"]["activity"] == "coding"
+    # A new compactor picks up from the state file
+    resumed = make_compactor(tmp_path)
+    assert resumed.state["rolled_up_to"] == ts(15)
+    assert resumed.roll_up(ts(15)) == 0
+    assert resumed.roll_up(ts(20)) == 5
+
+
+def test_roll_up_stops_at_a_bucket_boundary(tmp_path):
+    compactor = make_compactor(tmp_path)
+    for minute in range(20):
+        compactor.snapshots.append({"timestamp": ts(minute), "active_window": "Terminal"})
+    assert compactor.roll_up(ts(20), max_snapshots=5) == 5
+    assert compactor.state["rolled_up_to"] == ts(5)
+    assert compactor.roll_up(ts(20), max_snapshots=5) == 5
+    assert compactor.state["rolled_up_to"] == ts(10)
+
+
+def test_delete_raw_only_drops_rolled_up_segments(tmp_path):
+    compactor = make_compactor(tmp_path, segment_bytes=300)
+    for minute in range(40):
+        compactor.snapshots.append({"timestamp": ts(minute), "active_window": "Terminal", "pad": "x" * 40})
+    segments = len(compactor.snapshots.segments())
+    # Nothing has been rolled up yet
+    assert compactor.delete_raw(ts(30)) == 0
+    compactor.roll_up(ts(20))
+    removed = compactor.delete_raw(ts(30))
+    assert 0 < removed < segments
+    remaining = [record["timestamp"] for record in compactor.snapshots]
+    assert remaining[0] <= ts(20) and remaining[-1] == ts(39)
+    assert compactor.snapshots.get(ts(0)) is None
+
+
+def test_delete_raw_keeps_the_editor_keyframe_segment(tmp_path):
+    compactor = make_compactor(tmp_path, segment_bytes=300)
+    for minute in range(40):
+        if minute < 20:
+            text = f"file v{minute}"
+        else:
+            # Every later snapshot is a diff against the keyframe at minute 20
+            text = {"$delta": {"key": ts(20), "ops": []}}
+        compactor.snapshots.append({"timestamp": ts(minute), "vscode_text": text, "pad": "x" * 40})
+    compactor.state["rolled_up_to"] = ts(35)
+    compactor.delete_raw(ts(35))
+    assert compactor.snapshots.get(ts(20)) is not None
+    assert compactor.snapshots.get(ts(0)) is None
+
+
+def test_collect_blobs_keeps_references_from_the_reocr_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "BLOB_GC_GRACE", 0.0)
+    compactor = make_compactor(tmp_path)
+    compactor.snapshots.append(compactor.blobs.pack({"timestamp": ts(0), "ocr_text": "live screen text " * 4}))
+    reocr = SnapshotStore(str(tmp_path / "reocr"))
+    reocr.append(compactor.blobs.pack({"timestamp": ts(0), "ocr_text": "re-OCR'd screen text " * 4}))
+    reocr.close()
+    orphan = compactor.blobs.put("text nothing refers to any more")
+    old = 1_000_000_000
+    for directory, _, files in os.walk(tmp_path / "blobs"):
+        for name in files:
+            os.utime(os.path.join(directory, name), (old, old))
+    assert compactor.collect_blobs() == 1
+    assert not os.path.exists(compactor.blobs._path(orphan))
+    reocr_text = SnapshotStore(str(tmp_path / "reocr")).get(ts(0))
+    assert compactor.blobs.lazy(reocr_text)["ocr_text"] == "re-OCR'd screen text " * 4
+
+
+def test_screenshots_are_kept_unless_a_limit_is_set(tmp_path, workdir):
+    old = (datetime.datetime.now() - datetime.timedelta(days=3)).strftime(TIMESTAMP_FORMAT)
+    new = datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+    for timestamp in (old, new):
+        (workdir / "output" / f"screenshot_{timestamp}.png").write_bytes(b"png")
+    assert make_compactor(tmp_path, screenshot_days=0).delete_screenshots() == 0
+    assert make_compactor(tmp_path, screenshot_days=1).delete_screenshots() == 1
+    assert os.listdir(workdir / "output") == [f"screenshot_{new}.png"]
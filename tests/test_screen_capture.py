@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+
+from screen_capture import ScreenCapture, clip_region
+
+
+def bgra_frame(height=60, width=80):
+    frame = np.zeros((height, width, 4), dtype=np.uint8)
+    frame[..., 0] = 10
+    frame[..., 1] = 200
+    frame[..., 2] = 50
+    frame[..., 3] = 255
+    return frame
+
+
+def test_preprocess_matches_opencv_grayscale():
+    capture = ScreenCapture(scale=1.0)
+    frame = bgra_frame()
+    gray = capture.preprocess(frame)
+    assert gray.shape == (60, 80)
+    assert np.array_equal(gray, cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY))
+
+
+def test_preprocess_downscales_and_reuses_buffers():
+    capture = ScreenCapture(scale=0.5)
+    first = capture.preprocess(bgra_frame())
+    assert first.shape == (30, 40)
+    second = capture.preprocess(bgra_frame())
+    assert second is first
+    # A new frame size gets new buffers
+    assert capture.preprocess(bgra_frame(100, 120)).shape == (50, 60)
+
+
+def test_scale_above_one_is_not_upscaled():
+    capture = ScreenCapture(scale=2.0)
+    assert capture.preprocess(bgra_frame()).shape == (60, 80)
+
+
+def test_save_writes_a_png_named_by_timestamp(tmp_path):
+    capture = ScreenCapture(output_dir=str(tmp_path))
+    path = capture.save(bgra_frame(), "2026-10-18_10-00-00")
+    assert path.endswith("screenshot_2026-10-18_10-00-00.png")
+    assert cv2.imread(path).shape == (60, 80, 3)
+
+
+def test_clip_region_intersects_window_and_monitor():
+    monitor = {"left": 0, "top": 0, "width": 1920, "height": 1080}
+    assert clip_region((100, 50, 800, 600), monitor) == {"left": 100, "top": 50, "width": 800, "height": 600}
+    # A window hanging off the edge is cut to the visible part
+    assert clip_region((1800, -20, 400, 300), monitor) == {"left": 1800, "top": 0, "width": 120, "height": 280}
+    # Off-screen or tiny windows give no region
+    assert clip_region((2000, 0, 400, 300), monitor) is None
+    assert clip_region((10, 10, 20, 500), monitor) is None
@@ -0,0 +1,120 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from search_index import (B, K1, SearchIndex, decode_postings, document_terms, encode_postings, merge_terms,
+                          tokenize, write_segment)
+
+WORDS = ["python", "invoice", "slack", "review", "deploy", "budget", "merge", "kernel", "recipe", "flight"]
+
+
+def ts(n):
+    return f"2026-10-18_{n // 3600:02d}-{n // 60 % 60:02d}-{n % 60:02d}"
+
+
+def snapshots(count, seed=7):
+    rng = random.Random(seed)
+    return [{"timestamp": ts(n), "active_window": rng.choice(WORDS).title(),
+             "ocr_text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12)))} for n in range(count)]
+
+
+def brute_force(docs, query, limit=10):
+    """BM25 straight from the definition, over every document"""
+    terms = [document_terms(doc) for doc in docs]
+    average = sum(sum(t.values()) for t in terms) / len(terms)
+    scores = Counter()
+    for term in set(tokenize(query)):
+        df = sum(1 for t in terms if term in t)
+        if not df:
+            continue
+        idf = math.log(1.0 + (len(docs) - df + 0.5) / (df + 0.5))
+        for doc, t in zip(docs, terms):
+            if term in t:
+                norm = K1 * (1.0 - B + B * sum(t.values()) / average)
+                scores[doc["timestamp"]] += idf * t[term] * (K1 + 1) / (t[term] + norm)
+    best = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)[:limit]
+    return [(round(score, 4), timestamp) for timestamp, score in best]
+
+
+def make_index(tmp_path, merger=True, **kwargs):
+    index = SearchIndex(str(tmp_path / "search"), **kwargs)
+    if not merger:
+        index._start_merger = lambda: None
+    return index
+
+
+def test_tokenize():
+    assert tokenize("Fix_the BUG in café.py — x 2026") == ["fix", "the", "bug", "in", "café", "py", "2026"]
+    assert tokenize("") == [] and tokenize(None) == []
+
+
+def test_postings_round_trip_through_varints():
+    postings = [(0, 1), (1, 3), (127, 1), (128, 200), (20000, 1), (2 ** 21, 2 ** 14)]
+    data = encode_postings(postings)
+    assert decode_postings(data) == postings
+    # Small gaps and frequencies take one byte each
+    assert len(encode_postings([(0, 1), (1, 1), (2, 1)])) == 6
+    assert decode_postings(b"") == []
+
+
+def test_merge_terms_renumbers_documents(tmp_path):
+    first = write_segment(str(tmp_path), "a", ["t1", "t2"], [2, 1], iter([("apple", [(0, 1)]), ("kiwi", [(1, 1)])]))
+    second = write_segment(str(tmp_path), "b", ["t3"], [2], iter([("apple", [(0, 2)]), ("zebra", [(0, 1)])]))
+    assert list(merge_terms([first, second])) == [("apple", [(0, 1), (2, 2)]), ("kiwi", [(1, 1)]),
+                                                  ("zebra", [(2, 1)])]
+    assert first.lookup("apple") is not None and first.lookup("aardvark") is None
+    assert first.lookup("mango") is None
+
+
+@pytest.mark.parametrize("query", ["python", "invoice budget", "Slack review deploy", "nothing here"])
+def test_search_matches_brute_force_across_segments_and_buffer(tmp_path, query):
+    docs = snapshots(70)
+    index = make_index(tmp_path, merger=False, flush_docs=16)
+    for doc in docs:
+        index.add(doc)
+    assert len(index.segments) == 4 and len(index._buffer) == 6
+    assert index.search(query, limit=15) == brute_force(docs, query, limit=15)
+
+
+def test_merges_keep_results_unchanged(tmp_path):
+    docs = snapshots(64)
+    index = make_index(tmp_path, merger=False, flush_docs=4, merge_factor=2)
+    for doc in docs:
+        index.add(doc)
+    before = index.search("merge kernel", limit=20)
+    merges = 0
+    while index.merge_once():
+        merges += 1
+    assert merges == 15 and len(index.segments) == 1
+    assert index.segments[0].docs == [doc["timestamp"] for doc in docs]
+    assert index.search("merge kernel", limit=20) == before == brute_force(docs, "merge kernel", limit=20)
+    assert len(list((tmp_path / "search").glob("seg_*.json"))) == 1
+
+
+def test_journal_is_replayed_and_duplicates_ignored(tmp_path):
+    docs = snapshots(10)
+    index = make_index(tmp_path, flush_docs=4)
+    for doc in docs:
+        index.add(doc)
+    # No close(): the last two snapshots only exist in the journal
+    reopened = make_index(tmp_path, flush_docs=4)
+    assert len(reopened) == 10 and len(reopened._buffer) == 2
+    reopened.add(docs[-1])
+    assert len(reopened) == 10
+    assert reopened.search("python recipe") == brute_force(docs, "python recipe")
+    reopened.close()
+
+
+def test_readonly_reader_sees_writer_updates(tmp_path):
+    docs = snapshots(12)
+    writer = make_index(tmp_path, flush_docs=5)
+    reader = make_index(tmp_path, readonly=True)
+    reader.add(docs[0])
+    assert len(reader) == 0
+    for doc in docs:
+        writer.add(doc)
+    assert reader.search("flight", limit=12) == brute_force(docs, "flight", limit=12)
+    writer.close()
+    assert reader.search("flight", limit=12) == brute_force(docs, "flight", limit=12)
@@ -0,0 +1,118 @@
+import datetime
+import os
+import subprocess
+import sys
+
+import pytest
+
+from session_index import SessionIndex, rebuild, report_range
+from snapshot_store import SnapshotStore
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def ts(hour, minute, second=0, day=18):
+    return f"2026-10-{day:02d}_{hour:02d}-{minute:02d}-{second:02d}"
+
+
+def make_index(tmp_path, **kwargs):
+    kwargs.setdefault("gap", 120)
+    return SessionIndex(str(tmp_path / "sessions.json"), str(tmp_path / "sessions"), **kwargs)
+
+
+def test_time_is_credited_to_the_earlier_activity(tmp_path):
+    index = make_index(tmp_path)
+    index.add(ts(9, 0), "coding")
+    index.add(ts(9, 1), "coding")
+    index.add(ts(9, 2), "browsing")
+    index.add(ts(9, 2, 30), "")
+    assert index.totals() == {"coding": 120.0, "browsing": 30.0}
+    assert index.state["current"]["activity"] == "unknown"
+
+
+def test_gaps_are_capped_and_close_the_session(tmp_path):
+    index = make_index(tmp_path)
+    index.add(ts(9, 0), "coding")
+    index.add(ts(9, 30), "coding")
+    assert index.totals() == {"coding": 120.0}
+    sessions = list(index.sessions)
+    assert sessions == [{"timestamp": ts(9, 0), "end": ts(9, 2), "activity": "coding", "seconds": 120.0,
+                         "predictions": 1}]
+
+
+def test_credit_is_split_across_hours_and_days(tmp_path):
+    index = make_index(tmp_path, gap=3600)
+    index.add(ts(23, 50, day=17), "coding")
+    index.add(ts(0, 10), "coding")
+    assert index.hours("2026-10-17") == {"23": {"coding": 600.0}}
+    assert index.hours("2026-10-18") == {"00": {"coding": 600.0}}
+    assert index.totals("2026-10-18", "2026-10-18") == {"coding": 600.0}
+    assert index.totals("2026-10-17", "2026-10-18") == {"coding": 1200.0}
+
+
+def test_stale_and_repeated_updates_are_ignored(tmp_path):
+    index = make_index(tmp_path)
+    index.add(ts(9, 0), "coding")
+    index.add(ts(9, 1), "coding")
+    index.add(ts(9, 1), "browsing")
+    index.add(ts(8, 0), "browsing")
+    assert index.totals() == {"coding": 60.0}
+
+
+def test_journal_is_replayed_after_a_crash(tmp_path):
+    index = make_index(tmp_path, checkpoint_every=3)
+    for minute, activity in enumerate(["coding", "coding", "coding", "browsing", "browsing", "coding"]):
+        index.add(ts(9, minute), activity)
+    expected = index.state
+    # No close(): the last updates only exist in the journal
+    reopened = make_index(tmp_path)
+    assert reopened.state == expected
+    assert [session["activity"] for session in reopened.sessions] == ["coding", "browsing"]
+
+
+def test_readonly_index_never_writes(tmp_path):
+    index = make_index(tmp_path, readonly=True)
+    index.add(ts(9, 0), "coding")
+    index.add(ts(9, 1), "browsing")
+    index.close()
+    assert index.totals() == {"coding": 60.0}
+    assert not os.path.exists(tmp_path / "sessions.json")
+    assert list(index.sessions) == []
+
+
+def test_open_session_is_reported(tmp_path):
+    index = make_index(tmp_path)
+    index.add(ts(9, 0), "coding")
+    index.add(ts(9, 1), "coding")
+    sessions = list(index.sessions_between("2026-10-18", "2026-10-18"))
+    assert sessions[-1]["open"] and sessions[-1]["end"] == ts(9, 1)
+
+
+def test_rebuild_matches_incremental_updates(tmp_path):
+    predictions = SnapshotStore(str(tmp_path / "predictions"))
+    live = make_index(tmp_path / "live")
+    for minute, activity in enumerate(["coding", "coding", "email", "coding", "coding"]):
+        predictions.append({"timestamp": ts(10, minute * 3), "prediction": {"activity": activity}})
+        live.add(ts(10, minute * 3), activity)
+    rebuilt = make_index(tmp_path / "rebuilt")
+    assert rebuild(predictions, rebuilt) == 5
+    assert rebuilt.state == live.state
+
+
+def test_report_range():
+    today = datetime.date.today().isoformat()
+    assert report_range("today") == [today, today]
+    assert report_range("2026-10-01") == ["2026-10-01", "2026-10-01"]
+    week_start, week_end = report_range("week")
+    assert week_start <= week_end == today
+    assert report_range("month")[0].endswith("-01")
+    with pytest.raises(ValueError, match="Unknown report period"):
+        report_range("fortnight")
+
+
+def test_unknown_report_period_prints_usage(tmp_path):
+    result = subprocess.run([sys.executable, os.path.join(REPO, "activity_analyzer.py"), "--report", "lastweek"],
+                            cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 1
+    assert "Unknown report period: lastweek" in result.stdout and "Usage:" in result.stdout
+    assert "Traceback" not in result.stderr
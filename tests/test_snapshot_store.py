@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from snapshot_store import SnapshotStore, import_legacy_files, snapshot_name, timestamp_from_name
+
+
+def ts(n):
+    return f"2026-10-18_{n // 3600:02d}-{n // 60 % 60:02d}-{n % 60:02d}"
+
+
+def filled_store(directory, count=200, segment_bytes=2000, index_every=8):
+    store = SnapshotStore(str(directory), segment_bytes=segment_bytes, index_every=index_every)
+    for n in range(count):
+        store.append({"timestamp": ts(n), "n": n, "text": "x" * 40})
+    return store
+
+
+def test_records_roll_over_into_segments(tmp_path):
+    store = filled_store(tmp_path)
+    assert len(store.segments()) > 5
+    assert [record["n"] for record in store] == list(range(200))
+    for path in tmp_path.glob("segment_*.jsonl"):
+        assert path.stat().st_size <= 2000
+
+
+def test_iter_range_is_inclusive_across_segments(tmp_path):
+    store = filled_store(tmp_path)
+    assert [record["n"] for record in store.iter_range(ts(37), ts(121))] == list(range(37, 122))
+    assert [record["n"] for record in store.iter_range(None, ts(2))] == [0, 1, 2]
+    assert [record["n"] for record in store.iter_range(ts(198), None)] == [198, 199]
+    assert list(store.iter_range(ts(500), None)) == []
+
+
+def test_get_and_latest(tmp_path):
+    store = filled_store(tmp_path)
+    assert store.get(ts(150))["n"] == 150
+    assert store.get("2026-10-19_00-00-00") is None
+    assert [record["n"] for record in store.latest(3)] == [197, 198, 199]
+    assert len(store.latest(500)) == 200
+    assert store.latest(0) == []
+
+
+def test_empty_store(tmp_path):
+    store = SnapshotStore(str(tmp_path / "empty"))
+    assert list(store) == []
+    assert store.latest(5) == []
+    assert store.get(ts(0)) is None
+
+
+def test_reopened_writer_continues_the_last_segment(tmp_path):
+    store = filled_store(tmp_path, count=50)
+    store.close()
+    segments = store.segments()
+    reopened = SnapshotStore(str(tmp_path), segment_bytes=2000, index_every=8)
+    for n in range(50, 60):
+        reopened.append({"timestamp": ts(n), "n": n, "text": "x" * 40})
+    assert reopened.segments()[0] == segments[0]
+    assert [record["n"] for record in reopened] == list(range(60))
+    assert [record["n"] for record in reopened.iter_range(ts(45), ts(55))] == list(range(45, 56))
+
+
+def test_reader_sees_new_records_after_refresh(tmp_path):
+    writer = filled_store(tmp_path, count=10)
+    reader = SnapshotStore(str(tmp_path))
+    assert len(list(reader)) == 10
+    writer.append({"timestamp": ts(10), "n": 10})
+    assert reader.latest(1)[0]["n"] == 10
+
+
+def test_partially_written_line_is_ignored(tmp_path):
+    store = filled_store(tmp_path, count=5)
+    store.close()
+    segment = sorted(tmp_path.glob("segment_*.jsonl"))[-1]
+    with open(segment, "ab") as f:
+        f.write(b'{"timestamp": "2026-10-18_01-00-00", "n"')
+    assert [record["n"] for record in SnapshotStore(str(tmp_path))] == list(range(5))
+
+
+def test_legacy_names_round_trip():
+    assert timestamp_from_name(snapshot_name(ts(5))) == ts(5)
+    assert timestamp_from_name("output/user_data_2026-10-18_00-00-05.json") == ts(5)
+    assert timestamp_from_name("screenshot_2026.png") is None
+
+
+def test_import_legacy_files_only_imports_newer_files(tmp_path):
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    for n in range(4):
+        (legacy / snapshot_name(ts(n))).write_text(json.dumps({"timestamp": ts(n), "n": n}))
+    (legacy / snapshot_name(ts(9))).write_text("{broken")
+    store = SnapshotStore(str(tmp_path / "store"))
+    store.append({"timestamp": ts(1), "n": 1})
+    assert import_legacy_files(store, str(legacy)) == 2
+    assert [record["n"] for record in store] == [1, 2, 3]
+
+
+@pytest.mark.parametrize("index_every", [1, 3, 1000])
+def test_lookups_do_not_depend_on_index_density(tmp_path, index_every):
+    store = filled_store(tmp_path, count=60, index_every=index_every)
+    assert [record["n"] for record in store.iter_range(ts(20), ts(25))] == list(range(20, 26))
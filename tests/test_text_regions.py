@@ -0,0 +1,77 @@
+import sys
+import types
+
+import cv2
+import numpy as np
+
+import text_regions
+from text_regions import build_mosaic, box_coverage, detect_text_regions, merge_lines
+
+
+def page(lines, height=200, width=400, background=255, ink=0):
+    gray = np.full((height, width), background, dtype=np.uint8)
+    for x, y, text in lines:
+        cv2.putText(gray, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, ink, 1, cv2.LINE_AA)
+    return gray
+
+
+def test_text_lines_are_found_in_reading_order():
+    gray = page([(10, 40, "def main():"), (10, 90, "return 42"), (200, 160, "status ok")])
+    boxes = detect_text_regions(gray, join=15)
+    assert len(boxes) == 3
+    assert [box[1] for box in boxes] == sorted(box[1] for box in boxes)
+    # Every box covers its line and stays within the image
+    for (x, y, w, h), baseline in zip(boxes, (40, 90, 160)):
+        assert y < baseline <= y + h + 2
+        assert x >= 0 and y >= 0 and x + w <= 400 and y + h <= 200
+
+
+def test_blank_and_solid_images_have_no_regions():
+    assert detect_text_regions(np.full((100, 100), 255, dtype=np.uint8)) == []
+    solid = np.full((200, 200), 255, dtype=np.uint8)
+    solid[50:150, 50:150] = 0
+    assert detect_text_regions(solid) == []
+
+
+def test_merge_lines_joins_words_of_one_line_only():
+    words = [(60, 10, 30, 12), (10, 11, 40, 12), (100, 10, 20, 12)]
+    far = (300, 10, 20, 12)
+    next_line = (10, 40, 50, 12)
+    assert merge_lines(words + [far, next_line]) == [(10, 10, 110, 13), (300, 10, 20, 12), (10, 40, 50, 12)]
+    assert merge_lines([]) == []
+
+
+def test_box_coverage():
+    assert box_coverage([(0, 0, 10, 10), (20, 20, 10, 5)], (100, 100)) == 0.015
+    assert box_coverage([(0, 0, 1, 1)], (0, 0)) == 0.0
+
+
+def test_mosaic_stacks_boxes_dark_on_light():
+    dark_theme = page([(10, 40, "hello world")], background=30, ink=230)
+    boxes = [(5, 20, 120, 30), (200, 100, 50, 20)]
+    mosaic = build_mosaic(dark_theme, boxes)
+    gap, margin = text_regions.MOSAIC_GAP, text_regions.BOX_MARGIN
+    assert mosaic.shape == (30 + 20 + 4 * margin + 3 * gap, 120 + 2 * margin + 2 * gap)
+    # The dark crop was inverted: the background is light everywhere
+    assert np.median(mosaic) > 200
+    assert mosaic.min() < 100
+
+
+def test_ocr_reads_the_mosaic_or_the_whole_tile(monkeypatch):
+    calls = []
+
+    def image_to_string(image, config=""):
+        calls.append((image.shape, config))
+        return " text "
+
+    fake = types.SimpleNamespace(image_to_string=image_to_string)
+    monkeypatch.setitem(sys.modules, "pytesseract", fake)
+    blank = np.full((100, 300), 255, dtype=np.uint8)
+    assert text_regions.ocr_text_regions(blank) == ""
+    assert calls == []
+    tile = page([(10, 40, "one short line")], height=300, width=400)
+    assert text_regions.ocr_text_regions(tile) == "text"
+    assert calls[-1][1] == "--psm 6" and calls[-1][0] != tile.shape
+    monkeypatch.setattr(text_regions.config, "OCR_REGION_MAX_COVERAGE", 0.0)
+    text_regions.ocr_text_regions(tile)
+    assert calls[-1] == (tile.shape, "")
@@ -0,0 +1,110 @@
+import cv2
+import numpy as np
+
+from tile_ocr import TileCache, TiledOCR, row_spread, split_bands, tile_key, to_gray
+
+
+def text_frame(lines, width=640, height=480):
+    frame = np.full((height, width), 255, dtype=np.uint8)
+    for row, line in enumerate(lines):
+        cv2.putText(frame, line, (10, 30 + row * 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+    return frame
+
+
+class CountingOCR:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, tile):
+        self.calls += 1
+        return f"tile:{tile_key(tile)[-8:]}"
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TileCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_tile_key_depends_on_shape_and_content():
+    tile = np.zeros((4, 6), dtype=np.uint8)
+    assert tile_key(tile) == tile_key(tile.copy())
+    assert tile_key(tile) != tile_key(tile.reshape(6, 4))
+    changed = tile.copy()
+    changed[0, 0] = 1
+    assert tile_key(tile) != tile_key(changed)
+
+
+def test_to_gray_accepts_gray_rgb_and_rgba():
+    gray = np.full((3, 5), 100, dtype=np.uint8)
+    assert to_gray(gray) is gray
+    assert to_gray(np.dstack([gray] * 3)).shape == (3, 5)
+    assert to_gray(np.dstack([gray] * 4)).shape == (3, 5)
+
+
+def test_split_bands_covers_frame_and_cuts_on_quiet_rows():
+    frame = text_frame([f"line {i}" for i in range(11)])
+    spread = row_spread(frame)
+    bands = split_bands(spread, band_height=100, search=20)
+    assert bands[0][0] == 0 and bands[-1][1] == frame.shape[0]
+    assert all(a[1] == b[0] for a, b in zip(bands, bands[1:]))
+    # Every cut lands on the quietest row of its search window
+    for _, cut in bands[:-1]:
+        assert spread[cut] == 0
+
+
+def test_split_bands_short_frame_is_one_band():
+    assert split_bands(np.zeros(50, dtype=np.int16), band_height=100, search=20) == [(0, 50)]
+
+
+def test_split_bands_with_a_search_window_as_large_as_the_band():
+    spread = np.zeros(1000, dtype=np.int16)
+    for band_height, search in ((20, 20), (20, 50), (0, 0)):
+        bands = split_bands(spread, band_height=band_height, search=search)
+        assert bands[0][0] == 0 and bands[-1][1] == 1000
+        assert all(top < bottom for top, bottom in bands)
+        assert all(a[1] == b[0] for a, b in zip(bands, bands[1:]))
+
+
+def test_unchanged_frame_is_served_from_cache():
+    ocr = CountingOCR()
+    tiled = TiledOCR(band_height=100, band_search=20, ocr_func=ocr)
+    frame = text_frame(["alpha", "beta", "gamma", "delta", "epsilon", "zeta"])
+    first = tiled.run(frame)
+    calls = ocr.calls
+    assert calls == tiled.last_dirty > 0
+    assert tiled.run(frame.copy()) == first
+    assert ocr.calls == calls and tiled.last_dirty == 0
+
+
+def test_only_changed_band_is_reocrd():
+    ocr = CountingOCR()
+    tiled = TiledOCR(band_height=100, band_search=20, ocr_func=ocr)
+    lines = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta", "iota", "kappa"]
+    tiled.run(text_frame(lines))
+    lines[-1] = "lambda"
+    tiled.run(text_frame(lines))
+    assert tiled.last_dirty == 1
+
+
+def test_blank_frame_skips_ocr():
+    ocr = CountingOCR()
+    tiled = TiledOCR(ocr_func=ocr)
+    assert tiled.run(np.full((200, 300), 255, dtype=np.uint8)) == ""
+    assert ocr.calls == 0
+
+
+def test_returning_to_an_earlier_screen_hits_the_cache():
+    ocr = CountingOCR()
+    tiled = TiledOCR(band_height=100, band_search=20, ocr_func=ocr)
+    editor, browser = text_frame(["def main():", "return 0"]), text_frame(["Search results", "Next page"])
+    tiled.run(editor)
+    tiled.run(browser)
+    calls = ocr.calls
+    tiled.run(editor)
+    assert ocr.calls == calls
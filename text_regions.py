@@ -0,0 +1,123 @@
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+import config
+
+Box = Tuple[int, int, int, int]
+
+# Text lines taller than this are images or large UI blocks, not text
+MIN_TEXT_HEIGHT = 6
+MAX_TEXT_HEIGHT = 120
+MIN_TEXT_WIDTH = 8
+# Share of edge pixels inside a box: text is dense but never solid
+MIN_FILL = 0.08
+MAX_FILL = 0.9
+# Blank margin around each box and between boxes in the mosaic
+BOX_MARGIN = 2
+MOSAIC_GAP = 8
+# Boxes on the same line closer than this many line heights are one phrase
+MERGE_GAP = 1.5
+
+_GRADIENT_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+
+
+def detect_text_regions(gray: np.ndarray, join: int = config.OCR_REGION_JOIN) -> List[Box]:
+    """
+    Bounding boxes (x, y, w, h) of likely text lines in a grayscale image.
+    Characters have strong edges in every direction: a morphological
+    gradient picks them out, Otsu binarizes it and a wide closing joins the
+    characters of a line into one blob. Blobs with the size and edge density
+    of a text line are kept, in reading order.
+    """
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, _GRADIENT_KERNEL)
+    _, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    line_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(1, join), 1))
+    lines = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, line_kernel)
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < MIN_TEXT_HEIGHT or h > MAX_TEXT_HEIGHT or w < MIN_TEXT_WIDTH:
+            continue
+        fill = cv2.countNonZero(edges[y:y + h, x:x + w]) / (w * h)
+        if MIN_FILL <= fill <= MAX_FILL:
+            boxes.append((x, y, w, h))
+    return merge_lines(boxes)
+
+
+def _same_line(a: Box, b: Box) -> bool:
+    overlap = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    if overlap < 0.5 * min(a[3], b[3]):
+        return False
+    gap = max(a[0], b[0]) - min(a[0] + a[2], b[0] + b[2])
+    return gap <= MERGE_GAP * max(a[3], b[3])
+
+
+def merge_lines(boxes: List[Box]) -> List[Box]:
+    """Join boxes of the same line that are only a word gap apart, then sort in reading order"""
+    merged: List[Box] = []
+    # Indexes of merged boxes still within reach; boxes arrive left to right
+    active: List[int] = []
+    for box in sorted(boxes, key=lambda box: box[0]):
+        active = [index for index in active if merged[index][0] + merged[index][2]
+                  + MERGE_GAP * max(merged[index][3], MAX_TEXT_HEIGHT) >= box[0]]
+        for index in active:
+            other = merged[index]
+            if _same_line(box, other):
+                x0, y0 = min(box[0], other[0]), min(box[1], other[1])
+                x1 = max(box[0] + box[2], other[0] + other[2])
+                y1 = max(box[1] + box[3], other[1] + other[3])
+                merged[index] = (x0, y0, x1 - x0, y1 - y0)
+                break
+        else:
+            active.append(len(merged))
+            merged.append(box)
+    merged.sort(key=lambda box: (box[1], box[0]))
+    return merged
+
+
+def box_coverage(boxes: List[Box], shape: Tuple[int, int]) -> float:
+    """Share of the image area covered by the boxes (overlaps counted twice)"""
+    area = shape[0] * shape[1]
+    return sum(w * h for _, _, w, h in boxes) / area if area else 0.0
+
+
+def build_mosaic(gray: np.ndarray, boxes: List[Box]) -> np.ndarray:
+    """
+    Stack the boxes into one dark-on-light image, one box per row, so
+    tesseract reads every candidate in a single call. Light-on-dark crops
+    (dark themes) are inverted first.
+    """
+    height, width = gray.shape[:2]
+    crops = []
+    for x, y, w, h in boxes:
+        crop = gray[max(0, y - BOX_MARGIN):min(height, y + h + BOX_MARGIN),
+                    max(0, x - BOX_MARGIN):min(width, x + w + BOX_MARGIN)]
+        if np.median(crop) < 128:
+            crop = cv2.bitwise_not(crop)
+        crops.append(crop)
+    mosaic = np.full((sum(crop.shape[0] + MOSAIC_GAP for crop in crops) + MOSAIC_GAP,
+                      max(crop.shape[1] for crop in crops) + 2 * MOSAIC_GAP), 255, dtype=np.uint8)
+    top = MOSAIC_GAP
+    for crop in crops:
+        mosaic[top:top + crop.shape[0], MOSAIC_GAP:MOSAIC_GAP + crop.shape[1]] = crop
+        top += crop.shape[0] + MOSAIC_GAP
+    return mosaic
+
+
+def ocr_text_regions(tile: np.ndarray) -> str:
+    """
+    Drop-in replacement for tile_ocr.ocr_tile that only shows tesseract the
+    detected text lines. Tiles without candidates are skipped; tiles that
+    are mostly text are read whole, as a mosaic would not save anything.
+    """
+    boxes = detect_text_regions(tile)
+    if not boxes:
+        return ""
+    import pytesseract
+    if box_coverage(boxes, tile.shape) >= config.OCR_REGION_MAX_COVERAGE:
+        return pytesseract.image_to_string(tile).strip()
+    # One box per line: tesseract's "uniform block of text" mode fits the mosaic
+    return pytesseract.image_to_string(build_mosaic(tile, boxes), config="--psm 6").strip()
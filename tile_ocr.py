@@ -0,0 +1,169 @@
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+import config
+
+# Rows whose pixel spread stays under this value are treated as empty
+# background; bands made only of such rows are never sent to tesseract.
+BLANK_ROW_SPREAD = 8
+
+
+class TileCache:
+    """Bounded LRU map from tile content hash to OCR text"""
+
+    def __init__(self, max_entries: int = config.OCR_TILE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        text = self._entries.get(key)
+        if text is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str):
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def to_gray(image) -> np.ndarray:
+    """Return a 2-D uint8 grayscale array for a PIL image or NumPy frame"""
+    frame = np.asarray(image)
+    if frame.ndim == 2:
+        return frame
+    if frame.shape[2] == 4:
+        return cv2.cvtColor(frame, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+
+
+def tile_key(tile: np.ndarray) -> str:
+    """Content hash of a tile, including its shape"""
+    digest = hashlib.blake2b(np.ascontiguousarray(tile), digest_size=16).hexdigest()
+    return f"{tile.shape[1]}x{tile.shape[0]}:{digest}"
+
+
+def row_spread(gray: np.ndarray) -> np.ndarray:
+    """Per-row max-min intensity; near zero on rows without any text"""
+    return gray.max(axis=1).astype(np.int16) - gray.min(axis=1)
+
+
+def split_bands(spread: np.ndarray, band_height: int = config.OCR_BAND_HEIGHT,
+                search: int = config.OCR_BAND_SEARCH) -> List[Tuple[int, int]]:
+    """
+    Cut the frame into full-width bands of roughly band_height rows.
+    Each cut is moved to the quietest row near the target so text lines are
+    not split between two bands, which keeps the stitched text equal to a
+    full-frame pass.
+    """
+    height = len(spread)
+    bands = []
+    top = 0
+    while True:
+        # A search window reaching back to top would allow empty bands
+        lo = max(top + 1, top + band_height - search)
+        hi = max(lo + 1, top + band_height + search)
+        if hi >= height:
+            break
+        cut = lo + int(np.argmin(spread[lo:hi]))
+        bands.append((top, cut))
+        top = cut
+    bands.append((top, height))
+    return bands
+
+
+def ocr_tile(tile: np.ndarray) -> str:
+    """Run tesseract on a single tile"""
+    # Imported here so only the processes that actually OCR pay for it
+    import pytesseract
+    return pytesseract.image_to_string(tile).strip()
+
+
+class TiledOCR:
+    """
+    OCR that only re-reads the parts of the screen that changed.
+    The new frame is diffed against the previous one; bands without changed
+    rows keep their previous cache key, every other band is looked up by
+    content hash and only cache misses go through tesseract.
+    """
+
+    def __init__(self, band_height: int = config.OCR_BAND_HEIGHT,
+                 band_search: int = config.OCR_BAND_SEARCH,
+                 diff_threshold: int = config.OCR_DIFF_THRESHOLD,
+                 cache: Optional[TileCache] = None,
+                 ocr_func: Callable[[np.ndarray], str] = ocr_tile,
+                 executor: Optional[Executor] = None):
+        self.band_height = band_height
+        self.band_search = band_search
+        self.diff_threshold = diff_threshold
+        self.cache = cache if cache is not None else TileCache()
+        self.ocr_func = ocr_func
+        # Dirty tiles are fanned out over the executor (e.g. a process pool)
+        self.executor = executor
+        self.last_dirty = 0
+        self.last_bands = 0
+        self._prev_frame: Optional[np.ndarray] = None
+        self._prev_keys: Dict[Tuple[int, int], str] = {}
+
+    def changed_rows(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        """Boolean mask of rows that differ from the previous frame, or None"""
+        prev = self._prev_frame
+        if prev is None or prev.shape != gray.shape:
+            return None
+        return cv2.absdiff(prev, gray).max(axis=1) > self.diff_threshold
+
+    def ocr_tiles(self, tiles: List[np.ndarray]) -> List[str]:
+        """OCR the dirty tiles of one frame"""
+        if self.executor is not None and len(tiles) > 1:
+            return list(self.executor.map(self.ocr_func, tiles))
+        return [self.ocr_func(tile) for tile in tiles]
+
+    def run(self, image) -> str:
+        """OCR a frame, reusing cached text for every unchanged band"""
+        gray = to_gray(image)
+        spread = row_spread(gray)
+        bands = split_bands(spread, self.band_height, self.band_search)
+        changed = self.changed_rows(gray)
+
+        texts: List[str] = [""] * len(bands)
+        keys: Dict[Tuple[int, int], str] = {}
+        pending: List[Tuple[int, str]] = []
+        for index, (top, bottom) in enumerate(bands):
+            if spread[top:bottom].max() < BLANK_ROW_SPREAD:
+                continue
+            key = self._prev_keys.get((top, bottom))
+            if key is None or changed is None or changed[top:bottom].any():
+                key = tile_key(gray[top:bottom])
+            keys[(top, bottom)] = key
+            text = self.cache.get(key)
+            if text is None:
+                pending.append((index, key))
+            else:
+                texts[index] = text
+
+        if pending:
+            tiles = [gray[bands[index][0]:bands[index][1]] for index, _ in pending]
+            for (index, key), text in zip(pending, self.ocr_tiles(tiles)):
+                self.cache.put(key, text)
+                texts[index] = text
+
+        self.last_dirty = len(pending)
+        self.last_bands = len(bands)
+        # Copy so a capture backend reusing its buffer can't alter the reference
+        self._prev_frame = gray.copy()
+        self._prev_keys = keys
+        return "\n".join(text for text in texts if text)
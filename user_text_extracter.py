@@ -1,87 +1,97 @@
 import datetime
-import json
-import os
+import queue
+import sys
+import threading
 import time
-import pyperclip
 from pynput import mouse, keyboard
-import platform
-import subprocess
+
+import config
+from jsonl_log import JsonlLog
+from platform_probe import create_probe
 
 #for text to be pushed in JSON, user needs to right click on the text 
 
-# Output file
-OUTPUT_FILE = "hover_output.json"
-os.makedirs("screenshots", exist_ok=True)
+# Append-only output log, plus the clicks waiting for extraction
+log = JsonlLog(config.CLICK_LOG_FILE)
+clicks = queue.Queue()
+
+# Shared long-lived probe for window title and clipboard, created on first use
+_probe = None
 
-# Platform check
-IS_WINDOWS = platform.system() == "Windows"
+def get_probe():
+    global _probe
+    if _probe is None:
+        _probe = create_probe()
+    return _probe
 
 # Get active window title
 def get_active_window_title():
     try:
-        if IS_WINDOWS:
-            import win32gui
-            hwnd = win32gui.GetForegroundWindow()
-            return win32gui.GetWindowText(hwnd).strip()
-        else:
-            script = 'tell application "System Events" to get name of (processes where frontmost is true)'
-            output = subprocess.check_output(['osascript', '-e', script]).decode().strip()
-            return output
+        return get_probe().probe().window_title.strip()
     except Exception as e:
         return f"[WindowError: {e}]"
 
 # Simulate Ctrl+A, Ctrl+C and get clipboard content
-def extract_focused_text():
+def extract_focused_text(timeout=0.5):
+    get_probe().probe()  # Sync the clipboard change counter before copying
     kb = keyboard.Controller()
     # Select All
     with kb.pressed(keyboard.Key.ctrl):
         kb.press('a')
         kb.release('a')
-    time.sleep(0.1)
     # Copy
     with kb.pressed(keyboard.Key.ctrl):
         kb.press('c')
         kb.release('c')
-    time.sleep(0.2)
-    return pyperclip.paste().strip()
+    # Wait for the clipboard change counter instead of a fixed sleep
+    deadline = time.monotonic() + timeout
+    while True:
+        result = get_probe().probe()
+        if result.clipboard_changed or time.monotonic() >= deadline:
+            return result.clipboard.strip()
+        time.sleep(0.02)
 
-# On right-click press
-def on_click(x, y, button, pressed):
-    if button.name == 'right' and pressed:
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+# Extract and log queued clicks off the listener thread
+def extraction_worker():
+    while True:
+        timestamp = clicks.get()
         window_title = get_active_window_title()
         try:
             foctext = extract_focused_text()
             if not foctext:
                 print("⚠ No text copied.")
-                return
+                continue
         except Exception as e:
             foctext = f"[Clipboard Error: {e}]"
 
-        entry = {
+        log.append({
             "timestamp": timestamp,
             "active_window": window_title,
             "foctext": foctext
-        }
-
-        try:
-            if os.path.exists(OUTPUT_FILE):
-                with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-                    logs = json.load(f)
-            else:
-                logs = []
+        })
+        print(f"--- Logged at {timestamp}")
 
-            logs.append(entry)
+# On right-click press: only record the click, the worker does the rest
+def on_click(x, y, button, pressed):
+    if button.name == 'right' and pressed:
+        clicks.put(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
-            with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-                json.dump(logs, f, indent=2)
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--tail":
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+        for entry in log.tail(count):
+            print(f"[{entry.get('timestamp')}] {entry.get('active_window')}: {entry.get('foctext', '')[:80]!r}")
+        sys.exit(0)
 
-            print(f"--- Logged at {timestamp}")
-        except Exception as e:
-            print(f" Error logging: {e}")
-
-# Start mouse listener
-print("--- Right-click to extract page text as foctext... Ctrl+C to stop.")
-with mouse.Listener(on_click=on_click) as listener:
-    listener.join()
+    threading.Thread(target=extraction_worker, name="click-extractor", daemon=True).start()
 
+    # Start mouse listener
+    print("--- Right-click to extract page text as foctext... Ctrl+C to stop.")
+    try:
+        with mouse.Listener(on_click=on_click) as listener:
+            listener.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        log.close()
+        get_probe().close()